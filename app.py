@@ -3,26 +3,75 @@ Web Interface for PeopleCounter
 Flask application for uploading videos and processing them
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Request, Response, g, render_template, request, jsonify, send_file
 import os
+import shutil
 import subprocess
 import sys
+import tempfile
+import time
+import uuid
 from datetime import datetime
 from werkzeug.utils import secure_filename
 
+from utils.chunked_upload import ChunkedUploadStore, ChunkError, DEFAULT_CHUNK_SIZE
+from utils.job_manager import JOB_CREATION_FLAGS, JobManager, job_dir
+from utils.metrics import (MetricsRegistry, UPLOAD_BUCKETS, read_job_metrics,
+                           render_histogram_state)
+from utils.results_store import BUCKETS, DEFAULT_DB_PATH, ResultsStore, parse_time
+from utils.threads import thread_budget, thread_env
+from utils.time_ranges import parse_time_ranges
+
+
+class UploadRequest(Request):
+    """
+    Request whose multipart file parts are streamed straight to a temporary
+    file in the uploads folder (Werkzeug's default keeps small parts in memory
+    and spools larger ones to the system temp dir, often a RAM disk), so
+    /upload only has to rename it into place
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.NamedTemporaryFile('wb+', dir=app.config['UPLOAD_FOLDER'], prefix='.incoming_',
+                                           suffix='.part', delete=False)
+
+
 app = Flask(__name__)
+app.request_class = UploadRequest
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
+JOBS_FOLDER = 'jobs'
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv'}
 MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
+# Jobs share data/mall_entry.mp4 and the report file, so run one at a time
+MAX_CONCURRENT_JOBS = 1
+# Each job's torch / OpenCV / BLAS thread pools get an equal share of the cores
+# (with one job at a time that share is every core: the budget only matters once
+# MAX_CONCURRENT_JOBS is raised)
+JOB_THREADS = thread_budget(MAX_CONCURRENT_JOBS)
+RESULTS_DB = DEFAULT_DB_PATH
+# Upper bound on rows returned by /api/events
+MAX_EVENTS_PAGE = 10000
+REPORT_PATH = 'people_counter_report.html'
 
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
+for folder in (UPLOAD_FOLDER, JOBS_FOLDER):
+    if not os.path.exists(folder):
+        os.makedirs(folder)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
+# In-progress chunked uploads live next to finished uploads
+chunked_uploads = ChunkedUploadStore(os.path.join(UPLOAD_FOLDER, '.chunked'), MAX_FILE_SIZE)
+
+# Metrics
+metrics = MetricsRegistry()
+upload_bytes = metrics.counter('peoplecounter_upload_bytes_total', 'Bytes received through /upload')
+uploads_total = metrics.counter('peoplecounter_uploads_total', 'Upload requests by outcome', ['status'])
+upload_duration = metrics.histogram('peoplecounter_upload_duration_seconds',
+                                    'Time spent receiving and saving an upload', buckets=UPLOAD_BUCKETS)
+
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
@@ -38,26 +87,32 @@ def index():
 @app.route('/upload', methods=['POST'])
 def upload_file():
     """Handle video file upload"""
+    start = time.perf_counter()
     try:
         # Check if file is in request
         if 'file' not in request.files:
+            uploads_total.inc(status='rejected')
             return jsonify({'error': 'No file provided'}), 400
         
         file = request.files['file']
         
         if file.filename == '':
+            uploads_total.inc(status='rejected')
             return jsonify({'error': 'No file selected'}), 400
         
         if not allowed_file(file.filename):
+            uploads_total.inc(status='rejected')
             return jsonify({'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
         
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-        filename = timestamp + filename
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        # Move the received file into place (it was streamed to disk while parsing)
+        filename, filepath = upload_target_path(file.filename)
+        
+        file.stream.close()
+        os.replace(file.stream.name, filepath)
         
-        file.save(filepath)
+        upload_bytes.inc(os.path.getsize(filepath))
+        upload_duration.observe(time.perf_counter() - start)
+        uploads_total.inc(status='success')
         
         return jsonify({
             'success': True,
@@ -67,7 +122,172 @@ def upload_file():
         }), 200
     
     except Exception as e:
+        uploads_total.inc(status='error')
         return jsonify({'error': str(e)}), 500
+    finally:
+        discard_incoming_files()
+
+
+def discard_incoming_files():
+    """Remove the temporary files of the request's file parts that were not moved into place"""
+    for storage in request.files.values():
+        storage.stream.close()
+        try:
+            os.remove(storage.stream.name)
+        except OSError:
+            pass
+
+
+def upload_target_path(original_filename):
+    """Timestamped, sanitised destination for an uploaded file"""
+    filename = secure_filename(original_filename)
+    # The random part keeps concurrent uploads of the same file in the same second apart
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_') + uuid.uuid4().hex[:6] + '_'
+    filename = timestamp + filename
+    return filename, os.path.join(app.config['UPLOAD_FOLDER'], filename)
+
+
+@app.route('/upload/init', methods=['POST'])
+def upload_init():
+    """Start (or resume) a chunked upload: {filename, size, fingerprint, chunk_size?, upload_id?}"""
+    try:
+        data = request.get_json() or {}
+        filename = data.get('filename', '')
+        if not filename:
+            return jsonify({'error': 'No file selected'}), 400
+        if not allowed_file(filename):
+            return jsonify({'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
+        
+        status = chunked_uploads.init(filename, int(data.get('size', 0)), data.get('fingerprint', ''),
+                                      data.get('chunk_size', DEFAULT_CHUNK_SIZE), data.get('upload_id'))
+        return jsonify(status), 200
+    except ChunkError as e:
+        return jsonify({'error': str(e)}), e.status
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/upload/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """Which chunks of an upload have been received and verified"""
+    try:
+        return jsonify(chunked_uploads.status(upload_id)), 200
+    except ChunkError as e:
+        return jsonify({'error': str(e)}), e.status
+
+
+@app.route('/upload/<upload_id>', methods=['DELETE'])
+def upload_abort(upload_id):
+    """Abandon a chunked upload and delete its partial data"""
+    try:
+        chunked_uploads.abort(upload_id)
+        return jsonify({'success': True, 'upload_id': upload_id}), 200
+    except ChunkError as e:
+        return jsonify({'error': str(e)}), e.status
+
+
+@app.route('/upload/<upload_id>/chunk/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    """Receive one raw chunk body; X-Chunk-SHA256 (optional) is verified"""
+    try:
+        sha256 = chunked_uploads.write_chunk(upload_id, index, request.stream, request.content_length,
+                                             request.headers.get('X-Chunk-SHA256'))
+        upload_bytes.inc(request.content_length or 0)
+        return jsonify({'index': index, 'sha256': sha256}), 200
+    except ChunkError as e:
+        return jsonify({'error': str(e)}), e.status
+
+
+@app.route('/upload/<upload_id>/complete', methods=['POST'])
+def upload_complete(upload_id):
+    """Assemble a finished chunked upload into the uploads folder"""
+    try:
+        meta = chunked_uploads.status(upload_id)
+        filename, filepath = upload_target_path(meta['filename'])
+        chunked_uploads.complete(upload_id, filepath)
+        # From the session's start, so a resumed upload includes the time before it was interrupted
+        if 'started_at' in meta:
+            upload_duration.observe(time.time() - meta['started_at'])
+        uploads_total.inc(status='success')
+        
+        return jsonify({
+            'success': True,
+            'filename': filename,
+            'filepath': filepath,
+            'message': 'File uploaded successfully'
+        }), 200
+    except ChunkError as e:
+        return jsonify({'error': str(e)}), e.status
+
+
+def launch_job(job):
+    """Start main.py for a queued job (called by the job manager)"""
+    filepath = job.params['filepath']
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    # Copy file to data folder for processing
+    data_folder = os.path.join(base_dir, 'data')
+    if not os.path.exists(data_folder):
+        os.makedirs(data_folder)
+    
+    target_path = os.path.join(data_folder, 'mall_entry.mp4')
+    shutil.copy(filepath, target_path)
+    job.params['staged_path'] = target_path
+    # Remove old report if present so status reflects the new run
+    report_path = os.path.join(base_dir, REPORT_PATH)
+    for path in (report_path, report_path + '.gz'):
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception:
+            pass
+
+    # Run main.py in subprocess and pass the original uploaded filepath so
+    # the processing script can delete it after finishing.
+    
+    # Try to use the virtual environment Python if available
+    venv_python = os.path.join(os.path.dirname(base_dir), '.venv', 'Scripts', 'python.exe')
+    if os.path.exists(venv_python):
+        python_exe = venv_python
+    else:
+        # Fallback to system python
+        python_exe = sys.executable
+
+    # Start processing in background and pass the uploaded file path
+    main_py = os.path.join(base_dir, 'main.py')
+    metrics_file = os.path.join(job_dir(JOBS_FOLDER, job.id), 'metrics.json')
+    job.params['metrics_file'] = metrics_file
+    command = [python_exe, main_py, filepath, '--metrics-file', os.path.abspath(metrics_file),
+               '--job-id', job.id, '--db', os.path.abspath(RESULTS_DB), '--threads', str(JOB_THREADS)]
+    if job.params.get('camera'):
+        command += ['--camera', job.params['camera']]
+    if job.params.get('recorded_at'):
+        command += ['--recorded-at', str(job.params['recorded_at'])]
+    for start, end in job.params.get('ranges') or []:
+        command += ['--range', f"{start}-{end if end is not None else ''}"]
+    # BLAS / OpenMP read their pool size from the environment when first loaded
+    env = dict(os.environ, **thread_env(JOB_THREADS))
+    return subprocess.Popen(command, cwd=base_dir, env=env, creationflags=JOB_CREATION_FLAGS)
+
+
+def cleanup_job(job):
+    """
+    Called by the job manager once a job has ended. A cancelled job's upload
+    (a finished job removes its own) and staged copy in data/ are deleted
+    here, after its process has exited and closed them (Windows cannot delete
+    open files).
+    """
+    if job.status != 'cancelled':
+        return
+    for path in (job.params.get('filepath'), job.params.get('staged_path')):
+        try:
+            if path and os.path.exists(path):
+                os.remove(path)
+        except Exception as e:
+            print(f"Warning: failed to remove {path}: {e}")
+
+
+job_manager = JobManager(launch_job, max_concurrent=MAX_CONCURRENT_JOBS, on_exit=cleanup_job)
 
 
 @app.route('/process', methods=['POST'])
@@ -85,45 +305,21 @@ def process_video():
         if not os.path.exists(filepath):
             return jsonify({'error': 'File not found'}), 404
         
-        # Copy file to data folder for processing
-        import shutil
-        data_folder = os.path.join(os.path.dirname(__file__), 'data')
-        if not os.path.exists(data_folder):
-            os.makedirs(data_folder)
-        
-        target_path = os.path.join(data_folder, 'mall_entry.mp4')
-        shutil.copy(filepath, target_path)
-        # Remove old report if present so status reflects the new run
-        report_path = os.path.join(os.path.dirname(__file__), 'people_counter_report.html')
+        # Optional windows of video time: ["0:10:00-0:25:00", [3600, 5400], ...]
         try:
-            if os.path.exists(report_path):
-                os.remove(report_path)
-        except Exception:
-            pass
-
-        # Run main.py in subprocess and pass the original uploaded filepath so
-        # the processing script can delete it after finishing.
+            ranges = parse_time_ranges(data.get('ranges'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Try to use the virtual environment Python if available
-        venv_python = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.venv', 'Scripts', 'python.exe')
-        if os.path.exists(venv_python):
-            python_exe = venv_python
-        else:
-            # Fallback to system python
-            python_exe = sys.executable
-
-        # Start processing in background and pass the uploaded file path
-        main_py = os.path.join(os.path.dirname(__file__), 'main.py')
-        try:
-            subprocess.Popen([python_exe, main_py, filepath], cwd=os.path.dirname(__file__))
-        except Exception:
-            # Fallback to running without argument if something goes wrong
-            subprocess.Popen([python_exe, main_py], cwd=os.path.dirname(__file__))
+        # Queue the job; it starts as soon as a processing slot is free
+        job = job_manager.submit(filename=filename, filepath=filepath, camera=data.get('camera'),
+                                 recorded_at=data.get('recorded_at'), ranges=ranges)
         
         return jsonify({
             'success': True,
             'message': 'Video processing started. The application will open in a moment.',
-            'status': 'processing'
+            'status': 'processing' if job.status == 'running' else job.status,
+            'job_id': job.id
         }), 200
     
     except Exception as e:
@@ -137,23 +333,182 @@ def process_video():
 @app.route('/status')
 def status():
     """Check if processing is complete"""
-    report_path = 'people_counter_report.html'
-    report_exists = os.path.exists(report_path)
+    report_exists = os.path.exists(REPORT_PATH)
     
-    return jsonify({
+    response = {
         'report_generated': report_exists,
-        'report_path': report_path if report_exists else None
-    }), 200
+        'report_path': REPORT_PATH if report_exists else None
+    }
+    
+    job_id = request.args.get('job_id')
+    if job_id:
+        job = job_manager.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        response['job'] = job.to_dict()
+    
+    return jsonify(response), 200
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancel a queued or running job. A running job is sent SIGTERM
+    (CTRL_BREAK_EVENT on Windows), releases its capture, worker processes and
+    metrics file and exits without writing a report; it is killed if it does
+    not stop in time.
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status != 'cancelled':
+        return jsonify({'error': f'Job already {job.status}', 'job': job.to_dict()}), 409
+    
+    # Its upload and staged video are removed by cleanup_job once the process has exited
+    return jsonify({'success': True, 'job': job.to_dict()}), 200
 
 
 @app.route('/report')
 def get_report():
-    """Serve the generated report"""
-    report_path = 'people_counter_report.html'
-    if os.path.exists(report_path):
-        return send_file(report_path, mimetype='text/html')
-    else:
+    """
+    Serve the generated report. Responses carry ETag / Last-Modified so
+    repeat requests get 304 Not Modified; clients accepting gzip get the copy
+    compressed when the report was written.
+    """
+    if not os.path.exists(REPORT_PATH):
         return jsonify({'error': 'Report not generated yet'}), 404
+    
+    compressed_path = REPORT_PATH + '.gz'
+    if ('gzip' in request.accept_encodings and os.path.exists(compressed_path)
+            and os.path.getmtime(compressed_path) >= os.path.getmtime(REPORT_PATH)):
+        response = send_file(compressed_path, mimetype='text/html', conditional=True,
+                             download_name=os.path.basename(REPORT_PATH))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = send_file(REPORT_PATH, mimetype='text/html', conditional=True)
+    response.vary.add('Accept-Encoding')
+    # Always revalidate: the report is replaced by every job
+    response.cache_control.no_cache = True
+    return response
+
+
+def get_store():
+    """Per-request results database connection"""
+    if 'results_store' not in g:
+        g.results_store = ResultsStore(RESULTS_DB)
+    return g.results_store
+
+
+@app.teardown_appcontext
+def close_store(exc):
+    store = g.pop('results_store', None)
+    if store is not None:
+        store.close()
+
+
+def query_range():
+    """Parse ?start=&end= (ISO 8601 or epoch seconds)"""
+    return parse_time(request.args.get('start')), parse_time(request.args.get('end'))
+
+
+@app.route('/api/jobs')
+def api_jobs():
+    """Stored jobs, newest first"""
+    try:
+        start, end = query_range()
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        return jsonify({'jobs': get_store().jobs(request.args.get('camera'), start, end, limit)}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/api/events')
+def api_events():
+    """Events in a time range: ?camera=&job_id=&type=entry|exit&start=&end=&limit=&offset="""
+    try:
+        start, end = query_range()
+        limit = min(request.args.get('limit', 1000, type=int), MAX_EVENTS_PAGE)
+        events = get_store().events(camera=request.args.get('camera'), job_id=request.args.get('job_id'),
+                                    event_type=request.args.get('type'), start=start, end=end,
+                                    limit=limit, offset=request.args.get('offset', 0, type=int))
+        return jsonify({'events': events, 'count': len(events)}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/api/aggregates')
+def api_aggregates():
+    """Entries/exits per bucket: ?bucket=minute|hour|day&camera=&start=&end="""
+    bucket = request.args.get('bucket', 'hour')
+    if bucket not in BUCKETS:
+        return jsonify({'error': f'Invalid bucket. Allowed: {", ".join(BUCKETS)}'}), 400
+    try:
+        start, end = query_range()
+        rows = get_store().aggregate(bucket, request.args.get('camera'), start, end)
+        return jsonify({'bucket': bucket, 'aggregates': rows}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/api/occupancy')
+def api_occupancy():
+    """Stored occupancy bins for a camera: ?camera=&bin=1|60&start=&end="""
+    camera = request.args.get('camera', 'default')
+    bin_seconds = request.args.get('bin', 60, type=int)
+    try:
+        start, end = query_range()
+        return jsonify({'camera': camera, 'bin_seconds': bin_seconds,
+                        'bins': get_store().occupancy(camera, bin_seconds, start, end)}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+def collect_job_metrics():
+    """Scrape-time collector: queue state plus each job's latest snapshot"""
+    lines = [
+        '# HELP peoplecounter_job_queue_depth Jobs waiting for a processing slot',
+        '# TYPE peoplecounter_job_queue_depth gauge',
+        f'peoplecounter_job_queue_depth {job_manager.queue_depth()}',
+        '# HELP peoplecounter_jobs_active Jobs currently processing',
+        '# TYPE peoplecounter_jobs_active gauge',
+        f'peoplecounter_jobs_active {job_manager.active_count()}',
+    ]
+
+    snapshots = []
+    for job in job_manager.jobs():
+        metrics_file = job.params.get('metrics_file')
+        snapshot = read_job_metrics(metrics_file) if metrics_file else None
+        if snapshot:
+            snapshots.append((job.id, snapshot))
+
+    simple = [
+        ('peoplecounter_job_fps', 'gauge', 'Average frames per second of a job', 'fps'),
+        ('peoplecounter_job_frames_processed_total', 'counter', 'Frames processed by a job', 'frames_processed'),
+        ('peoplecounter_job_entries_total', 'counter', 'Entry events counted by a job', 'entries'),
+        ('peoplecounter_job_exits_total', 'counter', 'Exit events counted by a job', 'exits'),
+    ]
+    for name, kind, documentation, field in simple:
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} {kind}')
+        for job_id, snapshot in snapshots:
+            lines.append(f'{name}{{job_id="{job_id}"}} {snapshot.get(field, 0)}')
+
+    name = 'peoplecounter_detector_latency_seconds'
+    lines.append(f'# HELP {name} Detector inference latency per frame')
+    lines.append(f'# TYPE {name} histogram')
+    for job_id, snapshot in snapshots:
+        if 'detector_latency' in snapshot:
+            lines.extend(render_histogram_state(name, (('job_id', job_id),), snapshot['detector_latency']))
+    return lines
+
+
+metrics.add_collector(collect_job_metrics)
+
+
+@app.route('/metrics')
+def get_metrics():
+    """Expose service and job metrics in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 
 if __name__ == '__main__':
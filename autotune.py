@@ -0,0 +1,175 @@
+"""
+PeopleCounter - Host Auto-Tuner
+Benchmarks a short sample of the target video with different batch sizes,
+inference sizes, detection strides and thread counts, and writes the fastest
+setting that reaches the target fps within the count-agreement tolerance to a
+profile file that main.py loads on start.
+
+Usage:
+    python autotune.py --video data/mall_entry.mp4 --target-fps 25
+    python autotune.py --video clip.mp4 --frames 500 --tolerance 0.05 --profile profile.json
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from main import run_counter
+from utils.config import DEFAULT_PROFILE_PATH, load_config, merge_config, save_profile
+from utils.detectors import DETECTOR_BACKENDS, create_detector
+from utils.threads import apply_thread_budget
+from benchmarks.common import count_agreement, host_info, print_table
+
+
+# Tuned settings: name -> config section
+PARAMETERS = {
+    'imgsz': 'detector',
+    'detection_stride': 'video',
+    'batch_size': 'detector',
+    'threads': 'runtime',
+}
+
+
+def default_candidates(base):
+    """Values tried per parameter when none are given on the command line"""
+    cpus = os.cpu_count() or 1
+    imgsz = base['detector']['imgsz']
+    return {
+        'imgsz': [s for s in sorted({imgsz, 480, 320}, reverse=True) if s <= imgsz],
+        'detection_stride': [1, 2, 3],
+        'batch_size': [1, 2, 4, 8],
+        'threads': sorted({t for t in (1, 2, 4, cpus // 2, cpus) if 0 < t <= cpus}),
+    }
+
+
+def profile_overrides(settings):
+    """Settings as the nested config overrides stored in the profile"""
+    overrides = {}
+    for name, value in settings.items():
+        overrides.setdefault(PARAMETERS[name], {})[name] = value
+    return overrides
+
+
+def run_trial(video_path, base, settings, frames):
+    """Run the counter headless over the sample with one setting; returns the result dict"""
+    config = merge_config(base, profile_overrides(settings))
+    apply_thread_budget(config)
+    detector = create_detector(config['detector'])
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_counter(video_path, detector, config, display=False, max_frames=frames)
+
+
+def tune(video_path, base, candidates, frames, tolerance):
+    """
+    Coordinate descent over the parameters, most influential first: each
+    parameter is swept with the others held at the best values found so far.
+    Returns (trials, reference) where trials is a list of (settings, result).
+    """
+    current = {
+        'imgsz': base['detector']['imgsz'],
+        'detection_stride': 1,
+        'batch_size': base['detector']['batch_size'],
+        'threads': max(candidates['threads']),
+    }
+    trials = {}
+
+    def measure(settings):
+        key = tuple(sorted(settings.items()))
+        if key not in trials:
+            trials[key] = (dict(settings), run_trial(video_path, base, settings, frames))
+            result = trials[key][1]
+            print(f"  {dict(settings)} -> {result['fps']:.1f} FPS, "
+                  f"{result['entry_count']} in / {result['exit_count']} out")
+        return trials[key][1]
+
+    # Reference counts: full inference size, every frame
+    reference = measure(current)
+    for name in PARAMETERS:
+        best_value, best_fps = current[name], -1.0
+        for value in candidates[name]:
+            result = measure(dict(current, **{name: value}))
+            if count_agreement(reference, result) >= 1.0 - tolerance and result['fps'] > best_fps:
+                best_value, best_fps = value, result['fps']
+        current[name] = best_value
+    return list(trials.values()), reference
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find the fastest settings for this host')
+    parser.add_argument('--video', default=os.path.join('data', 'mall_entry.mp4'))
+    parser.add_argument('--config', default=None, help='JSON config file (default: config.json if present)')
+    parser.add_argument('--detector', choices=sorted(DETECTOR_BACKENDS), default=None)
+    parser.add_argument('--frames', type=int, default=300, help='Sample length in frames (default: 300)')
+    parser.add_argument('--target-fps', type=float, default=None,
+                        help='Required processing speed (default: the video frame rate)')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Allowed loss of count agreement with the reference run (default: 0.1)')
+    parser.add_argument('--profile', default=DEFAULT_PROFILE_PATH, help='Profile file to write')
+    parser.add_argument('--imgsz', type=int, action='append', help='Inference size to try (repeatable)')
+    parser.add_argument('--stride', type=int, action='append', help='Detection stride to try (repeatable)')
+    parser.add_argument('--batch-size', type=int, action='append', help='Batch size to try (repeatable)')
+    parser.add_argument('--threads', type=int, action='append', help='Thread count to try (repeatable)')
+    parser.add_argument('--force', action='store_true',
+                        help='Write the fastest setting even if it misses the target fps')
+    args = parser.parse_args(argv)
+
+    base = load_config(args.config)
+    if args.detector:
+        base['detector']['backend'] = args.detector
+
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        print(f"Error: Could not open video file {args.video}")
+        return 1
+    target_fps = args.target_fps or cap.get(cv2.CAP_PROP_FPS) or 25.0
+    cap.release()
+
+    candidates = default_candidates(base)
+    for name, values in (('imgsz', args.imgsz), ('detection_stride', args.stride),
+                         ('batch_size', args.batch_size), ('threads', args.threads)):
+        if values:
+            candidates[name] = values
+
+    print(f"Tuning {base['detector']['backend']} on {args.frames} frames of {args.video} "
+          f"(target {target_fps:.1f} FPS, tolerance {args.tolerance:.0%})")
+    trials, reference = tune(args.video, base, candidates, args.frames, args.tolerance)
+
+    rows = []
+    for settings, result in trials:
+        agreement = count_agreement(reference, result)
+        rows.append(dict(settings, fps=result['fps'], agreement=agreement,
+                         ok=agreement >= 1.0 - args.tolerance and result['fps'] >= target_fps))
+    print()
+    print_table(rows, list(PARAMETERS) + ['fps', 'agreement', 'ok'])
+
+    passing = [row for row in rows if row['agreement'] >= 1.0 - args.tolerance]
+    best = max(passing, key=lambda row: row['fps'])
+    settings = {name: best[name] for name in PARAMETERS}
+    print(f"\nFastest setting within tolerance: {settings} at {best['fps']:.1f} FPS")
+    if best['fps'] < target_fps and not args.force:
+        print(f"No setting reaches {target_fps:.1f} FPS on this host; profile not written "
+              f"(use --force to write it anyway)")
+        return 1
+
+    save_profile(args.profile, profile_overrides(settings), {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'host': host_info(),
+        'video': args.video,
+        'backend': base['detector']['backend'],
+        'sample_frames': args.frames,
+        'target_fps': target_fps,
+        'tolerance': args.tolerance,
+        'measured': {'fps': best['fps'], 'agreement': best['agreement']},
+    })
+    print(f"Profile written: {args.profile}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+PeopleCounter Benchmarks
+Reproducible performance measurements for the counting pipeline
+"""
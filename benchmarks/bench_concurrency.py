@@ -0,0 +1,93 @@
+"""
+Concurrent Job Benchmark
+Runs N main.py jobs at once on the same clip and reports total throughput
+against the number of concurrent jobs, with and without per-job thread budgets.
+
+Usage:
+    python -m benchmarks.bench_concurrency --video data/mall_entry.mp4
+    python -m benchmarks.bench_concurrency --video clip.mp4 --detector stub --jobs 1 --jobs 2 --jobs 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.detectors import DETECTOR_BACKENDS
+from utils.threads import thread_budget, thread_env
+from benchmarks.common import print_table
+
+
+MAIN_PY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+
+def run_jobs(video_path, num_jobs, threads, extra_args):
+    """
+    Start num_jobs headless main.py processes at once, each in its own working
+    directory. Returns (wall seconds, total frames processed).
+    """
+    env = dict(os.environ, **thread_env(threads))
+    with tempfile.TemporaryDirectory() as tmp:
+        processes = []
+        start = time.perf_counter()
+        for i in range(num_jobs):
+            cwd = os.path.join(tmp, f'job{i}')
+            os.makedirs(cwd)
+            command = [sys.executable, MAIN_PY, '--video', os.path.abspath(video_path), '--no-display',
+                       '--db', '', '--threads', str(threads)] + extra_args
+            processes.append((cwd, subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL)))
+        for _, process in processes:
+            process.wait()
+        elapsed = time.perf_counter() - start
+
+        frames = 0
+        for cwd, process in processes:
+            if process.returncode != 0:
+                raise SystemExit(f"Job failed with exit code {process.returncode}")
+            with open(os.path.join(cwd, 'people_counter_results.json'), 'r', encoding='utf-8') as f:
+                frames += json.load(f)['total_frames']
+    return elapsed, frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Total throughput against the number of concurrent jobs')
+    parser.add_argument('--video', default=os.path.join('data', 'mall_entry.mp4'))
+    parser.add_argument('--jobs', type=int, action='append', help='Concurrent jobs (repeatable)')
+    parser.add_argument('--detector', choices=sorted(DETECTOR_BACKENDS), default=None)
+    parser.add_argument('--config', default=None)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.video):
+        print(f"Error: Could not open video file {args.video}")
+        return 1
+    extra_args = []
+    if args.detector:
+        extra_args += ['--detector', args.detector]
+    if args.config:
+        extra_args += ['--config', os.path.abspath(args.config)]
+
+    cpus = os.cpu_count() or 1
+    rows = []
+    for num_jobs in args.jobs or [1, 2, 4]:
+        # 0 = every job uses library defaults (all cores); otherwise cores / jobs
+        for threads in (0, thread_budget(num_jobs, cpus)):
+            elapsed, frames = run_jobs(args.video, num_jobs, threads, extra_args)
+            rows.append({
+                'jobs': num_jobs,
+                'threads/job': threads or 'default',
+                'wall_s': elapsed,
+                'total_fps': frames / elapsed,
+                'fps/job': frames / elapsed / num_jobs,
+            })
+
+    print(f"{cpus} CPUs, wall time includes process start-up and model loading\n")
+    print_table(rows, ['jobs', 'threads/job', 'wall_s', 'total_fps', 'fps/job'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Detector Backend Benchmark
+Runs every available detector backend over the same clip and reports
+frames per second and detection agreement with a reference backend.
+
+Usage:
+    python -m benchmarks.bench_detectors --video data/mall_entry.mp4
+    python -m benchmarks.bench_detectors --video clip.mp4 --backend ultralytics \\
+        --backend onnxruntime --backend onnxruntime-int8 --backend opencv --frames 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.config import load_config, merge_config
+from utils.detectors import create_detector
+from utils.sort_tracker import iou_batch
+from benchmarks.common import percentile, print_table
+
+
+# Benchmark variants: name -> detector config overrides
+VARIANTS = {
+    'ultralytics': {'backend': 'ultralytics'},
+    'onnxruntime': {'backend': 'onnxruntime'},
+    'onnxruntime-int8': {'backend': 'onnxruntime', 'quantize': True},
+    'opencv': {'backend': 'opencv'},
+    'stub': {'backend': 'stub'},
+}
+
+
+def read_frames(video_path, max_frames):
+    """Decode up to max_frames frames once so every backend sees identical input"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise SystemExit(f"Error: Could not open video file {video_path}")
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def match_detections(reference, candidate, iou_threshold=0.5):
+    """Number of one-to-one matches with IoU >= threshold"""
+    if len(reference) == 0 or len(candidate) == 0:
+        return 0
+    iou = iou_batch(reference[:, :4], candidate[:, :4])
+    rows, cols = linear_sum_assignment(-iou)
+    return int(np.sum(iou[rows, cols] >= iou_threshold))
+
+
+def agreement(reference_outputs, outputs, iou_threshold=0.5):
+    """Precision/recall/F1 of `outputs` against the reference backend, plus count error"""
+    matched = sum(match_detections(r, o, iou_threshold) for r, o in zip(reference_outputs, outputs))
+    ref_total = sum(len(r) for r in reference_outputs)
+    out_total = sum(len(o) for o in outputs)
+    precision = matched / out_total if out_total else 1.0
+    recall = matched / ref_total if ref_total else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    count_error = np.mean([abs(len(r) - len(o)) for r, o in zip(reference_outputs, outputs)])
+    return precision, recall, f1, float(count_error)
+
+
+def run_backend(detector_config, frames, warmup=3):
+    detector = create_detector(detector_config)
+    for frame in frames[:warmup]:
+        detector.detect(frame)
+    outputs, latencies = [], []
+    start = time.perf_counter()
+    for frame in frames:
+        t0 = time.perf_counter()
+        outputs.append(detector.detect(frame))
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    return outputs, latencies, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare detector backends on the same clip')
+    parser.add_argument('--video', default=os.path.join('data', 'mall_entry.mp4'))
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--backend', action='append', choices=sorted(VARIANTS),
+                        help='Variant to run (repeatable). The first one is the agreement reference.')
+    parser.add_argument('--config', default=None, help='Base config file')
+    parser.add_argument('--iou', type=float, default=0.5, help='IoU for counting two detections as the same')
+    args = parser.parse_args(argv)
+
+    frames = read_frames(args.video, args.frames)
+    print(f"Loaded {len(frames)} frames from {args.video}")
+    base = load_config(args.config)['detector']
+
+    rows = []
+    reference = None
+    for name in args.backend or ['ultralytics', 'onnxruntime', 'onnxruntime-int8', 'opencv']:
+        try:
+            outputs, latencies, elapsed = run_backend(merge_config(base, VARIANTS[name]), frames)
+        except ImportError as e:
+            print(f"Skipping {name}: {e}")
+            continue
+
+        row = {
+            'backend': name,
+            'fps': len(frames) / elapsed,
+            'p50_ms': 1000 * percentile(latencies, 50),
+            'p95_ms': 1000 * percentile(latencies, 95),
+            'dets': sum(len(o) for o in outputs),
+        }
+        if reference is None:
+            reference = (name, outputs)
+        precision, recall, f1, count_error = agreement(reference[1], outputs, args.iou)
+        row.update(precision=precision, recall=recall, f1=f1, count_err=count_error)
+        rows.append(row)
+
+    if not rows:
+        print("No backend could be run")
+        return 1
+    print(f"\nAgreement measured against '{reference[0]}' (IoU >= {args.iou})\n")
+    print_table(rows, ['backend', 'fps', 'p50_ms', 'p95_ms', 'dets', 'precision', 'recall', 'f1', 'count_err'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
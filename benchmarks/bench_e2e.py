@@ -0,0 +1,198 @@
+"""
+End-to-End Pipeline Benchmark
+Generates synthetic videos with known entry/exit counts and runs the whole
+decode -> detect -> track -> count -> report chain of main.py on them.
+Records fps, per-frame latency percentiles, peak RSS and count accuracy
+against the ground truth, and flags regressions against a saved baseline.
+
+Every scenario runs in a fresh process, so peak RSS is per scenario.
+
+Usage:
+    python -m benchmarks.bench_e2e                  # run and compare to baseline
+    python -m benchmarks.bench_e2e --save-baseline  # record a new baseline
+    python -m benchmarks.bench_e2e --scenario hd --detector ultralytics
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.common import (find_regressions, load_baseline, save_baseline, percentile, print_table,
+                               count_agreement, DEFAULT_TOLERANCE)
+from benchmarks.synthetic_video import generate_video
+
+
+BASELINE_NAME = 'e2e'
+
+# Synthetic video scenarios: resolution, length and number of walking lanes
+SCENARIOS = {
+    'small': dict(width=640, height=360, num_frames=300, lanes=6),
+    'hd': dict(width=1280, height=720, num_frames=600, lanes=8),
+    'fullhd-busy': dict(width=1920, height=1080, num_frames=300, lanes=16),
+}
+
+# Metrics compared against the baseline and which direction is better
+REGRESSION_METRICS = {
+    'fps': 'higher',
+    'p95_ms': 'lower',
+    'peak_rss_mb': 'lower',
+    'accuracy': 'higher',
+}
+
+
+def video_path(name, seed, video_dir):
+    """Generated videos are cached by scenario, scenario parameters and seed"""
+    digest = hashlib.sha256(repr(sorted(SCENARIOS[name].items())).encode()).hexdigest()[:8]
+    return os.path.join(video_dir, f'people_counter_bench_{name}_{digest}_{seed}.avi')
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (None where the resource module is missing)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_scenario(path, overrides, config_path=None):
+    """Run the full main.py chain on one video (in a worker process) and return its measurements"""
+    from main import fill_report, run_counter
+    from utils.config import load_config
+    from utils.detectors import create_detector
+    from utils.metrics import JobMetricsWriter
+    from utils.report_generator import ReportGenerator
+
+    class FrameLatencyRecorder(JobMetricsWriter):
+        """Job metrics that keep the wall time between consecutive finished frames"""
+
+        def __init__(self):
+            super().__init__(None)
+            self.frame_ms = []
+            self.detector_ms = []
+            self._last = None
+
+        def frame_done(self):
+            now = time.perf_counter()
+            if self._last is not None:
+                self.frame_ms.append(1000.0 * (now - self._last))
+            self._last = now
+            super().frame_done()
+
+        def observe_detector(self, seconds):
+            self.detector_ms.append(1000.0 * seconds)
+            super().observe_detector(seconds)
+
+    config = load_config(config_path, overrides=overrides)
+    detector = create_detector(config['detector'])
+    report_gen = ReportGenerator()
+    recorder = FrameLatencyRecorder()
+
+    with tempfile.TemporaryDirectory(prefix='people_counter_bench_') as output_dir:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_counter(path, detector, config, display=False, report_gen=report_gen,
+                                 job_metrics=recorder)
+        counted = time.perf_counter()
+        fill_report(report_gen, result, path)
+        report_gen.save_results(os.path.join(output_dir, 'people_counter_results.json'))
+        report_gen.generate_html_report(os.path.join(output_dir, 'people_counter_report.html'))
+        done = time.perf_counter()
+
+    return {
+        'frames': result['frame_count'],
+        'entry_count': result['entry_count'],
+        'exit_count': result['exit_count'],
+        # Throughput of the whole chain, report included (first frame latency too)
+        'fps': result['frame_count'] / (done - start),
+        'p50_ms': percentile(recorder.frame_ms, 50),
+        'p95_ms': percentile(recorder.frame_ms, 95),
+        'p99_ms': percentile(recorder.frame_ms, 99),
+        'detector_p50_ms': percentile(recorder.detector_ms, 50),
+        'report_ms': 1000.0 * (done - counted),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run_benchmarks(names, detector, seed, video_dir, config_path=None):
+    rows = []
+    results = {}
+    overrides = {'detector': {'backend': detector}} if detector else None
+    for name in names:
+        path = video_path(name, seed, video_dir)
+        truth_path = path + '.truth'
+        if os.path.exists(path) and os.path.exists(truth_path):
+            with open(truth_path, 'r', encoding='utf-8') as f:
+                entries, exits, people = (int(v) for v in f.read().split())
+            truth = {'entry_count': entries, 'exit_count': exits, 'people': people}
+        else:
+            print(f"Generating {name} video ...")
+            truth = generate_video(path, seed=seed, **SCENARIOS[name])
+            with open(truth_path, 'w', encoding='utf-8') as f:
+                f.write(f"{truth['entry_count']} {truth['exit_count']} {truth['people']}")
+
+        # A fresh process per scenario keeps ru_maxrss (a high-water mark) per scenario
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context('spawn')) as pool:
+            measured = pool.submit(run_scenario, path, overrides, config_path).result()
+
+        measured['accuracy'] = count_agreement(truth, measured)
+        results[name] = measured
+        rows.append(dict(measured, scenario=name, size=f"{SCENARIOS[name]['width']}x{SCENARIOS[name]['height']}",
+                         truth=f"{truth['entry_count']}/{truth['exit_count']}",
+                         counted=f"{measured['entry_count']}/{measured['exit_count']}"))
+
+    print_table(rows, ['scenario', 'size', 'frames', 'fps', 'p50_ms', 'p95_ms', 'p99_ms', 'detector_p50_ms',
+                       'report_ms', 'peak_rss_mb', 'truth', 'counted', 'accuracy'])
+    return results
+
+
+def main(argv=None):
+    from utils.detectors import DETECTOR_BACKENDS
+
+    parser = argparse.ArgumentParser(description='Benchmark the full counting pipeline on synthetic videos')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Scenario to run (repeatable, default: all)')
+    parser.add_argument('--detector', choices=sorted(DETECTOR_BACKENDS), default='stub',
+                        help="Detector backend (default: stub; real models do not detect the synthetic shapes, "
+                             "so only their speed is meaningful)")
+    parser.add_argument('--config', default=None, help='JSON config applied to every run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--video-dir', default=tempfile.gettempdir(), help='Where generated videos are cached')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed relative slowdown before flagging a regression')
+    parser.add_argument('--save-baseline', action='store_true', help='Store results as the new baseline')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scenario or list(SCENARIOS), args.detector, args.seed, args.video_dir,
+                             args.config)
+
+    if args.save_baseline:
+        path = save_baseline(BASELINE_NAME, results)
+        print(f"\nBaseline saved: {path}")
+        return 0
+
+    baseline = load_baseline(BASELINE_NAME)
+    if baseline is None:
+        print("\nNo baseline recorded yet (run with --save-baseline)")
+        return 0
+    regressions = find_regressions(results, baseline['results'], REGRESSION_METRICS, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        return 1
+    print(f"\nNo regressions beyond {args.tolerance * 100:.0f}% tolerance")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Counting Geometry Benchmark
+Times the vectorized line-crossing / zone-membership update against a
+per-track Python loop with tens of lines and hundreds of tracks, and checks
+both produce the same events.
+
+Usage:
+    python -m benchmarks.bench_geometry
+    python -m benchmarks.bench_geometry --lines 50 --zones 10 --tracks 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.counting_geometry import CountingGeometry, CountingLine, CountingZone
+from benchmarks.common import print_table
+
+
+FRAME_SIZE = (1920, 1080)
+
+
+def random_geometry(num_lines, num_zones, rng):
+    width, height = FRAME_SIZE
+    lines = [CountingLine(f'line{i}', rng.uniform(0, [width, height]), rng.uniform(0, [width, height]))
+             for i in range(num_lines)]
+    zones = []
+    for i in range(num_zones):
+        center = rng.uniform([200, 200], [width - 200, height - 200])
+        angles = np.sort(rng.uniform(0, 2 * np.pi, size=6))
+        radius = rng.uniform(50, 200, size=6)
+        zones.append(CountingZone(f'zone{i}', center + np.stack([np.cos(angles), np.sin(angles)], 1) * radius[:, None]))
+    return lines, zones
+
+
+def random_walks(num_tracks, num_frames, rng):
+    """Per-frame (ids, centroids) for tracks walking randomly, with some churn"""
+    width, height = FRAME_SIZE
+    positions = rng.uniform(0, [width, height], size=(num_tracks, 2))
+    velocities = rng.normal(0, 6, size=(num_tracks, 2))
+    ids = np.arange(num_tracks)
+    next_id = num_tracks
+    frames = []
+    for _ in range(num_frames):
+        positions = positions + velocities
+        # ~1% of tracks end each frame and are replaced by new IDs
+        replaced = rng.random(num_tracks) < 0.01
+        ids = ids.copy()
+        ids[replaced] = np.arange(next_id, next_id + replaced.sum())
+        next_id += int(replaced.sum())
+        positions[replaced] = rng.uniform(0, [width, height], size=(int(replaced.sum()), 2))
+        frames.append((ids.copy(), positions.copy()))
+    return frames
+
+
+class LoopGeometry:
+    """Reference implementation: one Python loop per track and line, like the original main()"""
+
+    def __init__(self, lines, zones):
+        self.lines = lines
+        self.zones = zones
+        self.state = {}
+
+    def update(self, track_ids, centroids):
+        events = []
+        new_state = {}
+        for track_id, point in zip(track_ids, centroids):
+            track_id = int(track_id)
+            prev, sides, counted, inside = self.state.get(track_id, (point, None, set(), None))
+            # Last side of each line the track was strictly on (kept while on the line)
+            now_sides = {line.name: _sign(_side(line.p1, line.p2, point)) for line in self.lines}
+            sides = now_sides if sides is None else sides
+            for line in self.lines:
+                side = sides[line.name]
+                if now_sides[line.name] == 0:
+                    now_sides[line.name] = side
+                if line.name in counted:
+                    continue
+                direction = _crossing(side, prev, point, line.p1, line.p2)
+                if direction:
+                    counted = counted | {line.name}
+                    events.append(('line', line.name, track_id, 'entry' if direction > 0 else 'exit'))
+            now_inside = tuple(_inside(point, zone.polygon) for zone in self.zones)
+            if inside is not None:
+                for zone, was, now in zip(self.zones, inside, now_inside):
+                    if was != now:
+                        events.append(('zone', zone.name, track_id, 'entry' if now else 'exit'))
+            new_state[track_id] = (point, now_sides, counted, now_inside)
+        self.state = new_state
+        return events
+
+
+def _side(a, b, p):
+    return (b[0] - a[0]) * (p[1] - a[1]) - (b[1] - a[1]) * (p[0] - a[0])
+
+
+def _sign(value):
+    return int(value > 0) - int(value < 0)
+
+
+def _crossing(prev_side, prev, curr, a, b):
+    curr_side = _sign(_side(a, b, curr))
+    if prev_side * curr_side >= 0 or _side(prev, curr, a) * _side(prev, curr, b) >= 0:
+        return 0
+    return curr_side
+
+
+def _inside(point, polygon):
+    x, y = point
+    result = False
+    for i in range(len(polygon)):
+        x1, y1 = polygon[i]
+        x2, y2 = polygon[(i + 1) % len(polygon)]
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            result = not result
+    return result
+
+
+def time_updates(geometry, frames):
+    events = []
+    start = time.perf_counter()
+    for ids, points in frames:
+        events.append(sorted(geometry.update(ids, points)))
+    return time.perf_counter() - start, events
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark vectorized counting geometry')
+    parser.add_argument('--lines', type=int, action='append', help='Number of lines (repeatable)')
+    parser.add_argument('--zones', type=int, default=5)
+    parser.add_argument('--tracks', type=int, action='append', help='Number of tracks (repeatable)')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rows = []
+    mismatch = False
+    for num_lines in args.lines or [10, 50]:
+        for num_tracks in args.tracks or [100, 500]:
+            rng = np.random.default_rng(args.seed)
+            lines, zones = random_geometry(num_lines, args.zones, rng)
+            frames = random_walks(num_tracks, args.frames, rng)
+
+            vec_time, vec_events = time_updates(CountingGeometry(lines, zones), frames)
+            loop_lines, loop_zones = random_geometry(num_lines, args.zones, np.random.default_rng(args.seed))
+            loop_time, loop_events = time_updates(LoopGeometry(loop_lines, loop_zones), frames)
+
+            same = vec_events == loop_events
+            mismatch |= not same
+            rows.append({
+                'lines': num_lines,
+                'zones': args.zones,
+                'tracks': num_tracks,
+                'vectorized_ms': 1000 * vec_time / len(frames),
+                'loop_ms': 1000 * loop_time / len(frames),
+                'speedup': loop_time / vec_time,
+                'events': sum(len(e) for e in vec_events),
+                'identical': same,
+            })
+
+    print_table(rows, ['lines', 'zones', 'tracks', 'vectorized_ms', 'loop_ms', 'speedup', 'events', 'identical'])
+    return 1 if mismatch else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
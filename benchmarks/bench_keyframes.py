@@ -0,0 +1,72 @@
+"""
+Keyframe Benchmark
+Runs the full counting pipeline headless with the detector on every k-th
+frame (optical flow in between) and reports throughput, detector calls and
+count agreement with k=1. With --compare-stride the same detector budget is
+also spent as a plain detection stride (frames in between skipped).
+
+Usage:
+    python -m benchmarks.bench_keyframes --video data/mall_entry.mp4
+    python -m benchmarks.bench_keyframes --video clip.mp4 --interval 1 --interval 3 --interval 6 --compare-stride
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import run_counter
+from utils.config import load_config, merge_config
+from utils.detectors import DETECTOR_BACKENDS, create_detector
+from benchmarks.common import count_agreement, print_table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Throughput and count agreement per keyframe interval')
+    parser.add_argument('--video', default=os.path.join('data', 'mall_entry.mp4'))
+    parser.add_argument('--interval', type=int, action='append', help='Keyframe interval k (repeatable)')
+    parser.add_argument('--compare-stride', action='store_true',
+                        help='Also run detection stride k (no propagation) for every interval')
+    parser.add_argument('--detector', choices=sorted(DETECTOR_BACKENDS), default=None)
+    parser.add_argument('--config', default=None)
+    args = parser.parse_args(argv)
+
+    base = load_config(args.config)
+    if args.detector:
+        base['detector']['backend'] = args.detector
+    intervals = sorted(set([1] + (args.interval or [2, 3, 5])))
+    detector = create_detector(base['detector'])
+
+    runs = [('keyframes', k, {'keyframe_interval': k, 'detection_stride': 1}) for k in intervals]
+    if args.compare_stride:
+        runs += [('stride', k, {'keyframe_interval': 1, 'detection_stride': k}) for k in intervals if k > 1]
+
+    rows = []
+    reference = None
+    for mode, k, video in runs:
+        config = merge_config(base, {'video': video})
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_counter(args.video, detector, config, display=False)
+        if result is None:
+            print(f"Error: Could not open video file {args.video}")
+            return 1
+        reference = reference or result
+        rows.append({
+            'mode': mode,
+            'k': k,
+            'fps': result['fps'],
+            'detector_frames': result['detector_frames'],
+            'entries': result['entry_count'],
+            'exits': result['exit_count'],
+            'agreement': count_agreement(reference, result),
+        })
+
+    print("Count agreement relative to the detector on every frame (k=1)\n")
+    print_table(rows, ['mode', 'k', 'fps', 'detector_frames', 'entries', 'exits', 'agreement'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
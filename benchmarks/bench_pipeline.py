@@ -0,0 +1,73 @@
+"""
+Pipeline Mode Benchmark
+Runs the full counting pipeline headless in the single-process (inline) loop
+and in the shared-memory multiprocess pipeline and reports frames per second
+and the bytes copied between processes per frame.
+
+Usage:
+    python -m benchmarks.bench_pipeline --video data/mall_entry.mp4
+    python -m benchmarks.bench_pipeline --video clip.mp4 --detector stub --slots 4 --slots 16
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+import cv2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import run_counter
+from utils.config import load_config, merge_config
+from utils.detectors import DETECTOR_BACKENDS, create_detector
+from benchmarks.common import print_table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inline loop vs shared-memory process pipeline')
+    parser.add_argument('--video', default=os.path.join('data', 'mall_entry.mp4'))
+    parser.add_argument('--slots', type=int, action='append', help='Ring slots for the process pipeline (repeatable)')
+    parser.add_argument('--detector', choices=sorted(DETECTOR_BACKENDS), default=None)
+    parser.add_argument('--config', default=None)
+    args = parser.parse_args(argv)
+
+    base = load_config(args.config)
+    if args.detector:
+        base['detector']['backend'] = args.detector
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        print(f"Error: Could not open video file {args.video}")
+        return 1
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    # What a naive multiprocess pipeline would copy: the decoded frame, pickled, per hop
+    frame_bytes = width * height * 3
+
+    variants = [('inline', merge_config(base, {'pipeline': {'mode': 'inline'}}))]
+    for slots in args.slots or [base['pipeline']['ring_slots']]:
+        variants.append((f'process/{slots}', merge_config(base, {'pipeline': {'mode': 'process', 'ring_slots': slots}})))
+
+    rows = []
+    for name, config in variants:
+        detector = create_detector(config['detector']) if config['pipeline']['mode'] == 'inline' else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_counter(args.video, detector, config, display=False)
+        rows.append({
+            'pipeline': name,
+            'frames': result['frame_count'],
+            'fps': result['fps'],
+            'ipc_bytes/frame': result['ipc_bytes_per_frame'],
+            'entries': result['entry_count'],
+            'exits': result['exit_count'],
+        })
+
+    print(f"Frame size {width}x{height}: copying frames between processes "
+          f"would move {frame_bytes:,} bytes per frame per hop\n")
+    print_table(rows, ['pipeline', 'frames', 'fps', 'ipc_bytes/frame', 'entries', 'exits'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Resolution Benchmark
+Runs the full counting pipeline headless at several processing scales and
+inference sizes and reports throughput and count agreement with the first
+(reference) setting.
+
+Usage:
+    python -m benchmarks.bench_resolution --video data/mall_entry.mp4
+    python -m benchmarks.bench_resolution --video clip.mp4 --scale 1.0 --scale 0.5 --imgsz 640 --imgsz 320
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import run_counter
+from utils.config import load_config, merge_config
+from utils.detectors import DETECTOR_BACKENDS, create_detector
+from benchmarks.common import count_agreement, print_table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Throughput and count agreement per resolution setting')
+    parser.add_argument('--video', default=os.path.join('data', 'mall_entry.mp4'))
+    parser.add_argument('--scale', type=float, action='append', help='Processing scale (repeatable)')
+    parser.add_argument('--imgsz', type=int, action='append', help='Inference size (repeatable)')
+    parser.add_argument('--detector', choices=sorted(DETECTOR_BACKENDS), default=None)
+    parser.add_argument('--config', default=None)
+    args = parser.parse_args(argv)
+
+    base = load_config(args.config)
+    if args.detector:
+        base['detector']['backend'] = args.detector
+    scales = args.scale or [1.0, 0.75, 0.5]
+    sizes = args.imgsz or [base['detector']['imgsz']]
+
+    rows = []
+    reference = None
+    for imgsz in sizes:
+        config = merge_config(base, {'detector': {'imgsz': imgsz}})
+        detector = create_detector(config['detector'])
+        for scale in scales:
+            config = merge_config(config, {'video': {'processing_scale': scale}})
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run_counter(args.video, detector, config, display=False)
+            if result is None:
+                print(f"Error: Could not open video file {args.video}")
+                return 1
+            reference = reference or result
+            rows.append({
+                'imgsz': imgsz,
+                'scale': scale,
+                'fps': result['fps'],
+                'entries': result['entry_count'],
+                'exits': result['exit_count'],
+                'agreement': count_agreement(reference, result),
+            })
+
+    print(f"Count agreement relative to imgsz={rows[0]['imgsz']} scale={rows[0]['scale']}\n")
+    print_table(rows, ['imgsz', 'scale', 'fps', 'entries', 'exits', 'agreement'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
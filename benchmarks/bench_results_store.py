@@ -0,0 +1,104 @@
+"""
+Results Store Benchmark
+Bulk-loads millions of synthetic events into a temporary SQLite results
+database and times the range and aggregate queries served by its indexes.
+
+Usage:
+    python -m benchmarks.bench_results_store --events 2000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.results_store import ResultsStore
+from utils.timeseries import TimeSeriesAggregator
+from benchmarks.common import print_table
+
+
+def synthetic_results(num_events, duration, rng):
+    """ReportGenerator-style results with events spread over `duration` seconds"""
+    times = np.sort(rng.uniform(0, duration, size=num_events))
+    types = np.where(rng.random(num_events) < 0.5, 'entry', 'exit')
+    events = [{'type': t, 'kind': 'line', 'location': 'main', 'track_id': i, 'frame': int(v * 25),
+               'video_time': float(v)} for i, (v, t) in enumerate(zip(times, types))]
+    timeseries = TimeSeriesAggregator()
+    for event in events:
+        timeseries.add(event['type'], event['video_time'])
+    timeseries.finalize(duration)
+    return {'video_file': 'synthetic.mp4', 'total_frames': int(duration * 25), 'entry_count': 0,
+            'exit_count': 0, 'events': events, 'timeseries': timeseries.to_dict()}
+
+
+def timed(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the SQLite results store')
+    parser.add_argument('--events', type=int, default=2000000, help='Total events to load')
+    parser.add_argument('--jobs', type=int, default=7 * 4, help='Jobs (spread over a week)')
+    parser.add_argument('--cameras', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    week_start = time.time() - 7 * 86400
+    job_span = 7 * 86400 / args.jobs
+    per_job = args.events // args.jobs
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultsStore(os.path.join(tmp, 'bench.db'))
+
+        load_time = 0.0
+        for j in range(args.jobs):
+            results = synthetic_results(per_job, job_span * 0.9, rng)
+            start = time.perf_counter()
+            store.save_job(f'job{j}', f'cam{j % args.cameras}', results, week_start + j * job_span)
+            load_time += time.perf_counter() - start
+        total = per_job * args.jobs
+        print(f"Loaded {total} events in {load_time:.1f}s ({total / load_time:,.0f} events/s)\n")
+
+        day = week_start + 3 * 86400
+        queries = {
+            'events 1h window (cam0)': lambda: store.events(camera='cam0', start=day, end=day + 3600, limit=1000),
+            'events 1h window (all)': lambda: store.events(start=day, end=day + 3600, limit=1000),
+            'entries/hour, week (all)': lambda: store.aggregate('hour', start=week_start),
+            'entries/hour, week (all, events scan)': lambda: store.aggregate('hour', start=week_start,
+                                                                             source='events'),
+            'entries/hour, week (cam0)': lambda: store.aggregate('hour', camera='cam0', start=week_start),
+            'entries/minute, 1 day (cam1)': lambda: store.aggregate('minute', camera='cam1', start=day,
+                                                                    end=day + 86400),
+            'job events (job3)': lambda: store.events(job_id='job3', limit=1000),
+        }
+        rows = []
+        for name, query in queries.items():
+            elapsed, result = timed(query)
+            rows.append({'query': name, 'ms': 1000 * elapsed, 'rows': len(result)})
+        print_table(rows, ['query', 'ms', 'rows'])
+
+        print("\nQuery plans:")
+        for sql in ("SELECT CAST(bin_start / 3600 AS INTEGER) * 3600 AS bucket, SUM(entries), SUM(exits) "
+                    "FROM aggregates WHERE bin_seconds = 60 AND camera = 'cam0' AND bin_start >= ? GROUP BY bucket",
+                    "SELECT CAST(ts / 3600 AS INTEGER) * 3600 AS bucket, SUM(type = 'entry'), "
+                    "SUM(type = 'exit') FROM events WHERE camera = 'cam0' AND ts >= ? AND kind = 'line' "
+                    "GROUP BY bucket"):
+            for row in store.conn.execute('EXPLAIN QUERY PLAN ' + sql, (week_start,)).fetchall():
+                print(f"  {row[-1]}")
+        store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
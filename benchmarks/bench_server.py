@@ -0,0 +1,200 @@
+"""
+Web Server Load Test
+Concurrent clients hammer /upload, /status and /report (weighted like a real
+session: mostly status polling) for a fixed time and report request
+throughput, errors and p50/p95/p99 latency per endpoint.
+
+Without --url the production server (serve.py) is started on a free port in
+a temporary working directory with a sample report, and stopped afterwards.
+With --url any running instance is tested instead, e.g. the development
+server (python app.py) for comparison; note that its uploads stay on disk.
+
+Usage:
+    python -m benchmarks.bench_server
+    python -m benchmarks.bench_server --clients 32 --duration 30 --server-threads 32
+    python -m benchmarks.bench_server --url http://localhost:5000 --mix status=1
+"""
+
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.common import percentile, print_table
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ('upload', 'status', 'report')
+DEFAULT_MIX = 'upload=1,status=8,report=2'
+
+
+def parse_mix(value):
+    """'upload=1,status=8' -> {'upload': 1, 'status': 8}"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def multipart_body(size):
+    """A multipart/form-data upload of `size` random bytes named like a video"""
+    boundary = uuid.uuid4().hex
+    head = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="loadtest.mp4"\r\n'
+            f'Content-Type: video/mp4\r\n\r\n').encode()
+    tail = f'\r\n--{boundary}--\r\n'.encode()
+    return head + os.urandom(size) + tail, f'multipart/form-data; boundary={boundary}'
+
+
+class Client:
+    """One keep-alive connection issuing requests and recording (endpoint, ms, ok)"""
+
+    def __init__(self, host, port, upload, timeout):
+        self.host = host
+        self.port = port
+        self.upload_body, self.upload_type = upload
+        self.timeout = timeout
+        self.conn = None
+        self.samples = []
+
+    def request(self, endpoint):
+        if endpoint == 'upload':
+            args = ('POST', '/upload', self.upload_body, {'Content-Type': self.upload_type})
+        elif endpoint == 'report':
+            args = ('GET', '/report', None, {'Accept-Encoding': 'gzip'})
+        else:
+            args = ('GET', '/status', None, {})
+        start = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.conn.request(*args)
+            response = self.conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            # Reconnect on the next request
+            self.conn.close()
+            self.conn = None
+            ok = False
+        self.samples.append((endpoint, 1000.0 * (time.perf_counter() - start), ok))
+
+    def run(self, mix, deadline, seed):
+        rng = random.Random(seed)
+        names, weights = zip(*mix.items())
+        while time.perf_counter() < deadline:
+            self.request(rng.choices(names, weights)[0])
+        if self.conn is not None:
+            self.conn.close()
+        return self.samples
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir, threads):
+    """Launch serve.py in workdir (with a sample report) and wait until it answers"""
+    from utils.report_generator import ReportGenerator
+    report = ReportGenerator()
+    for i in range(200):
+        report.add_event('entry' if i % 2 else 'exit', i, 10 * i, location='main', video_time=0.4 * i)
+    report.update_stats(100, 100, 2000, 'loadtest.mp4')
+    report.generate_html_report(os.path.join(workdir, 'people_counter_report.html'))
+
+    port = free_port()
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'serve.py'), '--host', '127.0.0.1',
+                                '--port', str(port), '--threads', str(threads)],
+                               cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("serve.py exited during startup (is waitress installed?)")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("serve.py did not start listening in time")
+
+
+def run_load(host, port, clients, duration, mix, upload_bytes, timeout):
+    upload = multipart_body(upload_bytes)
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        futures = [pool.submit(Client(host, port, upload, timeout).run, mix, deadline, i) for i in range(clients)]
+        samples = [sample for future in futures for sample in future.result()]
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    for endpoint in list(mix) + ['all']:
+        latencies = [ms for name, ms, _ in samples if endpoint in ('all', name)]
+        errors = sum(1 for name, _, ok in samples if endpoint in ('all', name) and not ok)
+        rows.append({
+            'endpoint': endpoint,
+            'requests': len(latencies),
+            'errors': errors,
+            'req_per_sec': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Concurrent load test of /upload, /status and /report')
+    parser.add_argument('--url', default=None, help='Test a running server (default: start serve.py)')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent keep-alive clients')
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds of load')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'Relative request weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--upload-mb', type=float, default=2.0, help='Size of each uploaded file')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout in seconds')
+    parser.add_argument('--server-threads', type=int, default=16, help='serve.py --threads when started here')
+    args = parser.parse_args(argv)
+
+    upload_bytes = int(args.upload_mb * 1024 * 1024)
+    if args.url:
+        url = urlsplit(args.url)
+        rows = run_load(url.hostname, url.port or 80, args.clients, args.duration, args.mix, upload_bytes,
+                        args.timeout)
+        target = args.url
+    else:
+        with tempfile.TemporaryDirectory(prefix='people_counter_serve_') as workdir:
+            process, port = start_server(workdir, args.server_threads)
+            try:
+                rows = run_load('127.0.0.1', port, args.clients, args.duration, args.mix, upload_bytes,
+                                args.timeout)
+            finally:
+                # SIGTERM: graceful shutdown
+                process.terminate()
+                try:
+                    process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+        target = f'serve.py ({args.server_threads} threads)'
+
+    print(f"{target}: {args.clients} clients, {args.duration:g} s, uploads of {args.upload_mb:g} MB\n")
+    print_table(rows, ['endpoint', 'requests', 'errors', 'req_per_sec', 'p50_ms', 'p95_ms', 'p99_ms'])
+    return 1 if any(row['errors'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Tiled Inference Benchmark
+Runs the full counting pipeline headless on synthetic videos of increasing
+resolution, once with a single detector pass per frame and once per tiling
+setting (overlapping tiles merged with cross-tile NMS, as one batch or, for
+thread-safe backends, on a thread pool). Reports throughput, detections per frame and count accuracy
+against the generator's ground truth, i.e. what tiling costs and buys at
+each resolution.
+
+The stub detector sees every synthetic person at any size, so with it only
+the cost side is meaningful; pass --detector and --video with a real model
+and footage to measure the recall gain on small, distant people.
+
+Usage:
+    python -m benchmarks.bench_tiling
+    python -m benchmarks.bench_tiling --resolution 3840x2160 --tile 640 --tile 960 --workers 4
+    python -m benchmarks.bench_tiling --video crowd_4k.mp4 --detector onnxruntime --imgsz 640 --imgsz 1280
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import run_counter
+from utils.config import load_config, merge_config
+from utils.detectors import DETECTOR_BACKENDS, Detector, create_detector
+from benchmarks.common import count_agreement, print_table
+from benchmarks.synthetic_video import generate_video
+
+
+class CountingDetector(Detector):
+    """Wraps a detector and counts frames, detections and time spent detecting"""
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.frames = 0
+        self.detections = 0
+        self.seconds = 0.0
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        start = time.perf_counter()
+        results = self.detector.detect_batch(frames)
+        self.seconds += time.perf_counter() - start
+        self.frames += len(frames)
+        self.detections += sum(len(r) for r in results)
+        return results
+
+
+def synthetic_video(resolution, num_frames, seed, video_dir):
+    """Generate (or reuse) a synthetic video; returns its path and ground truth"""
+    width, height = resolution
+    lanes = max(6, width // 120)
+    path = os.path.join(video_dir, f'people_counter_tiling_{width}x{height}_{num_frames}_{seed}.avi')
+    truth_path = path + '.truth'
+    if os.path.exists(path) and os.path.exists(truth_path):
+        with open(truth_path, 'r', encoding='utf-8') as f:
+            entries, exits = (int(v) for v in f.read().split()[:2])
+        return path, {'entry_count': entries, 'exit_count': exits}
+    print(f"Generating {width}x{height} video ...")
+    truth = generate_video(path, width=width, height=height, num_frames=num_frames, lanes=lanes, seed=seed,
+                           speed=(0.01, 0.02))
+    with open(truth_path, 'w', encoding='utf-8') as f:
+        f.write(f"{truth['entry_count']} {truth['exit_count']} {truth['people']}")
+    return path, truth
+
+
+def parse_resolution(value):
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Throughput and accuracy of tiled vs single-pass inference')
+    parser.add_argument('--video', default=None,
+                        help='Real video (accuracy relative to the first single-pass run); default: synthetic')
+    parser.add_argument('--resolution', type=parse_resolution, action='append',
+                        help='Synthetic video WIDTHxHEIGHT (repeatable, default: 1280x720, 1920x1080, 3840x2160)')
+    parser.add_argument('--frames', type=int, default=150, help='Length of the synthetic videos')
+    parser.add_argument('--imgsz', type=int, action='append', help='Single-pass inference size (repeatable)')
+    parser.add_argument('--tile', type=int, action='append', help='Tile size (repeatable, default: 640)')
+    parser.add_argument('--overlap', type=float, default=0.25)
+    parser.add_argument('--workers', type=int, default=0, help="Thread pool size for 'threads' mode (0 = cores)")
+    parser.add_argument('--detector', choices=sorted(DETECTOR_BACKENDS), default='stub')
+    parser.add_argument('--config', default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--video-dir', default=tempfile.gettempdir(), help='Where generated videos are cached')
+    args = parser.parse_args(argv)
+
+    base = load_config(args.config)
+    base['detector']['backend'] = args.detector
+    sizes = args.imgsz or [base['detector']['imgsz']]
+    tiles = args.tile or [640]
+
+    if args.video:
+        videos = [(args.video, None)]
+    else:
+        videos = [synthetic_video(resolution, args.frames, args.seed, args.video_dir)
+                  for resolution in (args.resolution or [(1280, 720), (1920, 1080), (3840, 2160)])]
+
+    runs = [(f'single imgsz={imgsz}', {'imgsz': imgsz}) for imgsz in sizes]
+    # 'threads' shares one detector between threads, only some backends allow that
+    modes = ('batch', 'threads') if DETECTOR_BACKENDS[args.detector].thread_safe else ('batch',)
+    for tile in tiles:
+        for mode in modes:
+            tiling = {'tile_size': tile, 'overlap': args.overlap, 'mode': mode, 'workers': args.workers}
+            runs.append((f'tiled {tile} {mode}', {'tiling': tiling}))
+
+    rows = []
+    for path, truth in videos:
+        reference = truth
+        for name, detector_overrides in runs:
+            config = merge_config(base, {'detector': detector_overrides})
+            detector = CountingDetector(create_detector(config['detector']))
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run_counter(path, detector, config, display=False)
+            if result is None:
+                print(f"Error: Could not open video file {path}")
+                return 1
+            reference = reference or result
+            rows.append({
+                'video': os.path.basename(path),
+                'inference': name,
+                'fps': result['fps'],
+                'detect_ms': 1000.0 * detector.seconds / max(detector.frames, 1),
+                'dets_per_frame': detector.detections / max(detector.frames, 1),
+                'entries': result['entry_count'],
+                'exits': result['exit_count'],
+                'accuracy': count_agreement(reference, result),
+            })
+
+    if args.video:
+        print("Accuracy relative to the first single-pass run\n")
+    else:
+        print("Accuracy against the synthetic ground truth\n")
+    print_table(rows, ['video', 'inference', 'fps', 'detect_ms', 'dets_per_frame', 'entries', 'exits', 'accuracy'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
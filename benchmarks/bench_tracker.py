@@ -0,0 +1,228 @@
+"""
+Tracker Micro-Benchmark
+Measures Sort.update throughput, memory and per-stage cost on synthetic crowds,
+flags regressions against a saved baseline and checks that every tracker
+backend produces identical track IDs.
+
+Usage:
+    python -m benchmarks.bench_tracker                  # run and compare to baseline
+    python -m benchmarks.bench_tracker --save-baseline  # record a new baseline
+    python -m benchmarks.bench_tracker --scenario dense --frames 500
+"""
+
+import argparse
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.sort_tracker import Sort, KalmanBoxTracker
+from benchmarks.common import (StageTimer, measure_memory, find_regressions, load_baseline,
+                               save_baseline, print_table, DEFAULT_TOLERANCE)
+from benchmarks.synthetic_crowd import generate_crowd_stream
+
+
+BASELINE_NAME = 'tracker'
+
+# Crowd scenarios: size, density (covered frame fraction), occlusion and miss rates
+SCENARIOS = {
+    'sparse': dict(num_people=10, density=0.05, occlusion_rate=0.01, miss_rate=0.02),
+    'medium': dict(num_people=50, density=0.15, occlusion_rate=0.02, miss_rate=0.05),
+    'dense': dict(num_people=150, density=0.35, occlusion_rate=0.05, miss_rate=0.10),
+    'crowd': dict(num_people=400, density=0.45, occlusion_rate=0.05, miss_rate=0.10),
+    'massive': dict(num_people=1000, density=0.45, occlusion_rate=0.05, miss_rate=0.10),
+}
+
+# Interchangeable tracker backends. Every backend must produce the same track IDs
+# as 'sort' on the same stream.
+TRACKER_BACKENDS = {
+    'sort': lambda: Sort(max_age=30, min_hits=3, iou_threshold=0.3),
+    'sort-gated': lambda: Sort(max_age=30, min_hits=3, iou_threshold=0.3, association='gated'),
+    'sort-array': lambda: Sort(max_age=30, min_hits=3, iou_threshold=0.3, output='array'),
+}
+
+# Metrics compared against the baseline and which direction is better
+REGRESSION_METRICS = {
+    'fps': 'higher',
+    'ms_per_frame': 'lower',
+    'peak_mb': 'lower',
+}
+
+
+def run_tracker(backend, stream):
+    """Run a fresh tracker over the stream and return its per-frame (track_id, bbox) pairs"""
+    KalmanBoxTracker.count = 0
+    tracker = TRACKER_BACKENDS[backend]()
+    outputs = []
+    for dets, _ in stream:
+        tracks = tracker.update(dets)
+        if tracker.output == 'array':
+            # The array is reused by the next update
+            outputs.append([(int(i), tuple(b)) for i, b in zip(tracks['track_id'], tracks['bbox'].tolist())])
+        else:
+            outputs.append([(t['track_id'], t['bbox']) for t in tracks])
+    return outputs
+
+
+def measure_throughput(backend, stream, repeat=3):
+    """Best-of-N frames per second for Sort.update on the stream"""
+    best = None
+    for _ in range(repeat):
+        KalmanBoxTracker.count = 0
+        tracker = TRACKER_BACKENDS[backend]()
+        start = time.perf_counter()
+        for dets, _ in stream:
+            tracker.update(dets)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_peak_memory(backend, stream):
+    """Peak Python heap (MB) while tracking the stream"""
+    result = {}
+    with measure_memory(result):
+        run_tracker(backend, stream)
+    return result['peak_mb']
+
+
+@contextmanager
+def instrument_stages(timer):
+    """Temporarily wrap the tracker internals to attribute time to stages"""
+    patches = [
+        (KalmanBoxTracker, 'predict', 'predict'),
+        (KalmanBoxTracker, 'update', 'kalman_update'),
+        (KalmanBoxTracker, 'get_state', 'output'),
+        (KalmanBoxTracker, '__init__', 'create'),
+        (Sort, '_associate_detections_to_trackers', 'associate'),
+    ]
+    originals = []
+    for owner, attr, stage in patches:
+        original = owner.__dict__[attr]
+        originals.append((owner, attr, original))
+        setattr(owner, attr, _timed(original, timer, stage))
+    try:
+        yield timer
+    finally:
+        for owner, attr, original in originals:
+            setattr(owner, attr, original)
+
+
+def _timed(func, timer, stage):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timer.add(stage, time.perf_counter() - start)
+    return wrapper
+
+
+def measure_stages(backend, stream):
+    """Milliseconds per frame spent in each Sort.update stage"""
+    timer = StageTimer()
+    KalmanBoxTracker.count = 0
+    tracker = TRACKER_BACKENDS[backend]()
+    with instrument_stages(timer):
+        start = time.perf_counter()
+        for dets, _ in stream:
+            tracker.update(dets)
+        total = time.perf_counter() - start
+    stages = timer.summary(per=len(stream))
+    stages['other'] = max(0.0, 1000.0 * total / len(stream) - sum(stages.values()))
+    return stages
+
+
+def check_id_agreement(stream, reference='sort'):
+    """
+    Verify all backends emit identical track IDs and boxes frame by frame.
+    Returns a list of mismatch descriptions (empty when all agree).
+    """
+    expected = run_tracker(reference, stream)
+    mismatches = []
+    for backend in TRACKER_BACKENDS:
+        if backend == reference:
+            continue
+        outputs = run_tracker(backend, stream)
+        for frame_idx, (want, got) in enumerate(zip(expected, outputs)):
+            if sorted(want) != sorted(got):
+                mismatches.append(f"{backend}: first divergence from {reference} at frame {frame_idx + 1}")
+                break
+    return mismatches
+
+
+def run_benchmarks(scenarios, backends, num_frames, repeat, seed):
+    results = {}
+    rows = []
+    for scenario in scenarios:
+        stream = generate_crowd_stream(num_frames=num_frames, seed=seed, **SCENARIOS[scenario])
+        num_dets = sum(len(dets) for dets, _ in stream)
+
+        for backend in backends:
+            elapsed = measure_throughput(backend, stream, repeat=repeat)
+            stages = measure_stages(backend, stream)
+            entry = {
+                'fps': len(stream) / elapsed,
+                'ms_per_frame': 1000.0 * elapsed / len(stream),
+                'dets_per_sec': num_dets / elapsed,
+                'peak_mb': measure_peak_memory(backend, stream),
+                'stages_ms': stages,
+            }
+            results[f'{scenario}/{backend}'] = entry
+            rows.append(dict(scenario=scenario, backend=backend, people=SCENARIOS[scenario]['num_people'],
+                             fps=entry['fps'], ms_per_frame=entry['ms_per_frame'],
+                             peak_mb=entry['peak_mb'],
+                             **{f'{k}_ms': v for k, v in sorted(stages.items())}))
+
+        mismatches = check_id_agreement(stream)
+        for mismatch in mismatches:
+            print(f"ID MISMATCH [{scenario}] {mismatch}")
+        results[f'{scenario}/id_agreement'] = {'agree': not mismatches}
+
+    columns = ['scenario', 'backend', 'people', 'fps', 'ms_per_frame', 'peak_mb']
+    columns += sorted({k for row in rows for k in row if k.endswith('_ms')})
+    print_table(rows, columns)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the SORT tracker on synthetic crowds')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Scenario to run (repeatable, default: all)')
+    parser.add_argument('--backend', action='append', choices=sorted(TRACKER_BACKENDS),
+                        help='Tracker backend to time (repeatable, default: all)')
+    parser.add_argument('--frames', type=int, default=300, help='Frames per scenario')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions (best is kept)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed relative slowdown before flagging a regression')
+    parser.add_argument('--save-baseline', action='store_true', help='Store results as the new baseline')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scenario or list(SCENARIOS), args.backend or list(TRACKER_BACKENDS),
+                             args.frames, args.repeat, args.seed)
+
+    failed = any(not v['agree'] for k, v in results.items() if k.endswith('/id_agreement'))
+
+    if args.save_baseline:
+        path = save_baseline(BASELINE_NAME, results)
+        print(f"\nBaseline saved: {path}")
+    else:
+        baseline = load_baseline(BASELINE_NAME)
+        if baseline is None:
+            print("\nNo baseline recorded yet (run with --save-baseline)")
+        else:
+            regressions = find_regressions(results, baseline['results'], REGRESSION_METRICS, args.tolerance)
+            for regression in regressions:
+                print(f"REGRESSION {regression}")
+            if regressions:
+                failed = True
+            else:
+                print(f"\nNo regressions beyond {args.tolerance * 100:.0f}% tolerance")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
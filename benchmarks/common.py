@@ -0,0 +1,156 @@
+"""
+Shared Benchmark Helpers
+Timing, memory measurement and baseline bookkeeping used by all benchmarks
+"""
+
+import json
+import os
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+# Default allowed slowdown before a result is flagged as a regression (15%)
+DEFAULT_TOLERANCE = 0.15
+
+
+class StageTimer:
+    """Accumulate wall-clock time and call counts per named stage"""
+
+    def __init__(self):
+        self.totals = {}
+        self.calls = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def summary(self, per=1):
+        """Return {stage: milliseconds per unit} (e.g. per frame)"""
+        per = max(per, 1)
+        return {name: 1000.0 * total / per for name, total in self.totals.items()}
+
+
+@contextmanager
+def measure_memory(result):
+    """Record the Python heap peak (MB) of the enclosed block into result['peak_mb']"""
+    tracemalloc.start()
+    try:
+        yield result
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['peak_mb'] = peak / (1024 * 1024)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def count_agreement(reference, result):
+    """1.0 when entries and exits match the reference exactly, lower as they diverge"""
+    ref_total = reference['entry_count'] + reference['exit_count']
+    diff = abs(reference['entry_count'] - result['entry_count']) + abs(reference['exit_count'] - result['exit_count'])
+    return max(0.0, 1.0 - diff / max(ref_total, 1))
+
+
+def host_info():
+    """Describe the machine so baselines from different hosts are not mixed up"""
+    return {
+        'host': platform.node(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f'{name}.json')
+
+
+def save_baseline(name, results):
+    """Write benchmark results as the new baseline for `name`"""
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    payload = {
+        'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'host': host_info(),
+        'results': results,
+    }
+    path = baseline_path(name)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_baseline(name):
+    """Load a saved baseline, or None if none has been recorded yet"""
+    path = baseline_path(name)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def find_regressions(results, baseline, metrics, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare results against a baseline.
+    results / baseline: {scenario: {metric: value}}
+    metrics: {metric: 'higher' | 'lower'} - which direction is better
+    Returns a list of human readable regression descriptions.
+    """
+    regressions = []
+    if not baseline:
+        return regressions
+
+    for scenario, values in results.items():
+        reference = baseline.get(scenario)
+        if not reference:
+            continue
+        for metric, better in metrics.items():
+            if metric not in values or metric not in reference:
+                continue
+            new, old = values[metric], reference[metric]
+            if not old:
+                continue
+            if better == 'higher':
+                change = (old - new) / old
+            else:
+                change = (new - old) / old
+            if change > tolerance:
+                regressions.append(
+                    f"{scenario}: {metric} {old:.3f} -> {new:.3f} "
+                    f"({change * 100:.1f}% worse, tolerance {tolerance * 100:.0f}%)"
+                )
+    return regressions
+
+
+def print_table(rows, columns):
+    """Print a list of dicts as a fixed-width table"""
+    widths = {c: max(len(c), *(len(_format_cell(r.get(c))) for r in rows)) for c in columns}
+    print('  '.join(c.ljust(widths[c]) for c in columns))
+    print('  '.join('-' * widths[c] for c in columns))
+    for row in rows:
+        print('  '.join(_format_cell(row.get(c)).ljust(widths[c]) for c in columns))
+
+
+def _format_cell(value):
+    if isinstance(value, float):
+        return f'{value:.3f}'
+    return '' if value is None else str(value)
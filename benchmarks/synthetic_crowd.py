@@ -0,0 +1,70 @@
+"""
+Synthetic Crowd Generator
+Produces deterministic streams of moving person-sized detection boxes
+"""
+
+import numpy as np
+
+
+def generate_crowd_stream(num_people=50, num_frames=300, density=0.15,
+                          occlusion_rate=0.02, miss_rate=0.05,
+                          frame_size=(1920, 1080), jitter=1.5, seed=0):
+    """
+    Generate a detection stream for a crowd of people walking around a frame.
+
+    num_people     - number of simultaneously visible people
+    num_frames     - length of the stream
+    density        - fraction of the frame area covered by person boxes (sets box size)
+    occlusion_rate - per-frame chance that a person starts an occlusion (missed for 5-15 frames)
+    miss_rate      - per-frame chance that a single detection is dropped
+    jitter         - std-dev (pixels) of detector noise added to box corners
+
+    Returns a list with one entry per frame: (detections, ground_truth_ids)
+      detections       - numpy array [[x1, y1, x2, y2, score], ...] in SORT format
+      ground_truth_ids - numpy array with the true person index of every detection row
+    """
+    rng = np.random.default_rng(seed)
+    width, height = frame_size
+
+    # Person boxes are 1:2.5 (w:h); size them so the crowd covers `density` of the frame
+    box_area = density * width * height / max(num_people, 1)
+    box_w = np.sqrt(box_area / 2.5)
+    box_h = box_w * 2.5
+    box_w = min(box_w, width / 4)
+    box_h = min(box_h, height / 2)
+
+    sizes = rng.uniform(0.8, 1.2, size=(num_people, 1)) * np.array([box_w, box_h])
+    centers = rng.uniform([box_w, box_h], [width - box_w, height - box_h], size=(num_people, 2))
+    # Walking speed of 1-4 pixels per frame in a random direction
+    angles = rng.uniform(0, 2 * np.pi, size=num_people)
+    speeds = rng.uniform(1.0, 4.0, size=num_people)
+    velocities = np.stack([np.cos(angles), np.sin(angles)], axis=1) * speeds[:, None]
+
+    occluded_for = np.zeros(num_people, dtype=int)
+    lower = sizes / 2
+    upper = np.array([width, height]) - sizes / 2
+
+    stream = []
+    for _ in range(num_frames):
+        centers += velocities
+        # Bounce off the frame borders
+        low_hit = centers < lower
+        high_hit = centers > upper
+        velocities[low_hit | high_hit] *= -1
+        centers = np.clip(centers, lower, upper)
+
+        # Occlusion episodes hide a person for several consecutive frames
+        occluded_for = np.maximum(occluded_for - 1, 0)
+        starts = (rng.random(num_people) < occlusion_rate) & (occluded_for == 0)
+        occluded_for[starts] = rng.integers(5, 16, size=int(starts.sum()))
+
+        visible = (occluded_for == 0) & (rng.random(num_people) >= miss_rate)
+        ids = np.flatnonzero(visible)
+
+        boxes = np.concatenate([centers[ids] - sizes[ids] / 2, centers[ids] + sizes[ids] / 2], axis=1)
+        boxes += rng.normal(0.0, jitter, size=boxes.shape)
+        scores = rng.uniform(0.5, 0.95, size=(len(ids), 1))
+        detections = np.concatenate([boxes, scores], axis=1) if len(ids) else np.empty((0, 5))
+        stream.append((detections, ids))
+
+    return stream
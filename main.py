@@ -3,341 +3,788 @@ PeopleCounter - Main Entry Point
 A system for counting people using computer vision and object detection.
 """
 
+import argparse
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import os
+import signal
 import sys
 import webbrowser
 import subprocess
 import time
+import uuid
 
 # Add utils to path
 sys.path.append(os.path.dirname(__file__))
 from utils.sort_tracker import Sort
 from utils.report_generator import ReportGenerator
+from utils.metrics import JobMetricsWriter
+from utils.config import DEFAULT_PROFILE_PATH, load_config, set_path
+from utils.detectors import DETECTOR_BACKENDS, create_detector
+from utils.video import DecodeStats, FrameScaler, iter_frames
+from utils.threads import apply_thread_budget
+from utils.shm_pipeline import SharedMemoryPipeline
+from utils.counting_geometry import CountingGeometry
+from utils.timeseries import TimeSeriesAggregator
+from utils.analytics import MovementAnalytics
+from utils.results_store import ResultsStore, parse_time
+from utils.optical_flow import FlowPropagator, is_keyframe
+from utils.scheduler import LatencyScheduler
+from utils.time_ranges import (frame_ranges, parse_time_range, parse_time_ranges, range_index, range_start,
+                               skipped_frames)
+from utils.checkpoint import Checkpointer, load_checkpoint, result_config
 
-# If the web UI passed the uploaded filepath as an argument, capture it
-UPLOADED_FILEPATH = sys.argv[1] if len(sys.argv) > 1 else None
+# Video copied here by the web UI for processing
+DEFAULT_VIDEO_PATH = os.path.join("data", "mall_entry.mp4")
 
 
-def main():
-    """Main function to run the people counter application."""
-    print("PeopleCounter Application Starting...")
+def parse_args(argv=None):
+    """Parse command line options (the web UI passes the uploaded filepath first)"""
+    parser = argparse.ArgumentParser(description='PeopleCounter - count people crossing a line')
+    parser.add_argument('uploaded_filepath', nargs='?', default=None,
+                        help='Original uploaded file, removed after processing')
+    parser.add_argument('--video', default=DEFAULT_VIDEO_PATH,
+                        help='Video to process (default: data/mall_entry.mp4)')
+    parser.add_argument('--metrics-file', default=None,
+                        help='Write periodic job metrics snapshots to this JSON file')
+    parser.add_argument('--config', default=None,
+                        help='JSON config file (default: config.json if present)')
+    parser.add_argument('--profile', default=None,
+                        help='Host profile from autotune.py (default: profile.json if present)')
+    parser.add_argument('--detector', choices=sorted(DETECTOR_BACKENDS), default=None,
+                        help='Detector backend (overrides detector.backend)')
+    parser.add_argument('--quantize', action='store_true',
+                        help='Use an INT8 quantized model with the onnxruntime backend')
+    parser.add_argument('--imgsz', type=int, default=None,
+                        help='Detector inference size in pixels (overrides detector.imgsz)')
+    parser.add_argument('--scale', type=float, default=None,
+                        help='Processing scale in (0, 1]; frames are downscaled once after decode')
+    parser.add_argument('--stride', type=int, default=None,
+                        help='Process every n-th frame only (overrides video.detection_stride)')
+    parser.add_argument('--keyframe-interval', type=int, default=None,
+                        help='Run the detector on every k-th processed frame, optical flow in between '
+                             '(overrides video.keyframe_interval)')
+    parser.add_argument('--range', action='append', type=parse_time_range, default=None, metavar='START-END',
+                        help='Only process this window of video time, e.g. 0:10:00-0:25:00 (repeatable, '
+                             'overrides video.time_ranges)')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='Frames per detector call (overrides detector.batch_size)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Thread budget for OpenCV/PyTorch/BLAS (overrides runtime.threads)')
+    parser.add_argument('--pipeline', choices=['inline', 'process'], default=None,
+                        help="'process' decodes and detects in worker processes via shared memory")
+    parser.add_argument('--latency-budget', type=float, default=None,
+                        help='Target ms per source frame; shed work when behind (overrides scheduler.target_ms)')
+    parser.add_argument('--checkpoint', default=None,
+                        help='Write periodic checkpoints to this file (overrides checkpoint.path)')
+    parser.add_argument('--checkpoint-interval', type=int, default=None,
+                        help='Processed frames between checkpoints (overrides checkpoint.interval_frames)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the checkpoint file if it exists')
+    parser.add_argument('--no-display', action='store_true',
+                        help='Do not render or show the video window')
+    parser.add_argument('--job-id', default=None,
+                        help='ID under which results are stored (default: random)')
+    parser.add_argument('--camera', default=None,
+                        help='Camera name for stored results (overrides results.camera)')
+    parser.add_argument('--recorded-at', default=None,
+                        help='Wall-clock time of the first frame, ISO 8601 or epoch (default: now)')
+    parser.add_argument('--db', default=None,
+                        help='Results database path (overrides results.database)')
+    return parser.parse_args(argv)
+
+
+def build_config(args):
+    """Load the config file and apply command line overrides"""
+    profile = args.profile
+    if profile is None and os.path.exists(DEFAULT_PROFILE_PATH):
+        profile = DEFAULT_PROFILE_PATH
+    config = load_config(args.config, profile=profile)
+    if args.detector:
+        set_path(config, 'detector.backend', args.detector)
+    if args.quantize:
+        set_path(config, 'detector.quantize', True)
+    if args.imgsz:
+        set_path(config, 'detector.imgsz', args.imgsz)
+    if args.scale:
+        set_path(config, 'video.processing_scale', args.scale)
+    if args.stride:
+        set_path(config, 'video.detection_stride', args.stride)
+    if args.keyframe_interval:
+        set_path(config, 'video.keyframe_interval', args.keyframe_interval)
+    if args.batch_size:
+        set_path(config, 'detector.batch_size', args.batch_size)
+    if args.threads is not None:
+        set_path(config, 'runtime.threads', args.threads)
+    if args.pipeline:
+        set_path(config, 'pipeline.mode', args.pipeline)
+    if args.range:
+        set_path(config, 'video.time_ranges', args.range)
+    if args.latency_budget:
+        set_path(config, 'scheduler.target_ms', args.latency_budget)
+    if args.checkpoint:
+        set_path(config, 'checkpoint.path', args.checkpoint)
+    if args.checkpoint_interval:
+        set_path(config, 'checkpoint.interval_frames', args.checkpoint_interval)
+    if args.camera:
+        set_path(config, 'results.camera', args.camera)
+    if args.db is not None:
+        set_path(config, 'results.database', args.db)
+    return config
+
+
+def draw_counting_line(frame, frame_width, counting_line_y):
+    """Draw the counting line with the entry/exit zone labels"""
+    # Draw counting line
+    cv2.line(frame, (0, counting_line_y), (frame_width, counting_line_y), (0, 255, 255), 3)
+    cv2.putText(frame, "COUNTING LINE", (frame_width - 200, counting_line_y - 10),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
     
-    # Check if video was uploaded via web UI
-    video_path = os.path.join("data", "mall_entry.mp4")
+    # Draw ENTRY zone indicator (above the line)
+    entry_zone_y = counting_line_y - 60
+    cv2.putText(frame, "ENTRY ZONE", (10, entry_zone_y),
+               cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 3)
+    cv2.putText(frame, "(Cross DOWN = Entry)", (10, entry_zone_y + 30),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+    cv2.arrowedLine(frame, (200, entry_zone_y + 10), (200, counting_line_y - 20),
+                   (0, 255, 0), 3, tipLength=0.3)
     
-    if not os.path.exists(video_path):
-        print("No video file found. Please upload a video via the web interface.")
-        print("The web UI should already be running at http://127.0.0.1:5000")
-        print("If not, run 'python app.py' to start the web server.")
-        return
+    # Draw EXIT zone indicator (below the line)
+    exit_zone_y = counting_line_y + 80
+    cv2.putText(frame, "EXIT ZONE", (10, exit_zone_y),
+               cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 3)
+    cv2.putText(frame, "(Cross UP = Exit)", (10, exit_zone_y + 30),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+    cv2.arrowedLine(frame, (200, exit_zone_y - 10), (200, counting_line_y + 20),
+                   (0, 0, 255), 3, tipLength=0.3)
+
+
+def draw_geometry(frame, geometry):
+    """Draw configured counting lines (with entry direction arrow) and zones"""
+    for zone in geometry.zones:
+        polygon = zone.polygon.astype(np.int32).reshape(-1, 1, 2)
+        cv2.polylines(frame, [polygon], True, (255, 0, 255), 2)
+        x, y = polygon[0, 0]
+        cv2.putText(frame, f"{zone.name}: {zone.occupancy}", (int(x) + 5, int(y) + 20),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
     
-    # Load YOLO model
-    print("Loading YOLOv8 model...")
-    model = YOLO("yolov8n.pt")
-    print("Model loaded successfully")
+    for line in geometry.lines:
+        p1 = (int(line.p1[0]), int(line.p1[1]))
+        p2 = (int(line.p2[0]), int(line.p2[1]))
+        cv2.line(frame, p1, p2, (0, 255, 255), 3)
+        cv2.putText(frame, f"{line.name} IN:{line.entries} OUT:{line.exits}", (p1[0] + 5, p1[1] - 10),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        
+        # Arrow from the middle of the line towards its entry (right-hand) side
+        mx, my = (p1[0] + p2[0]) / 2.0, (p1[1] + p2[1]) / 2.0
+        dx, dy = p2[0] - p1[0], p2[1] - p1[1]
+        length = max(np.hypot(dx, dy), 1e-6)
+        nx, ny = -dy / length, dx / length
+        if line.invert:
+            nx, ny = -nx, -ny
+        cv2.arrowedLine(frame, (int(mx), int(my)), (int(mx + 40 * nx), int(my + 40 * ny)),
+                       (0, 255, 0), 2, tipLength=0.3)
+
+
+def draw_stats_panel(frame, frame_count, active_tracks, entry_count, exit_count):
+    """Draw the semi-transparent statistics panel in the top-left corner"""
+    panel_width = 400
+    panel_height = 320
+    panel_x = 10
+    panel_y = 10
     
-    # Initialize SORT tracker
-    tracker = Sort(max_age=30, min_hits=3, iou_threshold=0.3)
-    print("SORT tracker initialized")
+    # Blend a black rectangle into the panel region only (not a full-frame copy)
+    alpha = 0.6
+    roi = frame[panel_y:panel_y + panel_height, panel_x:panel_x + panel_width]
+    roi[:] = (roi * (1 - alpha)).astype(frame.dtype)
     
-    # Initialize report generator
-    report_gen = ReportGenerator()
+    # Information Panel - Header
+    y_offset = panel_y + 30
+    cv2.putText(frame, "=== COUNTING SYSTEM ===", 
+               (panel_x + 20, y_offset), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
     
-    # Initialize counters
-    entry_count = 0
-    exit_count = 0
+    y_offset += 45
+    cv2.putText(frame, f"Frame: {frame_count} | Active Tracks: {active_tracks}", 
+               (panel_x + 20, y_offset), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 2)
+    
+    # Divider line
+    y_offset += 25
+    cv2.line(frame, (panel_x + 20, y_offset), 
+            (panel_x + panel_width - 20, y_offset), (150, 150, 150), 2)
+    
+    # Entry Statistics
+    y_offset += 40
+    cv2.putText(frame, "TOTAL ENTERED:", 
+               (panel_x + 20, y_offset), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+    cv2.putText(frame, f"{entry_count}", 
+               (panel_x + 280, y_offset), 
+               cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 3)
+    
+    # Divider line
+    y_offset += 35
+    cv2.line(frame, (panel_x + 20, y_offset), 
+            (panel_x + panel_width - 20, y_offset), (150, 150, 150), 2)
+    
+    # Exit Statistics
+    y_offset += 40
+    cv2.putText(frame, "TOTAL EXITED:", 
+               (panel_x + 20, y_offset), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+    cv2.putText(frame, f"{exit_count}", 
+               (panel_x + 280, y_offset), 
+               cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
+    
+    # Divider line
+    y_offset += 35
+    cv2.line(frame, (panel_x + 20, y_offset), 
+            (panel_x + panel_width - 20, y_offset), (150, 150, 150), 2)
+    
+    # Current Inside
+    y_offset += 40
+    current_inside = entry_count - exit_count
+    
+    cv2.putText(frame, "CURRENTLY INSIDE:", 
+               (panel_x + 20, y_offset), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
+    cv2.putText(frame, f"{current_inside}", 
+               (panel_x + 280, y_offset), 
+               cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 0), 3)
+
+
+def detect_frames(frames, scaler, detector, batch_size=1, keyframe=None):
+    """
+    Downscale and detect (frame_index, frame) pairs in batches of batch_size.
+    Yields (frame_index, frame, small_frame, detections, detector_latency) per
+    frame, where small_frame is the downscaled frame the detector saw and the
+    latency is the batch latency shared out over its frames.
+    keyframe(frame_index) selects the frames the detector runs on; the others
+    are yielded in order with detections None (their small_frame is what
+    optical flow propagates on).
+    """
+    batch = []
+    keyframes = 0
+    for frame_index, frame in frames:
+        is_key = keyframe is None or keyframe(frame_index)
+        if not is_key and not batch:
+            yield frame_index, frame, scaler.resize(frame), None, 0.0
+            continue
+        batch.append((frame_index, frame, scaler.resize(frame), is_key))
+        keyframes += is_key
+        if keyframes < batch_size:
+            continue
+        yield from _detect_batch(batch, detector)
+        batch = []
+        keyframes = 0
+    if batch:
+        yield from _detect_batch(batch, detector)
+
+
+def _detect_batch(batch, detector):
+    small_frames = [small_frame for _, _, small_frame, is_key in batch if is_key]
+    detect_start = time.perf_counter()
+    if len(small_frames) == 1:
+        results = [detector.detect(small_frames[0])]
+    else:
+        results = detector.detect_batch(small_frames)
+    latency = (time.perf_counter() - detect_start) / len(small_frames)
+    results = iter(results)
+    for frame_index, frame, small_frame, is_key in batch:
+        if is_key:
+            yield frame_index, frame, small_frame, next(results), latency
+        else:
+            yield frame_index, frame, small_frame, None, 0.0
+
+
+def run_counter(video_path, detector, config, display=True, report_gen=None, job_metrics=None,
+                max_frames=None, checkpointer=None, resume_state=None):
+    """
+    Run detection, tracking and line-crossing counting over a video.
+    Returns a dict with the final counts and timing, or None if the video
+    cannot be opened. max_frames stops after that many source frames.
+    checkpointer (Checkpointer) saves the counting state periodically;
+    resume_state (from load_checkpoint) continues a run after its last checkpoint.
+    job_metrics (JobMetricsWriter) receives per-frame metrics; None skips them.
+    """
+    report_gen = report_gen or ReportGenerator()
+    # Without job metrics (plain CLI runs) the frame loop skips them entirely
+    record_metrics = job_metrics is not None
     
-    # Dictionary to track centroid positions for crossing detection
-    # Format: {track_id: {'previous_y': y_coord, 'counted': False}}
-    track_positions = {}
+    # Initialize SORT tracker
+    # One structured array per frame (no per-track dicts)
+    tracker = Sort(**config['tracker'], output='array')
+    print("SORT tracker initialized")
     
     # Load video file
     cap = cv2.VideoCapture(video_path)
     
     if not cap.isOpened():
         print(f"Error: Could not open video file {video_path}")
-        return
+        return None
     
     print(f"Successfully loaded video: {video_path}")
     frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     
-    # Configure counting line position (configurable - default at 50% of frame height)
-    counting_line_position = 0.5  # 0.0 to 1.0 (percentage of frame height)
-    counting_line_y = int(frame_height * counting_line_position)
+    # Frames are downscaled once after decode; detection and tracking run in
+    # the reduced space, counting and drawing use source coordinates
+    scaler = FrameScaler(frame_width, frame_height, config['video']['processing_scale'])
     
-    # Margin for crossing detection (pixels)
-    crossing_margin = 10
+    # Counting lines and zones (default: one horizontal line at
+    # counting.line_position, 0.0 to 1.0 of the frame height)
+    geometry = CountingGeometry.from_config(config['counting'], frame_width, frame_height)
+    
+    # Initialize counters
+    entry_count = 0
+    exit_count = 0
+    
+    # Per-second / per-minute entry, exit and occupancy bins keyed on video time
+    timeseries = TimeSeriesAggregator()
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
     
     print(f"Video Properties:")
     print(f"  Frame Width: {frame_width}")
     print(f"  Frame Height: {frame_height}")
     print(f"  FPS: {int(cap.get(cv2.CAP_PROP_FPS))}")
     print(f"  Total Frames: {int(cap.get(cv2.CAP_PROP_FRAME_COUNT))}")
-    print(f"  Counting Line Y: {counting_line_y}")
-    print("\nPress 'q' to quit")
+    for line in geometry.lines:
+        print(f"  Counting Line '{line.name}': {line.p1} -> {line.p2}")
+    for zone in geometry.zones:
+        print(f"  Zone '{zone.name}': {len(zone.polygon)} points")
+    print(f"  Processing Size: {scaler.size[0]}x{scaler.size[1]} (scale {scaler.scale})")
     
-    # Read and display frames
+    # Time ranges: only these windows are decoded and counted, the gaps are seeked over
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    ranges = None
+    if config['video']['time_ranges']:
+        ranges = frame_ranges(parse_time_ranges(config['video']['time_ranges']), video_fps, total_frames)
+        for first, last in ranges:
+            end = f"{last / video_fps:.1f}s" if last is not None else 'end'
+            print(f"  Time Range: {first / video_fps:.1f}s - {end} (frames {first + 1}-{last or total_frames})")
+        if not ranges:
+            print("  Time Range: none of the requested ranges lies within the video")
+    decode_stats = DecodeStats()
+    if display:
+        print("\nPress 'q' to quit")
+    
+    # Every detection_stride-th frame is processed, the ones in between are skipped undecoded
+    stride = max(1, int(config['video']['detection_stride']))
+    if stride > 1:
+        print(f"  Detection Stride: every {stride} frames")
+    
+    # Sparse detection: the detector runs on every keyframe_interval-th processed
+    # frame, track boxes are carried to the frames in between with optical flow
+    keyframe_interval = max(1, int(config['video']['keyframe_interval']))
+    keyframe = None
+    flow = None
+    if keyframe_interval > 1:
+        # Counted from the start of each time range, so every range opens with a keyframe
+        keyframe = lambda index: is_keyframe(index - range_start(ranges, index), stride, keyframe_interval)
+        flow = FlowPropagator()
+        print(f"  Keyframes: detector every {keyframe_interval} processed frames, optical flow in between")
+    
+    # Latency budget: when behind, render fewer frames, shrink the inference size and
+    # raise the stride (the last two only where the main loop owns decode and detector)
+    scheduler = None
+    scheduler_config = config['scheduler']
+    if scheduler_config['target_ms'] > 0:
+        inline = config['pipeline']['mode'] != 'process'
+        resizable = inline and getattr(detector, 'resizable', False)
+        scheduler = LatencyScheduler(
+            scheduler_config['target_ms'], stride,
+            imgsz=detector.imgsz if resizable else None,
+            render=display,
+            max_render_every=scheduler_config['max_render_every'],
+            min_imgsz=scheduler_config['min_imgsz'],
+            imgsz_step=scheduler_config['imgsz_step'],
+            max_stride=scheduler_config['max_stride'] if inline and keyframe_interval == 1 else stride,
+            window=scheduler_config['window'],
+            headroom=scheduler_config['headroom'])
+        print(f"  Latency Budget: {scheduler.target_ms:g} ms per frame, {len(scheduler.levels) - 1} shedding steps")
+    max_stride = scheduler.levels[-1]['stride'] if scheduler is not None else stride
+    
+    # Occupancy heatmap and dwell times near the counting lines; a track counts
+    # as gone once the tracker would have dropped it
+    analytics = MovementAnalytics(frame_width, frame_height, geometry.lines, config['analytics'], video_fps,
+                                  stride, config['tracker']['max_age'] * max_stride)
+    
+    # Continue from a checkpoint: restore the counting state and skip the frames it covers
     frame_count = 0
-    while True:
-        ret, frame = cap.read()
-        
-        # Break if no more frames
-        if not ret:
-            print("End of video or cannot read frame")
-            break
-        
-        frame_count += 1
-        
-        # Run YOLOv8 detection
-        results = model(frame, verbose=False)
-        
-        # Extract detections for person class only (class 0)
-        detections = []
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                # Get class ID
-                class_id = int(box.cls[0])
-                
-                # Filter only persons (class 0)
-                if class_id == 0:
-                    # Get bounding box coordinates (x1, y1, x2, y2)
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    confidence = float(box.conf[0])
-                    
-                    # Format for SORT: [x1, y1, x2, y2, confidence]
-                    detections.append([x1, y1, x2, y2, confidence])
-        
-        # Convert to numpy array for SORT
-        detections_np = np.array(detections) if len(detections) > 0 else np.empty((0, 5))
-        
-        # Update tracker with detections
-        tracks = tracker.update(detections_np)
-        
-        # Track current active IDs
-        current_track_ids = set()
-        
-        # Draw tracked objects and detect line crossings
-        for track in tracks:
-            bbox = track['bbox']
-            track_id = track['track_id']
-            current_centroid = track['current_centroid']
-            previous_centroid = track['previous_centroid']
+    processed_frames = 0
+    detector_frames = 0
+    start_frame = 0
+    if resume_state is not None:
+        tracker = resume_state['tracker']
+        geometry = resume_state['geometry']
+        timeseries = resume_state['timeseries']
+        analytics = resume_state['analytics']
+        report_gen.data['events'] = resume_state['events']
+        frame_count = resume_state['frame_index']
+        processed_frames = resume_state['processed_frames']
+        detector_frames = resume_state['detector_frames']
+        flow = resume_state['flow']
+        if resume_state['scheduler'] is not None:
+            scheduler = resume_state['scheduler']
+            scheduler.resume()
+            if scheduler.imgsz:
+                detector.imgsz = scheduler.imgsz
+        entry_count, exit_count = geometry.totals()
+        start_frame = frame_count + (scheduler.stride if scheduler is not None else stride) - 1
+        print(f"  Resuming after frame {frame_count} ({entry_count} entries, {exit_count} exits so far)")
+    resumed_from = frame_count
+    active_range = range_index(ranges, frame_count) if ranges and frame_count else None
+    
+    # Frames with detections ([[x1, y1, x2, y2, confidence], ...] for SORT), either
+    # from the inline loop or from a multiprocess decode/inference pipeline that
+    # shares frames through a shared-memory ring
+    pipeline = None
+    if config['pipeline']['mode'] == 'process':
+        cap.release()
+        pipeline = SharedMemoryPipeline(video_path, config['detector'], (frame_height, frame_width, 3),
+                                        scaler.size, config['pipeline']['ring_slots'], stride, start_frame,
+                                        keyframe_interval, ranges).start()
+        print(f"  Pipeline: decoder + inference processes, {pipeline.slots} shared-memory slots")
+        source = pipeline
+    else:
+        frame_stride = (lambda: scheduler.stride) if scheduler is not None else stride
+        source = detect_frames(iter_frames(cap, frame_stride, start_frame, ranges, decode_stats), scaler, detector,
+                               max(1, int(config['detector']['batch_size'])), keyframe)
+    
+    # Read and display frames
+    start_time = time.perf_counter()
+    try:
+        for frame_index, frame, small_frame, detections_np, detect_latency in source:
+            if max_frames and frame_index > max_frames:
+                break
+            frame_count = frame_index
+            processed_frames += 1
             
-            current_track_ids.add(track_id)
+            if ranges:
+                current_range = range_index(ranges, frame_index)
+                if current_range != active_range and active_range is not None:
+                    # Start of the next time range: tracks must not continue across the gap
+                    tracker = Sort(**config['tracker'], output='array')
+                    geometry.reset_tracks()
+                    analytics.finalize()
+                    if scheduler is not None:
+                        scheduler.resume()
+                    print(f"Time range {current_range + 1}: tracks reset at frame {frame_index}")
+                active_range = current_range
             
-            x1, y1, x2, y2 = bbox
-            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-            current_y = current_centroid[1]
+            # The process pipeline downscales in its inference worker, so flow resizes here
+            if flow is not None and small_frame is None:
+                small_frame = scaler.resize(frame)
+            if detections_np is None:
+                # Between keyframes: the boxes of the current tracks moved by optical flow
+                detections_np = flow.propagate(small_frame, tracker.active_boxes())
+            else:
+                detector_frames += 1
+                if record_metrics:
+                    job_metrics.observe_detector(detect_latency)
+                if flow is not None:
+                    flow.reset(small_frame)
             
-            # Initialize tracking for new IDs
-            if track_id not in track_positions:
-                track_positions[track_id] = {
-                    'previous_y': current_y,
-                    'counted': False
-                }
+            # Update tracker with detections
+            tracks = tracker.update(detections_np)
             
-            # Check for line crossing
-            previous_y = track_positions[track_id]['previous_y']
+            # Test all active tracks against all lines and zones at once
+            # (centroids are mapped back to source coordinates for the geometry)
+            track_ids = tracks['track_id']
+            centroids = scaler.to_source(tracks['current_centroid'])
+            events = geometry.update(track_ids, centroids)
+            analytics.update(frame_count, track_ids, centroids, scheduler.stride if scheduler is not None else stride)
             
-            # Detect crossing: person must move from one side to the other
-            # ENTRY: crossing from top (y < line_y) to bottom (y > line_y) - downward
-            # EXIT: crossing from bottom (y > line_y) to top (y < line_y) - upward
+            # ENTRY: crossing a line from its left to its right side (downward for the default line)
+            # EXIT: the opposite direction
+            crossings = {}
+            video_time = (frame_count - 1) / video_fps
+            for kind, name, track_id, event in events:
+                report_gen.add_event(event, track_id, frame_count, location=name, kind=kind, video_time=video_time)
+                if kind == 'line':
+                    timeseries.add(event, video_time)
+                    crossings[track_id] = event
+                    print(f"{event.upper()} detected: ID {track_id} | Line: {name}")
+                else:
+                    print(f"ZONE {event.upper()}: ID {track_id} | Zone: {name}")
+            entry_count, exit_count = geometry.totals()
+            render = display and (scheduler is None or scheduler.render(processed_frames))
             
-            if not track_positions[track_id]['counted']:
-                # Check if crossing downward (ENTRY)
-                if previous_y < counting_line_y and current_y > counting_line_y:
-                    entry_count += 1
-                    track_positions[track_id]['counted'] = True
-                    report_gen.add_event('entry', track_id, frame_count)
-                    print(f"ENTRY detected: ID {track_id} | Total Entry: {entry_count}")
-                    
-                    # Visual feedback - flash green
-                    cv2.putText(frame, "ENTRY!", (x1, y1 - 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # Check if crossing upward (EXIT)
-                elif previous_y > counting_line_y and current_y < counting_line_y:
-                    exit_count += 1
-                    track_positions[track_id]['counted'] = True
-                    report_gen.add_event('exit', track_id, frame_count)
-                    print(f"EXIT detected: ID {track_id} | Total Exit: {exit_count}")
-                    
-                    # Visual feedback - flash red
-                    cv2.putText(frame, "EXIT!", (x1, y1 - 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            if render:
+                # Draw tracked objects
+                for track in tracks:
+                    draw_track(frame, track, scaler, crossings.get(track['track_id']))
             
-            # Update previous position for next frame
-            track_positions[track_id]['previous_y'] = current_y
+            if record_metrics:
+                job_metrics.set_counts(entry_count, exit_count)
+                job_metrics.frame_done()
             
-            # Draw bounding box
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            if scheduler is not None:
+                settings = scheduler.frame_done(frame_count, video_time)
+                if settings is not None:
+                    if settings['imgsz']:
+                        detector.imgsz = settings['imgsz']
+                    adjustment = scheduler.adjustments[-1]
+                    print(f"LATENCY {adjustment['action'].upper()}: {adjustment['latency_ms']:.1f} ms/frame -> "
+                          f"stride {settings['stride']}, imgsz {settings['imgsz'] or '-'}, "
+                          f"render every {settings['render_every']}")
             
-            # Draw track ID
-            cv2.putText(frame, f"ID: {track_id}", 
-                       (x1, y1 - 10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+            if checkpointer is not None and checkpointer.due(processed_frames):
+                checkpointer.save({
+                    'video': os.path.abspath(video_path),
+                    'config': result_config(config),
+                    'frame_index': frame_count,
+                    'processed_frames': processed_frames,
+                    'detector_frames': detector_frames,
+                    'tracker': tracker,
+                    'flow': flow,
+                    'geometry': geometry,
+                    'timeseries': timeseries,
+                    'analytics': analytics,
+                    'scheduler': scheduler,
+                    'events': report_gen.data['events'],
+                })
             
-            # Draw current centroid
-            cv2.circle(frame, (int(current_centroid[0]), int(current_centroid[1])), 
-                      5, (0, 0, 255), -1)
+            if not render:
+                continue
             
-            # Draw previous centroid and trajectory line if available
-            if previous_centroid is not None:
-                cv2.circle(frame, (int(previous_centroid[0]), int(previous_centroid[1])), 
-                          3, (255, 0, 0), -1)
-                cv2.line(frame, 
-                        (int(previous_centroid[0]), int(previous_centroid[1])),
-                        (int(current_centroid[0]), int(current_centroid[1])),
-                        (255, 255, 0), 2)
-        
-        # Clean up old track positions for IDs no longer active
-        track_positions = {tid: data for tid, data in track_positions.items() 
-                          if tid in current_track_ids}
-        
-        # Draw counting line
-        cv2.line(frame, (0, counting_line_y), (frame_width, counting_line_y), (0, 255, 255), 3)
-        cv2.putText(frame, "COUNTING LINE", (frame_width - 200, counting_line_y - 10),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        
-        # Draw ENTRY zone indicator (above the line)
-        entry_zone_y = counting_line_y - 60
-        cv2.putText(frame, "ENTRY ZONE", (10, entry_zone_y),
-                   cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 3)
-        cv2.putText(frame, "(Cross DOWN = Entry)", (10, entry_zone_y + 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-        cv2.arrowedLine(frame, (200, entry_zone_y + 10), (200, counting_line_y - 20),
-                       (0, 255, 0), 3, tipLength=0.3)
-        
-        # Draw EXIT zone indicator (below the line)
-        exit_zone_y = counting_line_y + 80
-        cv2.putText(frame, "EXIT ZONE", (10, exit_zone_y),
-                   cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 3)
-        cv2.putText(frame, "(Cross UP = Exit)", (10, exit_zone_y + 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-        cv2.arrowedLine(frame, (200, exit_zone_y - 10), (200, counting_line_y + 20),
-                       (0, 0, 255), 3, tipLength=0.3)
-        
-        # Create semi-transparent overlay panel for statistics
-        overlay = frame.copy()
-        panel_width = 400
-        panel_height = 320
-        panel_x = 10
-        panel_y = 10
-        
-        # Draw background rectangle
-        cv2.rectangle(overlay, (panel_x, panel_y), 
-                     (panel_x + panel_width, panel_y + panel_height), 
-                     (0, 0, 0), -1)
-        
-        # Blend overlay with frame for transparency
-        alpha = 0.6
-        frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
-        
-        # Information Panel - Header
-        y_offset = panel_y + 30
-        cv2.putText(frame, "=== COUNTING SYSTEM ===", 
-                   (panel_x + 20, y_offset), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-        
-        y_offset += 45
-        cv2.putText(frame, f"Frame: {frame_count} | Active Tracks: {len(tracks)}", 
-                   (panel_x + 20, y_offset), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 2)
-        
-        # Divider line
-        y_offset += 25
-        cv2.line(frame, (panel_x + 20, y_offset), 
-                (panel_x + panel_width - 20, y_offset), (150, 150, 150), 2)
-        
-        # Entry Statistics
-        y_offset += 40
-        cv2.putText(frame, "TOTAL ENTERED:", 
-                   (panel_x + 20, y_offset), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-        cv2.putText(frame, f"{entry_count}", 
-                   (panel_x + 280, y_offset), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 3)
-        
-        # Divider line
-        y_offset += 35
-        cv2.line(frame, (panel_x + 20, y_offset), 
-                (panel_x + panel_width - 20, y_offset), (150, 150, 150), 2)
-        
-        # Exit Statistics
-        y_offset += 40
-        cv2.putText(frame, "TOTAL EXITED:", 
-                   (panel_x + 20, y_offset), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-        cv2.putText(frame, f"{exit_count}", 
-                   (panel_x + 280, y_offset), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
-        
-        # Divider line
-        y_offset += 35
-        cv2.line(frame, (panel_x + 20, y_offset), 
-                (panel_x + panel_width - 20, y_offset), (150, 150, 150), 2)
-        
-        # Current Inside
-        y_offset += 40
-        current_inside = entry_count - exit_count
-        
-        cv2.putText(frame, "CURRENTLY INSIDE:", 
-                   (panel_x + 20, y_offset), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
-        cv2.putText(frame, f"{current_inside}", 
-                   (panel_x + 280, y_offset), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 0), 3)
-        
-        # Display the frame
-        cv2.imshow("PeopleCounter - Mall Entry", frame)
-        
-        # Wait for 'q' key to quit (25ms delay between frames)
-        if cv2.waitKey(25) & 0xFF == ord('q'):
-            print("User requested exit")
-            break
-    
-    # Release resources
-    cap.release()
-    cv2.destroyAllWindows()
+            if geometry.is_single_horizontal_line:
+                draw_counting_line(frame, frame_width, int(geometry.lines[0].p1[1]))
+            else:
+                draw_geometry(frame, geometry)
+            draw_stats_panel(frame, frame_count, len(tracks), entry_count, exit_count)
+            
+            # Display the frame
+            cv2.imshow("PeopleCounter - Mall Entry", frame)
+            
+            # Wait for 'q' key to quit (25ms delay between frames)
+            if cv2.waitKey(25) & 0xFF == ord('q'):
+                print("User requested exit")
+                break
+        else:
+            print("End of video or cannot read frame")
+    finally:
+        # Release resources (also when the job is cancelled or fails)
+        cap.release()
+        ipc_bytes_per_frame = 0.0
+        if pipeline is not None:
+            ipc_bytes_per_frame = pipeline.ipc_bytes_per_frame
+            decode_stats = pipeline.decode_stats or decode_stats
+            pipeline.close()
+        if display:
+            cv2.destroyAllWindows()
+        if record_metrics:
+            job_metrics.flush()
+    
+    elapsed = time.perf_counter() - start_time
+    timeseries.finalize(frame_count / video_fps)
+    analytics.finalize()
+    
+    # Frames advanced since the start (or resume); with time ranges only the frames read or grabbed
+    frames_advanced = frame_count - resumed_from
+    time_ranges = None
+    if ranges is not None:
+        frames_advanced = decode_stats.frames
+        skipped = skipped_frames(ranges, total_frames)
+        time_ranges = {
+            'ranges': [[first / video_fps, last / video_fps if last is not None else None] for first, last in ranges],
+            'frames_skipped': skipped,
+            'seeks': decode_stats.seeks,
+            'seek_seconds': decode_stats.seek_seconds,
+            'decode_seconds': decode_stats.decode_seconds,
+            # Decoding the skipped frames at the measured cost per frame, minus the seeks
+            'decode_seconds_saved': max(0.0, skipped * decode_stats.seconds_per_frame - decode_stats.seek_seconds),
+        }
+    
+    return {
+        'entry_count': entry_count,
+        'exit_count': exit_count,
+        'frame_count': frame_count,
+        'processed_frames': processed_frames,
+        'detector_frames': detector_frames,
+        'geometry': geometry.summary(),
+        'timeseries': timeseries.to_dict(),
+        'analytics': analytics.to_dict(),
+        'scheduler': scheduler.to_dict() if scheduler is not None else None,
+        'time_ranges': time_ranges,
+        'elapsed': elapsed,
+        'fps': frames_advanced / elapsed if elapsed > 0 else 0.0,
+        'ipc_bytes_per_frame': ipc_bytes_per_frame,
+    }
+
+
+def fill_report(report_gen, result, video_path):
+    """Copy the final counts, geometry, time series and analytics of a run into the report"""
+    report_gen.update_stats(
+        entry_count=result['entry_count'],
+        exit_count=result['exit_count'],
+        total_frames=result['frame_count'],
+        video_file=video_path
+    )
+    report_gen.set_geometry(result['geometry'])
+    report_gen.set_timeseries(result['timeseries'])
+    report_gen.set_analytics(result['analytics'])
+    report_gen.set_scheduler(result['scheduler'])
+    report_gen.set_time_ranges(result['time_ranges'])
+
+
+def draw_track(frame, track, scaler, crossing=None):
+    """Draw a tracked person (a TRACK_DTYPE row: box, ID, centroids) in source coordinates"""
+    x1, y1, x2, y2 = (int(v) for v in scaler.to_source(track['bbox']))
+    current_centroid = scaler.to_source(track['current_centroid'])
+    previous_centroid = track['previous_centroid']
+    
+    if crossing == 'entry':
+        # Visual feedback - flash green
+        cv2.putText(frame, "ENTRY!", (x1, y1 - 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    elif crossing == 'exit':
+        # Visual feedback - flash red
+        cv2.putText(frame, "EXIT!", (x1, y1 - 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+    
+    # Draw bounding box
+    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    
+    # Draw track ID
+    cv2.putText(frame, f"ID: {track['track_id']}", 
+               (x1, y1 - 10),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+    
+    # Draw current centroid
+    cv2.circle(frame, (int(current_centroid[0]), int(current_centroid[1])), 
+              5, (0, 0, 255), -1)
+    
+    # Draw previous centroid and trajectory line if available
+    if not np.isnan(previous_centroid[0]):
+        previous_centroid = scaler.to_source(previous_centroid)
+        cv2.circle(frame, (int(previous_centroid[0]), int(previous_centroid[1])), 
+                  3, (255, 0, 0), -1)
+        cv2.line(frame, 
+                (int(previous_centroid[0]), int(previous_centroid[1])),
+                (int(current_centroid[0]), int(current_centroid[1])),
+                (255, 255, 0), 2)
+
+
+def _terminate(signum, frame):
+    """SIGTERM / SIGBREAK (job cancelled): unwind so run_counter releases its resources"""
+    raise SystemExit(128 + signum)
+
+
+def main(argv=None):
+    """Main function to run the people counter application."""
+    signal.signal(signal.SIGTERM, _terminate)
+    # Windows: the web server stops a job with CTRL_BREAK_EVENT
+    if hasattr(signal, 'SIGBREAK'):
+        signal.signal(signal.SIGBREAK, _terminate)
+    args = parse_args(argv)
+    config = build_config(args)
+    job_id = args.job_id or uuid.uuid4().hex[:12]
+    recorded_at = parse_time(args.recorded_at) or time.time()
+    print("PeopleCounter Application Starting...")
+    
+    # Check if video was uploaded via web UI
+    video_path = args.video
+    
+    if not os.path.exists(video_path):
+        print("No video file found. Please upload a video via the web interface.")
+        print("The web UI should already be running at http://127.0.0.1:5000")
+        print("If not, run 'python app.py' to start the web server.")
+        return
+    
+    threads = apply_thread_budget(config)
+    if threads:
+        print(f"Thread budget: {threads}")
+    
+    # Load person detector (the process pipeline loads it in its inference worker)
+    detector = None
+    if config['pipeline']['mode'] != 'process':
+        print(f"Loading detector ({config['detector']['backend']})...")
+        detector = create_detector(config['detector'])
+        print("Model loaded successfully")
+    
+    # Initialize report generator
+    report_gen = ReportGenerator()
+    
+    # Periodic checkpoints, and resuming a run that stopped early
+    checkpointer = None
+    resume_state = None
+    checkpoint_path = config['checkpoint']['path']
+    if checkpoint_path:
+        checkpointer = Checkpointer(checkpoint_path, config['checkpoint']['interval_frames'])
+    if args.resume:
+        if not checkpoint_path:
+            print("Error: --resume needs a checkpoint file (--checkpoint or checkpoint.path)")
+            return
+        if os.path.exists(checkpoint_path):
+            try:
+                resume_state = load_checkpoint(checkpoint_path, video_path, config)
+            except ValueError as e:
+                print(f"Error: cannot resume from {checkpoint_path}: {e}")
+                return
+        else:
+            print(f"No checkpoint at {checkpoint_path}, starting from the beginning")
+    
+    # Job metrics snapshot for the web server's /metrics endpoint (web jobs only)
+    job_metrics = JobMetricsWriter(args.metrics_file) if args.metrics_file else None
+    
+    result = run_counter(video_path, detector, config, display=not args.no_display,
+                         report_gen=report_gen, job_metrics=job_metrics,
+                         checkpointer=checkpointer, resume_state=resume_state)
+    if result is None:
+        return
     print("Application closed successfully")
     
+    entry_count = result['entry_count']
+    exit_count = result['exit_count']
+    frame_count = result['frame_count']
+    
     # Generate and open HTML report
     print("\n" + "="*50)
     print("GENERATING REPORT...")
     print("="*50)
     
     # Update final statistics
-    report_gen.update_stats(
-        entry_count=entry_count,
-        exit_count=exit_count,
-        total_frames=frame_count,
-        video_file=video_path
-    )
+    fill_report(report_gen, result, video_path)
+    
+    # Persist raw results (events and time-series bins) next to the report
+    results_path = report_gen.save_results('people_counter_results.json')
+    print(f"Results saved: {results_path}")
+    
+    # Store events and aggregates in the queryable results database
+    if config['results']['database']:
+        try:
+            with ResultsStore(config['results']['database']) as store:
+                stored = store.save_job(job_id, config['results']['camera'], report_gen.data, recorded_at)
+            print(f"Stored {stored} events in {config['results']['database']} (job {job_id})")
+        except Exception as e:
+            print(f"Warning: failed to store results in database: {e}")
     
     # Generate HTML report
     report_path = report_gen.generate_html_report('people_counter_report.html')
     print(f"\n✅ Report generated: {report_path}")
     
+    # The run is complete; a later --resume must not pick up its last checkpoint
+    if checkpointer is not None:
+        checkpointer.remove()
+    
     # Open report in default browser
-    print("📊 Opening report in browser...")
-    webbrowser.open('file://' + report_path)
+    if not args.no_display:
+        print("📊 Opening report in browser...")
+        webbrowser.open('file://' + report_path)
 
     # Cleanup: remove the original uploaded file (in uploads/) and the copied data file
     try:
-        if UPLOADED_FILEPATH and os.path.exists(UPLOADED_FILEPATH):
-            os.remove(UPLOADED_FILEPATH)
-            print(f"Removed uploaded file: {UPLOADED_FILEPATH}")
+        if args.uploaded_filepath and os.path.exists(args.uploaded_filepath):
+            os.remove(args.uploaded_filepath)
+            print(f"Removed uploaded file: {args.uploaded_filepath}")
     except Exception as e:
         print(f"Warning: failed to remove uploaded file: {e}")
 
     try:
         copied_path = os.path.join(os.path.dirname(__file__), 'data', 'mall_entry.mp4')
-        if os.path.exists(copied_path):
+        if video_path == DEFAULT_VIDEO_PATH and os.path.exists(copied_path):
             os.remove(copied_path)
             print(f"Removed copied data file: {copied_path}")
     except Exception as e:
@@ -350,6 +797,10 @@ def main():
     print(f"Total Exits: {exit_count}")
     print(f"Currently Inside: {entry_count - exit_count}")
     print(f"Total Frames Processed: {frame_count}")
+    print(f"Processing Speed: {result['fps']:.1f} FPS")
+    if result['time_ranges']:
+        print(f"Frames Skipped: {result['time_ranges']['frames_skipped']} "
+              f"(~{result['time_ranges']['decode_seconds_saved']:.1f}s of decoding saved)")
     print("="*50)
 
 
@@ -21,7 +21,7 @@ REM Install requirements
 echo Installing dependencies...
 pip install -r requirements.txt -q
 
-REM Start Flask app
+REM Start the web server (waitress)
 echo.
 echo ================================================
 echo    Starting Web Server...
@@ -34,6 +34,6 @@ echo Press Ctrl+C to stop the server
 echo ================================================
 echo.
 
-python app.py
+python serve.py
 
 pause
@@ -0,0 +1,90 @@
+"""
+PeopleCounter - Production Web Server
+Serves the web interface (app.py) with waitress instead of the Flask
+development server: a pool of request threads behind an asynchronous I/O
+loop, no debugger and no code reloader.
+
+The I/O loop receives request bodies before a thread is involved (large
+uploads are spooled to a temporary file), so slow uploads never block
+/status polling; app.py then streams the file part to disk in uploads/. Idle connections time out and upload sizes are capped.
+On SIGTERM or Ctrl+C the server stops accepting connections, gives in-flight
+requests a few seconds to complete, cancels queued jobs and lets the running
+job finish (up to --drain-timeout) before stopping it.
+
+The job queue, chunked upload sessions and metrics live in this process, so
+the server runs as one process with many threads (worker processes would each
+get their own job queue and could run jobs side by side on the shared
+report file). The video processing
+itself already runs in separate main.py processes.
+
+Run from the project directory, like app.py:
+
+Usage:
+    python serve.py
+    python serve.py --port 8080 --threads 32 --drain-timeout 120
+"""
+
+import argparse
+import os
+import signal
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Upper bound on a request body: the largest upload plus multipart overhead
+BODY_OVERHEAD = 1024 * 1024
+# Request bodies above this size are spooled to disk while they are received
+SPOOL_THRESHOLD = 1024 * 1024
+
+
+def _terminate(signum, frame):
+    """SIGTERM: leave the server loop the same way Ctrl+C does"""
+    raise SystemExit(128 + signum)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the PeopleCounter web interface with waitress')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=16, help='Request handler threads')
+    parser.add_argument('--connection-limit', type=int, default=200,
+                        help='Simultaneous connections before new ones wait in the backlog')
+    parser.add_argument('--channel-timeout', type=int, default=120,
+                        help='Seconds an idle connection (e.g. a stalled upload) is kept open')
+    parser.add_argument('--drain-timeout', type=float, default=60.0,
+                        help='Seconds a running job may keep going after shutdown is requested')
+    args = parser.parse_args(argv)
+
+    from waitress import create_server
+    from app import MAX_FILE_SIZE, app, job_manager
+
+    server = create_server(
+        app,
+        host=args.host,
+        port=args.port,
+        threads=args.threads,
+        connection_limit=args.connection_limit,
+        channel_timeout=args.channel_timeout,
+        cleanup_interval=min(30, args.channel_timeout),
+        max_request_body_size=MAX_FILE_SIZE + BODY_OVERHEAD,
+        inbuf_overflow=SPOOL_THRESHOLD,
+        ident='PeopleCounter',
+    )
+    signal.signal(signal.SIGTERM, _terminate)
+    print(f"PeopleCounter serving on http://{args.host}:{args.port} ({args.threads} threads)")
+    print("Press Ctrl+C to stop")
+
+    # run() returns on SIGTERM / Ctrl+C after waiting for in-flight requests
+    server.run()
+    server.close()
+    print("Server stopped, waiting for jobs...")
+    stopped = job_manager.shutdown(args.drain_timeout)
+    for job in stopped:
+        print(f"Cancelled job {job.id}")
+    print("Shutdown complete")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
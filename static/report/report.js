@@ -0,0 +1,7 @@
+// PeopleCounter report: fade the stat cards in one after another
+document.addEventListener('DOMContentLoaded', function() {
+    const statCards = document.querySelectorAll('.stat-card');
+    statCards.forEach((card, index) => {
+        card.style.animation = `fadeIn 0.5s ease-in-out ${index * 0.1}s both`;
+    });
+});
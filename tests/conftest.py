@@ -0,0 +1,18 @@
+"""Shared fixtures: the repository root on sys.path and the web app in a scratch directory"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def web_app(tmp_path, monkeypatch):
+    """The Flask app module, with uploads/ and jobs/ (relative paths) under tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    for folder in ('uploads', 'jobs'):
+        os.makedirs(folder, exist_ok=True)
+    import app
+    return app
@@ -0,0 +1,145 @@
+"""
+Chunked Upload Tests
+Aborting an upload and sweeping idle sessions remove their preallocated
+files; completing one records its duration. Sessions are per client, and
+chunks arriving after completion are rejected with 404, not a server error.
+
+Usage:
+    python -m pytest tests/test_chunked_upload.py
+"""
+
+import io
+import os
+import time
+
+import pytest
+
+from utils.chunked_upload import ChunkedUploadStore, ChunkError
+
+
+def session_dir(store, upload_id):
+    return os.path.join(store.root, upload_id)
+
+
+def age(store, upload_id, seconds):
+    """Pretend the session's last activity was `seconds` ago"""
+    then = time.time() - seconds
+    os.utime(os.path.join(session_dir(store, upload_id), 'meta.json'), (then, then))
+
+
+def test_abort_removes_session(tmp_path):
+    store = ChunkedUploadStore(str(tmp_path / 'chunked'), 1024)
+    upload_id = store.init('a.mp4', 100, 'fp')['upload_id']
+    assert os.path.exists(os.path.join(session_dir(store, upload_id), 'data.part'))
+    store.abort(upload_id)
+    assert not os.path.exists(session_dir(store, upload_id))
+    with pytest.raises(ChunkError) as error:
+        store.abort(upload_id)
+    assert error.value.status == 404
+
+
+def test_idle_sessions_expire_on_new_session(tmp_path):
+    store = ChunkedUploadStore(str(tmp_path / 'chunked'), 1024, session_ttl=3600)
+    idle = store.init('idle.mp4', 100, 'fp1')['upload_id']
+    active = store.init('active.mp4', 100, 'fp2')['upload_id']
+    age(store, idle, 7200)
+    age(store, active, 7200)
+    # A received chunk counts as activity
+    store.write_chunk(active, 0, io.BytesIO(b'x' * 100), 100)
+
+    store.init('new.mp4', 100, 'fp3')
+    assert not os.path.exists(session_dir(store, idle))
+    assert os.path.exists(session_dir(store, active))
+
+
+def test_idle_sessions_expire_at_startup(tmp_path):
+    root = str(tmp_path / 'chunked')
+    upload_id = ChunkedUploadStore(root, 1024).init('a.mp4', 100, 'fp')['upload_id']
+    store = ChunkedUploadStore(root, 1024, session_ttl=60)
+    assert os.path.exists(session_dir(store, upload_id))
+    age(store, upload_id, 120)
+    ChunkedUploadStore(root, 1024, session_ttl=60)
+    assert not os.path.exists(session_dir(store, upload_id))
+
+
+def test_delete_route(web_app, tmp_path, monkeypatch):
+    store = ChunkedUploadStore(str(tmp_path / 'chunked'), 1024)
+    monkeypatch.setattr(web_app, 'chunked_uploads', store)
+    client = web_app.app.test_client()
+    upload_id = client.post('/upload/init', json={'filename': 'a.mp4', 'size': 10,
+                                                  'fingerprint': 'fp'}).get_json()['upload_id']
+
+    response = client.delete(f'/upload/{upload_id}')
+    assert response.status_code == 200
+    assert not os.path.exists(session_dir(store, upload_id))
+    assert client.delete(f'/upload/{upload_id}').status_code == 404
+
+
+def observations(histogram):
+    """Observation count from the rendered histogram (0 before the first one)"""
+    for line in histogram.render():
+        if line.startswith(histogram.name + '_count'):
+            return int(float(line.split()[-1]))
+    return 0
+
+
+def test_complete_observes_upload_duration(web_app, tmp_path, monkeypatch):
+    store = ChunkedUploadStore(str(tmp_path / 'chunked'), 1024)
+    monkeypatch.setattr(web_app, 'chunked_uploads', store)
+    client = web_app.app.test_client()
+    before = observations(web_app.upload_duration)
+    upload_id = client.post('/upload/init', json={'filename': 'a.mp4', 'size': 10,
+                                                  'fingerprint': 'fp'}).get_json()['upload_id']
+    assert client.put(f'/upload/{upload_id}/chunk/0', data=b'0123456789').status_code == 200
+    assert client.post(f'/upload/{upload_id}/complete').status_code == 200
+    assert observations(web_app.upload_duration) == before + 1
+
+
+def test_same_file_gets_separate_sessions(tmp_path):
+    store = ChunkedUploadStore(str(tmp_path / 'chunked'), 1024)
+    first = store.init('a.mp4', 100, 'fp')['upload_id']
+    second = store.init('a.mp4', 100, 'fp')['upload_id']
+    assert first != second
+    store.write_chunk(first, 0, io.BytesIO(b'x' * 100), 100)
+    assert store.status(second)['received'] == []
+
+
+def test_resume_by_upload_id(tmp_path):
+    store = ChunkedUploadStore(str(tmp_path / 'chunked'), 1024)
+    upload_id = store.init('a.mp4', 100, 'fp', chunk_size=50)['upload_id']
+    store.write_chunk(upload_id, 1, io.BytesIO(b'x' * 50), 50)
+    resumed = store.init('a.mp4', 100, 'fp', chunk_size=50, upload_id=upload_id)
+    assert resumed['upload_id'] == upload_id and resumed['received'] == [1]
+    # An id for a different file starts a new session
+    assert store.init('b.mp4', 100, 'fp2', upload_id=upload_id)['upload_id'] != upload_id
+
+
+def test_chunk_after_complete_is_404(web_app, tmp_path, monkeypatch):
+    store = ChunkedUploadStore(str(tmp_path / 'chunked'), 1024)
+    monkeypatch.setattr(web_app, 'chunked_uploads', store)
+    client = web_app.app.test_client()
+    upload_id = client.post('/upload/init', json={'filename': 'a.mp4', 'size': 10,
+                                                  'fingerprint': 'fp'}).get_json()['upload_id']
+    assert client.put(f'/upload/{upload_id}/chunk/0', data=b'0123456789').status_code == 200
+    assert client.post(f'/upload/{upload_id}/complete').status_code == 200
+
+    assert client.put(f'/upload/{upload_id}/chunk/0', data=b'0123456789').status_code == 404
+    assert client.post(f'/upload/{upload_id}/complete').status_code == 404
+    assert client.get(f'/upload/{upload_id}').status_code == 404
+
+
+def test_chunk_racing_complete_is_404(tmp_path):
+    store = ChunkedUploadStore(str(tmp_path / 'chunked'), 1024)
+    upload_id = store.init('a.mp4', 10, 'fp')['upload_id']
+    store.write_chunk(upload_id, 0, io.BytesIO(b'0123456789'), 10)
+
+    class CompletingStream:
+        """Completes the upload while the chunk body is being read"""
+
+        def read(self, size):
+            store.complete(upload_id, str(tmp_path / 'a.mp4'))
+            return b'0123456789'[:size]
+
+    with pytest.raises(ChunkError) as error:
+        store.write_chunk(upload_id, 0, CompletingStream(), 10)
+    assert error.value.status == 404
@@ -0,0 +1,64 @@
+"""
+Counting Geometry Tests
+Crossings through a point exactly on the line: integer track boxes put
+centroids on the line often. Such a walk must be counted once, and touching
+the line and turning back must never count, from either side.
+
+Usage:
+    python -m pytest tests/test_counting_geometry.py
+"""
+
+import numpy as np
+import pytest
+
+from utils.counting_geometry import CountingGeometry, CountingLine, segment_crossings
+
+
+# Horizontal line from (0, 100) to (200, 100): its left side is y < 100 (above, on screen)
+LINE_START = np.array([[0.0, 100.0]])
+LINE_END = np.array([[200.0, 100.0]])
+EVENT_CODES = {'entry': 1, 'exit': -1}
+
+
+def crossings(path):
+    """Crossing codes of each step of one track walking a path of (x, y) points"""
+    geometry = CountingGeometry([CountingLine('main', LINE_START[0], LINE_END[0])])
+    codes = []
+    for i, point in enumerate(path):
+        events = geometry.update([1], [point])
+        if i:
+            codes.append(sum(EVENT_CODES[event] for _, _, _, event in events))
+    return codes
+
+
+@pytest.mark.parametrize('path, expected', [
+    # Straight through: left to right is +1 (entry), right to left -1 (exit)
+    ([(50, 90), (50, 110)], [1]),
+    ([(50, 110), (50, 90)], [-1]),
+    # Onto the line, then on: counted once, when the other side is reached
+    ([(50, 90), (50, 100), (50, 110)], [0, 1]),
+    ([(50, 110), (50, 100), (50, 90)], [0, -1]),
+    ([(50, 90), (50, 100), (50, 100), (50, 110)], [0, 0, 1]),
+    # Touching the line and turning back is not a crossing, from either side
+    ([(50, 90), (50, 100), (50, 90)], [0, 0]),
+    ([(50, 110), (50, 100), (50, 110)], [0, 0]),
+    # Starting on the line has no side to cross from
+    ([(50, 100), (50, 110), (50, 120)], [0, 0]),
+    # Standing on the line
+    ([(50, 100), (50, 100), (50, 100)], [0, 0]),
+    # Past the end of the segment
+    ([(250, 90), (250, 110)], [0]),
+    ([(250, 90), (250, 100), (50, 110)], [0, 0]),
+])
+def test_point_on_line(path, expected):
+    assert crossings(path) == expected
+
+
+def test_segment_crossings_without_state():
+    # Without prev_sides a point on the line has no side, so neither step counts
+    points = np.array([[50.0, 90.0], [50.0, 100.0], [50.0, 110.0]])
+    steps = [int(segment_crossings(points[i:i + 1], points[i + 1:i + 2], LINE_START, LINE_END)[0, 0])
+             for i in range(2)]
+    assert steps == [0, 0]
+    sides = np.array([[-1]], dtype=np.int8)
+    assert segment_crossings(points[1:2], points[2:3], LINE_START, LINE_END, sides)[0, 0] == 1
@@ -0,0 +1,87 @@
+"""
+Job Manager Tests
+Cancelling a running job stops its process; its upload and the staged copy
+of the video are removed once the process has exited.
+
+Usage:
+    python -m pytest tests/test_job_manager.py
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from utils.job_manager import JOB_CREATION_FLAGS, JobManager
+
+
+def sleeper(job):
+    return subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'],
+                            creationflags=JOB_CREATION_FLAGS)
+
+
+# Takes a moment to shut down after SIGTERM, like main.py releasing its resources
+SLOW_STOP = ('import signal, sys, time\n'
+             'signal.signal(signal.SIGTERM, lambda *_: (time.sleep(0.5), sys.exit(1)))\n'
+             'time.sleep(60)\n')
+
+
+def wait_until(predicate, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_cancel_stops_running_job():
+    manager = JobManager(sleeper, poll_interval=0.05, kill_timeout=5.0)
+    job = manager.submit()
+    assert job.status == 'running'
+    manager.cancel(job.id)
+    assert wait_until(lambda: job.finished is not None)
+    assert job.status == 'cancelled'
+    assert job.process.poll() is not None
+
+
+def test_cancel_route_removes_upload_and_staged_video(web_app, monkeypatch):
+    upload, staged = os.path.join('uploads', 'a.mp4'), 'mall_entry.mp4'
+
+    def launcher(job):
+        # Like launch_job: stage a copy of the upload before starting the process
+        with open(staged, 'wb') as f:
+            f.write(b'video')
+        job.params['staged_path'] = staged
+        return subprocess.Popen([sys.executable, '-c', SLOW_STOP], creationflags=JOB_CREATION_FLAGS)
+
+    with open(upload, 'wb') as f:
+        f.write(b'video')
+    manager = JobManager(launcher, poll_interval=0.05, kill_timeout=5.0, on_exit=web_app.cleanup_job)
+    monkeypatch.setattr(web_app, 'job_manager', manager)
+    job = manager.submit(filename='a.mp4', filepath=upload)
+    time.sleep(0.3)
+
+    response = web_app.app.test_client().post(f'/jobs/{job.id}/cancel')
+    assert response.status_code == 200
+    # Still in use by the stopping process
+    assert os.path.exists(upload) and os.path.exists(staged)
+    assert wait_until(lambda: job.finished is not None)
+    assert not os.path.exists(upload)
+    assert not os.path.exists(staged)
+
+
+def test_cancel_queued_job_removes_upload(web_app, monkeypatch):
+    upload = os.path.join('uploads', 'b.mp4')
+    with open(upload, 'wb') as f:
+        f.write(b'video')
+    manager = JobManager(sleeper, poll_interval=0.05, kill_timeout=5.0, on_exit=web_app.cleanup_job)
+    monkeypatch.setattr(web_app, 'job_manager', manager)
+    running = manager.submit()
+    queued = manager.submit(filename='b.mp4', filepath=upload)
+    assert queued.status == 'queued'
+
+    assert web_app.app.test_client().post(f'/jobs/{queued.id}/cancel').status_code == 200
+    assert not os.path.exists(upload)
+    manager.cancel(running.id)
+    assert wait_until(lambda: running.finished is not None)
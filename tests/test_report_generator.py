@@ -0,0 +1,24 @@
+"""
+Report Generator Tests
+The HTML report is self-contained: its stylesheet and script are inlined,
+so it still renders when downloaded from /report or opened from disk.
+
+Usage:
+    python -m pytest tests/test_report_generator.py
+"""
+
+import os
+
+from utils.report_generator import ASSET_DIR, ReportGenerator
+
+
+def test_report_inlines_assets(tmp_path):
+    path = str(tmp_path / 'report.html')
+    ReportGenerator().generate_html_report(path)
+    with open(path, encoding='utf-8') as f:
+        html = f.read()
+
+    assert '<link rel="stylesheet"' not in html and '<script src=' not in html
+    for name in ('report.css', 'report.js'):
+        with open(os.path.join(ASSET_DIR, name), encoding='utf-8') as f:
+            assert f.read().strip() in html
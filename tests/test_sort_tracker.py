@@ -0,0 +1,69 @@
+"""
+SORT Tracker Tests
+Unmatched detections keep the original SORT order (never-assigned first,
+then low-IOU assignments), which decides the order new track IDs are handed
+out. The gated association path must match the dense one exactly.
+
+Usage:
+    python -m pytest tests/test_sort_tracker.py
+"""
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_crowd import generate_crowd_stream
+from utils import sort_tracker
+from utils.sort_tracker import KalmanBoxTracker, Sort
+
+
+TRACK = [0, 0, 10, 10]
+# The solver pairs NEAR with the track, but the IOU (~0.02) is below the threshold
+NEAR = [8, 8, 18, 18, 0.9]
+FAR = [100, 100, 110, 110, 0.9]
+
+
+def test_dense_unmatched_order():
+    tracker = Sort()
+    matches, unmatched_dets, unmatched_trks = tracker._associate_detections_to_trackers(
+        np.array([NEAR, FAR], dtype=float), np.array([TRACK + [0]], dtype=float))
+    assert len(matches) == 0
+    assert unmatched_dets.tolist() == [1, 0]
+    assert unmatched_trks.tolist() == [0]
+
+
+@pytest.fixture
+def always_gated(monkeypatch):
+    """Use the gated path for any number of trackers"""
+    monkeypatch.setattr(sort_tracker, 'GATED_MIN_TRACKERS', 0)
+
+
+def test_gated_unmatched_order(always_gated):
+    dets = np.array([NEAR, FAR], dtype=float)
+    trks = np.array([TRACK + [0]], dtype=float)
+    dense = Sort()._associate_detections_to_trackers(dets, trks)
+    gated = Sort(association='gated')._associate_detections_to_trackers(dets, trks)
+    for dense_part, gated_part in zip(dense, gated):
+        assert gated_part.tolist() == dense_part.tolist()
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_gated_track_ids_match_dense(always_gated, seed):
+    stream = generate_crowd_stream(num_frames=60, seed=seed, num_people=50, density=0.15,
+                                   occlusion_rate=0.02, miss_rate=0.05)
+    runs = []
+    for association in ('dense', 'gated'):
+        # Track IDs come from a class-wide counter
+        KalmanBoxTracker.count = 0
+        tracker = Sort(association=association)
+        runs.append([sorted((t['track_id'], t['bbox']) for t in tracker.update(dets)) for dets, _ in stream])
+    assert runs[1] == runs[0]
+
+
+def test_dense_new_track_order():
+    tracker = Sort()
+    tracker.update(np.array([TRACK + [0.9]], dtype=float))
+    tracker.update(np.array([NEAR, FAR], dtype=float))
+    # New trackers are created in unmatched order: FAR first, then NEAR
+    created = [trk.get_state().reshape(-1)[:2] for trk in tracker.trackers[1:]]
+    assert np.allclose(created[0], FAR[:2], atol=1) and np.allclose(created[1], NEAR[:2], atol=1)
+    assert tracker.trackers[1].id < tracker.trackers[2].id
@@ -0,0 +1,33 @@
+"""
+Thread Budget Tests
+Applying a budget caps torch only for the backend that uses it, without
+importing torch for the others.
+
+Usage:
+    python -m pytest tests/test_threads.py
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('backend, imported', [('stub', 'False'), ('onnxruntime', 'False'), ('ultralytics', '2')])
+def test_torch_capped_only_for_ultralytics(tmp_path, backend, imported):
+    # An importable stand-in for torch that records the thread count it was given
+    os.makedirs(tmp_path / 'torch')
+    (tmp_path / 'torch' / '__init__.py').write_text(
+        'threads = None\ndef set_num_threads(n):\n    global threads\n    threads = n\n')
+    # A fresh interpreter, so nothing has imported torch yet
+    code = ("import sys; from utils.config import load_config; from utils.threads import apply_thread_budget; "
+            f"config = load_config(None); config['detector']['backend'] = {backend!r}; "
+            "config['runtime']['threads'] = 2; apply_thread_budget(config); "
+            "print(sys.modules['torch'].threads if 'torch' in sys.modules else False)")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(tmp_path), ROOT]))
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True,
+                            check=True)
+    assert output.stdout.strip() == imported
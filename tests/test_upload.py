@@ -0,0 +1,45 @@
+"""
+Single-Request Upload Tests
+/upload streams the file part to a temporary file in uploads/ and renames
+it into place; rejected uploads leave no temporary file behind.
+
+Usage:
+    python -m pytest tests/test_upload.py
+"""
+
+import io
+import os
+
+
+def incoming_files():
+    return [name for name in os.listdir('uploads') if name.startswith('.incoming_')]
+
+
+def test_upload_streams_to_uploads_folder(web_app, monkeypatch):
+    created = []
+    original = web_app.UploadRequest._get_file_stream
+
+    def recording(self, *args, **kwargs):
+        stream = original(self, *args, **kwargs)
+        created.append(stream.name)
+        return stream
+
+    monkeypatch.setattr(web_app.UploadRequest, '_get_file_stream', recording)
+    client = web_app.app.test_client()
+    body = os.urandom(2 * 1024 * 1024)
+    response = client.post('/upload', data={'file': (io.BytesIO(body), 'clip.mp4')},
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert [os.path.dirname(os.path.abspath(name)) for name in created] == [os.path.abspath('uploads')]
+    with open(response.get_json()['filepath'], 'rb') as f:
+        assert f.read() == body
+    assert incoming_files() == []
+
+
+def test_rejected_upload_leaves_no_temp_file(web_app):
+    client = web_app.app.test_client()
+    response = client.post('/upload', data={'file': (io.BytesIO(b'not a video'), 'notes.txt')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert incoming_files() == []
@@ -0,0 +1,262 @@
+"""
+Movement Analytics for PeopleCounter
+Incremental occupancy heatmap and per-track dwell times. Both are updated
+with NumPy operations on preallocated buffers in O(tracks) per frame, and
+their memory is bounded: a fixed-size heatmap grid, and per-track state only
+for tracks currently in view (finished tracks are folded into fixed-size
+aggregates).
+"""
+
+import heapq
+
+import numpy as np
+
+
+# Upper edges (seconds) of the dwell time histogram bins; the last bin is open-ended
+DWELL_BIN_EDGES = (2, 5, 10, 30, 60, 120, 300)
+
+
+class _Scratch:
+    """Reusable per-frame buffers, grown by doubling when more tracks appear"""
+
+    def __init__(self, dtypes, capacity=64):
+        self.dtypes = dtypes
+        self.capacity = 0
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        self.capacity = capacity
+        for name, dtype in self.dtypes.items():
+            setattr(self, name, np.empty(capacity, dtype=dtype))
+
+    def reserve(self, n):
+        if n > self.capacity:
+            capacity = self.capacity
+            while capacity < n:
+                capacity *= 2
+            self._grow(capacity)
+
+
+class HeatmapAccumulator:
+    """
+    Counts track centroids per cell of a downscaled grid (grid_width cells
+    across, proportional rows). Each cell holds the number of track-frames
+    observed there.
+    """
+
+    def __init__(self, frame_width, frame_height, grid_width=48):
+        self.frame_size = (frame_width, frame_height)
+        self.grid_width = max(1, int(grid_width))
+        self.grid_height = max(1, int(round(self.grid_width * frame_height / float(frame_width))))
+        self.grid = np.zeros((self.grid_height, self.grid_width), dtype=np.int64)
+        self._sx = self.grid_width / float(frame_width)
+        self._sy = self.grid_height / float(frame_height)
+        self._scratch = _Scratch({'fx': np.float64, 'fy': np.float64, 'col': np.int64, 'cell': np.int64})
+
+    def update(self, points):
+        """Add centroids (N, 2) in source pixels"""
+        n = len(points)
+        if not n:
+            return
+        s = self._scratch
+        s.reserve(n)
+        fx, fy, col, cell = s.fx[:n], s.fy[:n], s.col[:n], s.cell[:n]
+        np.multiply(points[:, 0], self._sx, out=fx)
+        np.multiply(points[:, 1], self._sy, out=fy)
+        np.clip(fx, 0, self.grid_width - 1, out=fx)
+        np.clip(fy, 0, self.grid_height - 1, out=fy)
+        col[:] = fx
+        cell[:] = fy
+        # Flat cell index: row * grid_width + col
+        np.multiply(cell, self.grid_width, out=cell)
+        np.add(cell, col, out=cell)
+        np.add.at(self.grid.reshape(-1), cell, 1)
+
+    def to_dict(self):
+        return {
+            'frame_size': list(self.frame_size),
+            'grid_width': self.grid_width,
+            'grid_height': self.grid_height,
+            'cells': self.grid.tolist(),
+        }
+
+
+class DwellTimeAccumulator:
+    """
+    Time in view and time near the counting lines (within `near_distance`
+    pixels) per track. Active tracks live in reusable slots; a track not seen
+    for more than `max_gap` frames is finished and folded into totals, a
+    histogram and the `top_n` longest dwellers.
+    """
+
+    def __init__(self, lines, near_distance, seconds_per_frame, frame_step=1, max_gap=30, top_n=10,
+                 initial_slots=64):
+        self.near_distance_sq = float(near_distance) ** 2
+        self.seconds_per_frame = seconds_per_frame
+        self.frame_step = frame_step
+        self.max_gap = max_gap
+        self.top_n = top_n
+        # Line segments a + t * d, t in [0, 1]
+        self._line_a = [np.array(line.p1, dtype=np.float64) for line in lines]
+        self._line_d = [np.array(line.p2, dtype=np.float64) - np.array(line.p1, dtype=np.float64)
+                        for line in lines]
+
+        self._slot_of = {}
+        self._free = []
+        self.ids = np.empty(0, dtype=np.int64)
+        self.first_seen = np.empty(0, dtype=np.int64)
+        self.last_seen = np.empty(0, dtype=np.int64)
+        self.near_frames = np.empty(0, dtype=np.int64)
+        self._grow_slots(initial_slots)
+        self._scratch = _Scratch({'slot': np.int64, 't': np.float64, 'dx': np.float64, 'dy': np.float64,
+                                  'dist': np.float64, 'near': np.bool_, 'hit': np.bool_, 'weight': np.int64})
+        self._last_sweep = 0
+
+        # Aggregates over finished tracks
+        self.tracks = 0
+        self.visible_total = 0.0
+        self.visible_max = 0.0
+        self.near_tracks = 0
+        self.near_total = 0.0
+        self.near_max = 0.0
+        self.histogram = np.zeros(len(DWELL_BIN_EDGES) + 1, dtype=np.int64)
+        self._top = []
+
+    def _grow_slots(self, capacity):
+        old = len(self.ids)
+        for name in ('ids', 'first_seen', 'last_seen', 'near_frames'):
+            grown = np.zeros(capacity, dtype=np.int64)
+            grown[:old] = getattr(self, name)
+            setattr(self, name, grown)
+        self.ids[old:] = -1
+        self._free.extend(range(capacity - 1, old - 1, -1))
+
+    def update(self, frame_index, track_ids, points, step=None):
+        """
+        Record the tracks (IDs and centroids (N, 2) in source pixels) seen on
+        this frame; step is the number of source frames it stands for
+        (default frame_step, varies under the latency scheduler)
+        """
+        n = len(track_ids)
+        if n:
+            s = self._scratch
+            s.reserve(n)
+            slot = s.slot[:n]
+            for i, track_id in enumerate(track_ids):
+                slot[i] = self._slot_for(track_id, frame_index)
+            self.last_seen[slot] = frame_index
+
+            near = s.near[:n]
+            near[:] = False
+            t, dx, dy, dist, hit = s.t[:n], s.dx[:n], s.dy[:n], s.dist[:n], s.hit[:n]
+            for a, d in zip(self._line_a, self._line_d):
+                # Distance from each point to the segment: project, clamp to [0, 1], measure
+                np.subtract(points[:, 0], a[0], out=dx)
+                np.subtract(points[:, 1], a[1], out=dy)
+                np.multiply(dx, d[0], out=t)
+                np.multiply(dy, d[1], out=dist)
+                np.add(t, dist, out=t)
+                np.multiply(t, 1.0 / max(d @ d, 1e-12), out=t)
+                np.clip(t, 0.0, 1.0, out=t)
+                np.multiply(t, d[0], out=dist)
+                np.subtract(dx, dist, out=dx)
+                np.multiply(t, d[1], out=dist)
+                np.subtract(dy, dist, out=dy)
+                np.multiply(dx, dx, out=dx)
+                np.multiply(dy, dy, out=dy)
+                np.add(dx, dy, out=dist)
+                np.less(dist, self.near_distance_sq, out=hit)
+                np.logical_or(near, hit, out=near)
+            weight = s.weight[:n]
+            np.multiply(near, step or self.frame_step, out=weight)
+            np.add.at(self.near_frames, slot, weight)
+
+        # Finish tracks that left the view (amortized: one sweep every max_gap frames)
+        if frame_index - self._last_sweep >= self.max_gap:
+            self._last_sweep = frame_index
+            stale = np.flatnonzero((self.ids >= 0) & (self.last_seen < frame_index - self.max_gap))
+            for slot in stale:
+                self._finish(slot)
+
+    def _slot_for(self, track_id, frame_index):
+        slot = self._slot_of.get(track_id)
+        if slot is None:
+            if not self._free:
+                self._grow_slots(2 * len(self.ids))
+            slot = self._free.pop()
+            self._slot_of[track_id] = slot
+            self.ids[slot] = track_id
+            self.first_seen[slot] = frame_index
+            self.near_frames[slot] = 0
+        return slot
+
+    def _finish(self, slot):
+        track_id = int(self.ids[slot])
+        visible = (self.last_seen[slot] - self.first_seen[slot] + self.frame_step) * self.seconds_per_frame
+        near = self.near_frames[slot] * self.seconds_per_frame
+        self.tracks += 1
+        self.visible_total += visible
+        self.visible_max = max(self.visible_max, visible)
+        if near > 0:
+            self.near_tracks += 1
+            self.near_total += near
+            self.near_max = max(self.near_max, near)
+            self.histogram[np.searchsorted(DWELL_BIN_EDGES, near, side='right')] += 1
+            entry = (near, track_id)
+            if len(self._top) < self.top_n:
+                heapq.heappush(self._top, entry)
+            elif entry > self._top[0]:
+                heapq.heapreplace(self._top, entry)
+        del self._slot_of[track_id]
+        self.ids[slot] = -1
+        self._free.append(slot)
+
+    def finalize(self):
+        """Finish all tracks still in view (end of the video)"""
+        for slot in np.flatnonzero(self.ids >= 0):
+            self._finish(slot)
+
+    def to_dict(self):
+        return {
+            'tracks': self.tracks,
+            'mean_visible_seconds': self.visible_total / self.tracks if self.tracks else 0.0,
+            'max_visible_seconds': self.visible_max,
+            'near_tracks': self.near_tracks,
+            'mean_near_seconds': self.near_total / self.near_tracks if self.near_tracks else 0.0,
+            'max_near_seconds': self.near_max,
+            'histogram_edges': list(DWELL_BIN_EDGES),
+            'histogram': self.histogram.tolist(),
+            'top_dwellers': [{'track_id': track_id, 'seconds': round(seconds, 2)}
+                             for seconds, track_id in sorted(self._top, reverse=True)],
+        }
+
+
+class MovementAnalytics:
+    """Heatmap and dwell times updated together from the tracks of each frame"""
+
+    def __init__(self, frame_width, frame_height, lines, analytics_config, video_fps, frame_step=1,
+                 max_gap=30):
+        self.heatmap = HeatmapAccumulator(frame_width, frame_height, analytics_config['heatmap_width'])
+        self.dwell = DwellTimeAccumulator(lines, analytics_config['dwell_distance'] * frame_height,
+                                          1.0 / video_fps, frame_step, max_gap, analytics_config['top_dwellers'])
+        self._points = np.empty((64, 2), dtype=np.float64)
+
+    def update(self, frame_index, track_ids, centroids, step=None):
+        """Track IDs and centroids (source pixels) of the tracks on this frame (step: source frames it covers)"""
+        n = len(track_ids)
+        if n > len(self._points):
+            self._points = np.empty((2 * n, 2), dtype=np.float64)
+        points = self._points[:n]
+        if n:
+            points[:] = centroids
+        self.heatmap.update(points)
+        self.dwell.update(frame_index, track_ids, points, step)
+
+    def finalize(self):
+        self.dwell.finalize()
+
+    def to_dict(self):
+        return {
+            'heatmap': self.heatmap.to_dict(),
+            'dwell': self.dwell.to_dict(),
+        }
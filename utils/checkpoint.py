@@ -0,0 +1,74 @@
+"""
+Checkpoints for PeopleCounter
+Periodic snapshots of the counting state (frame index, SORT tracker with its
+Kalman filters and ID counter, per-track positions, counters, time-series bins
+and the event log) so a long run can be resumed where it stopped.
+"""
+
+import os
+import pickle
+
+from utils.sort_tracker import KalmanBoxTracker
+
+
+CHECKPOINT_VERSION = 5
+
+# Config sections that change results; a checkpoint only resumes with identical ones
+RESULT_SECTIONS = ('detector', 'video', 'scheduler', 'tracker', 'counting', 'analytics')
+# Speed-only detector settings that may differ between the original run and the resume
+SPEED_ONLY_KEYS = ('threads', 'batch_size')
+
+
+def result_config(config):
+    """The part of the config a checkpoint must match to resume"""
+    sections = {section: dict(config[section]) for section in RESULT_SECTIONS}
+    for key in SPEED_ONLY_KEYS:
+        sections['detector'].pop(key, None)
+    return sections
+
+
+class Checkpointer:
+    """
+    Writes a checkpoint every `interval` processed frames. Each checkpoint
+    replaces the previous one atomically, so a crash mid-write leaves the last
+    complete checkpoint in place.
+    """
+
+    def __init__(self, path, interval=1000):
+        self.path = path
+        self.interval = max(1, int(interval))
+        self.saved = 0
+
+    def due(self, processed_frames):
+        return bool(self.path) and processed_frames % self.interval == 0
+
+    def save(self, state):
+        state = dict(state, version=CHECKPOINT_VERSION, track_id_counter=KalmanBoxTracker.count)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self.saved += 1
+
+    def remove(self):
+        """Drop the checkpoint once the run has completed"""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def load_checkpoint(path, video_path, config):
+    """
+    Load a checkpoint written for this video and config and restore the global
+    track ID counter. Raises ValueError if it belongs to a different run.
+    Only load checkpoints written by this application (they are pickles).
+    """
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {state.get('version')}")
+    if state['video'] != os.path.abspath(video_path):
+        raise ValueError(f"Checkpoint belongs to {state['video']}, not {video_path}")
+    if state['config'] != result_config(config):
+        raise ValueError(f"Checkpoint was written with different {'/'.join(RESULT_SECTIONS)} settings")
+    KalmanBoxTracker.count = state['track_id_counter']
+    return state
@@ -0,0 +1,215 @@
+"""
+Chunked Uploads for PeopleCounter
+Resumable uploads in fixed-size chunks. Each chunk is streamed straight to
+its offset in a preallocated file on disk (never buffered whole in memory),
+verified against its SHA-256 and recorded with a marker file, so chunks can
+arrive in parallel, out of order, and after a dropped connection. Sessions
+that see no chunk for session_ttl seconds are removed with their data.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import threading
+import time
+
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# Block size used when streaming a chunk from the request to disk
+STREAM_BLOCK_SIZE = 1024 * 1024
+# Idle time after which an abandoned session (and its preallocated file) is removed
+DEFAULT_SESSION_TTL = 24 * 3600
+
+
+class ChunkError(Exception):
+    """Raised for invalid chunk requests; carries an HTTP status code"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ChunkedUploadStore:
+    """
+    Upload sessions kept under `<root>/<upload_id>/` (meta.json, data.part,
+    chunks/). The modification time of meta.json is the session's last
+    activity; idle sessions are swept at startup and whenever a new session
+    is created.
+    """
+
+    def __init__(self, root, max_file_size, session_ttl=DEFAULT_SESSION_TTL):
+        self.root = root
+        self.max_file_size = max_file_size
+        self.session_ttl = session_ttl
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        with self._lock:
+            self._expire()
+
+    def _session_dir(self, upload_id):
+        if not upload_id.isalnum():
+            raise ChunkError('Invalid upload id', 404)
+        return os.path.join(self.root, upload_id)
+
+    def init(self, filename, size, fingerprint, chunk_size=DEFAULT_CHUNK_SIZE, upload_id=None):
+        """
+        Start an upload under a new random id, or return the session `upload_id`
+        (from an earlier init) if it is for the same file fingerprint (name,
+        size, modification time), so the client can resume. The id is random
+        so two clients uploading the same file never share a session.
+        """
+        if size <= 0:
+            raise ChunkError('File is empty')
+        if size > self.max_file_size:
+            raise ChunkError(f'File is too large. Maximum size is {self.max_file_size // (1024 * 1024)}MB', 413)
+        chunk_size = max(1, min(int(chunk_size), MAX_CHUNK_SIZE))
+
+        with self._lock:
+            meta = self._read_meta(upload_id) if isinstance(upload_id, str) and upload_id.isalnum() else None
+            if (meta is None or meta['size'] != size or meta['filename'] != filename
+                    or meta.get('fingerprint') != fingerprint):
+                self._expire()
+                upload_id = secrets.token_hex(12)
+                session = self._session_dir(upload_id)
+                os.makedirs(os.path.join(session, 'chunks'))
+                # Preallocate the target file so chunks can be written at their offsets
+                with open(os.path.join(session, 'data.part'), 'wb') as f:
+                    f.truncate(size)
+                meta = {
+                    'upload_id': upload_id,
+                    'filename': filename,
+                    'fingerprint': fingerprint,
+                    'size': size,
+                    'chunk_size': chunk_size,
+                    'total_chunks': (size + chunk_size - 1) // chunk_size,
+                    'started_at': time.time(),
+                }
+                with open(os.path.join(session, 'meta.json'), 'w', encoding='utf-8') as f:
+                    json.dump(meta, f)
+            else:
+                self._touch(upload_id)
+        return self.status(upload_id)
+
+    def _touch(self, upload_id):
+        try:
+            os.utime(os.path.join(self._session_dir(upload_id), 'meta.json'))
+        except OSError:
+            pass
+
+    def _expire(self):
+        """Remove sessions idle for longer than session_ttl; returns their ids"""
+        expired = []
+        cutoff = time.time() - self.session_ttl
+        for upload_id in os.listdir(self.root):
+            session = os.path.join(self.root, upload_id)
+            meta_path = os.path.join(session, 'meta.json')
+            try:
+                # A session without meta.json was never finished being created
+                last_active = os.path.getmtime(meta_path if os.path.exists(meta_path) else session)
+            except OSError:
+                continue
+            if last_active < cutoff:
+                shutil.rmtree(session, ignore_errors=True)
+                expired.append(upload_id)
+        return expired
+
+    def expire(self):
+        """Sweep idle sessions now"""
+        with self._lock:
+            return self._expire()
+
+    def _read_meta(self, upload_id):
+        try:
+            with open(os.path.join(self._session_dir(upload_id), 'meta.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _meta_or_404(self, upload_id):
+        meta = self._read_meta(upload_id)
+        if meta is None:
+            raise ChunkError('Upload not found', 404)
+        return meta
+
+    def status(self, upload_id):
+        """Session metadata plus the sorted list of verified chunk indices"""
+        meta = self._meta_or_404(upload_id)
+        chunk_dir = os.path.join(self._session_dir(upload_id), 'chunks')
+        try:
+            names = os.listdir(chunk_dir)
+        except FileNotFoundError:
+            raise ChunkError('Upload not found', 404)
+        received = sorted(int(name) for name in names if name.isdigit())
+        return dict(meta, received=received)
+
+    def write_chunk(self, upload_id, index, stream, content_length, expected_sha256=None):
+        """
+        Stream one chunk from `stream` to its offset and verify it.
+        Returns the chunk's SHA-256 hex digest.
+        """
+        meta = self._meta_or_404(upload_id)
+        if not 0 <= index < meta['total_chunks']:
+            raise ChunkError('Chunk index out of range')
+        offset = index * meta['chunk_size']
+        expected_length = min(meta['chunk_size'], meta['size'] - offset)
+        if content_length is not None and content_length != expected_length:
+            raise ChunkError(f'Chunk {index} must be {expected_length} bytes, got {content_length}')
+
+        session = self._session_dir(upload_id)
+        try:
+            sha256 = self._write_range(session, index, offset, expected_length, stream, expected_sha256)
+        except FileNotFoundError:
+            # The session was completed or aborted while (or before) this chunk arrived
+            raise ChunkError('Upload not found (already completed or aborted)', 404)
+        self._touch(upload_id)
+        return sha256
+
+    def _write_range(self, session, index, offset, expected_length, stream, expected_sha256):
+        """Stream a chunk into data.part at offset, verify it and record its marker"""
+        digest = hashlib.sha256()
+        written = 0
+        # Each chunk owns a disjoint byte range, so parallel writers never overlap
+        with open(os.path.join(session, 'data.part'), 'r+b') as f:
+            f.seek(offset)
+            while written < expected_length:
+                block = stream.read(min(STREAM_BLOCK_SIZE, expected_length - written))
+                if not block:
+                    break
+                f.write(block)
+                digest.update(block)
+                written += len(block)
+            # Flush to the OS before marking the chunk as received
+            f.flush()
+
+        if written != expected_length:
+            raise ChunkError(f'Chunk {index} incomplete: received {written} of {expected_length} bytes')
+        sha256 = digest.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != sha256:
+            raise ChunkError(f'Chunk {index} hash mismatch')
+
+        with open(os.path.join(session, 'chunks', str(index)), 'w', encoding='utf-8') as f:
+            f.write(sha256)
+        return sha256
+
+    def complete(self, upload_id, target_path):
+        """Move the assembled file to target_path once every chunk is present"""
+        status = self.status(upload_id)
+        missing = status['total_chunks'] - len(status['received'])
+        if missing:
+            raise ChunkError(f'{missing} chunk(s) missing', 409)
+        session = self._session_dir(upload_id)
+        try:
+            os.replace(os.path.join(session, 'data.part'), target_path)
+        except FileNotFoundError:
+            # Another request completed (or aborted) it first
+            raise ChunkError('Upload not found (already completed or aborted)', 404)
+        shutil.rmtree(session, ignore_errors=True)
+        return status
+
+    def abort(self, upload_id):
+        """Discard an upload and its partial data"""
+        self._meta_or_404(upload_id)
+        shutil.rmtree(self._session_dir(upload_id), ignore_errors=True)
@@ -0,0 +1,179 @@
+"""
+Configuration for PeopleCounter
+Default settings, JSON config loading and command line overrides
+"""
+
+import copy
+import json
+import os
+
+
+DEFAULT_CONFIG = {
+    'detector': {
+        # ultralytics | onnxruntime | opencv | stub
+        'backend': 'ultralytics',
+        'model': 'yolov8n.pt',
+        # ONNX model used by the onnxruntime and opencv backends
+        # (exported from `model` on first use when missing)
+        'onnx_model': 'yolov8n.onnx',
+        # INT8 dynamic quantization for the onnxruntime backend
+        'quantize': False,
+        'imgsz': 640,
+        'conf_threshold': 0.25,
+        'nms_threshold': 0.45,
+        'person_class': 0,
+        # Intra-op threads for ONNX Runtime (0 = runtime.threads / runtime default)
+        'threads': 0,
+        # Frames per detector call (inline pipeline)
+        'batch_size': 1,
+        # Tiled inference for large frames: overlapping tile_size x tile_size tiles
+        # (0 = off) detected as one batch or on a thread pool ('threads', 0 workers =
+        # one per core; onnxruntime and stub only), plus the whole frame for large
+        # people; merged with cross-tile NMS
+        'tiling': {
+            'tile_size': 0,
+            'overlap': 0.25,
+            'mode': 'batch',
+            'workers': 0,
+            'full_frame': True,
+        },
+    },
+    'video': {
+        # Frames are downscaled by this factor once, right after decode (0 < scale <= 1)
+        'processing_scale': 1.0,
+        # Process every n-th frame only; the frames in between are skipped without decoding
+        'detection_stride': 1,
+        # Run the detector on every k-th processed frame only; track boxes are
+        # propagated with Lucas-Kanade optical flow on the frames in between
+        'keyframe_interval': 1,
+        # Only process these windows of video time, e.g. ["0:10:00-0:25:00", [3600, 5400]]
+        # (seconds, MM:SS or HH:MM:SS; empty = the whole video). The gaps are seeked over
+        # and the tracks are reset at every window
+        'time_ranges': [],
+    },
+    'runtime': {
+        # Threads for OpenCV, PyTorch, ONNX Runtime and BLAS (0 = library defaults)
+        'threads': 0,
+    },
+    'pipeline': {
+        # inline: decode + detect in the main loop
+        # process: decoder and inference worker processes sharing a frame ring
+        'mode': 'inline',
+        'ring_slots': 8,
+    },
+    'scheduler': {
+        # Target latency per source frame in ms (0 = off), e.g. 40 to keep up with a
+        # 25 fps stream. When the loop falls behind, work is shed one step at a time:
+        # render every 2nd..max_render_every-th frame, lower detector.imgsz by
+        # imgsz_step down to min_imgsz, raise the detection stride up to max_stride
+        'target_ms': 0,
+        'max_render_every': 8,
+        'min_imgsz': 320,
+        'imgsz_step': 64,
+        'max_stride': 4,
+        # Processed frames per decision; below headroom * target_ms it steps back up
+        'window': 30,
+        'headroom': 0.6,
+    },
+    'checkpoint': {
+        # File for periodic checkpoints ('' disables them); main.py --resume continues from it
+        'path': '',
+        'interval_frames': 1000,
+    },
+    'tracker': {
+        'max_age': 30,
+        'min_hits': 3,
+        'iou_threshold': 0.3,
+        # dense: full IOU matrix; gated: spatial grid + per-component assignment
+        # (same matches and IDs, cheaper from ~200 people; dense is used below that)
+        'association': 'dense',
+    },
+    'counting': {
+        # 0.0 to 1.0 (percentage of frame height)
+        'line_position': 0.5,
+        # Margin for crossing detection (pixels)
+        'crossing_margin': 10,
+        # Optional extra geometry; when both are empty the single line above is used.
+        # lines: [{"name": "door", "points": [[x1, y1], [x2, y2]], "invert": false}]
+        # zones: [{"name": "shopfront", "polygon": [[x, y], ...]}]
+        'lines': [],
+        'zones': [],
+        # 'relative' (fractions of frame width/height) or 'pixels'
+        'units': 'relative',
+        # Count each track at most once per line
+        'count_once': True,
+    },
+    'analytics': {
+        # Occupancy heatmap cells across the frame width (rows follow the aspect ratio)
+        'heatmap_width': 48,
+        # Tracks closer than this to a counting line (fraction of frame height) dwell near it
+        'dwell_distance': 0.1,
+        # Longest dwellers listed in the report
+        'top_dwellers': 10,
+    },
+    'results': {
+        # SQLite database that finished jobs are written to ('' disables it)
+        'database': 'people_counter.db',
+        'camera': 'default',
+    },
+}
+
+# Loaded automatically by main.py when present
+DEFAULT_CONFIG_PATH = 'config.json'
+
+# Host profile written by autotune.py, applied on top of the config file
+DEFAULT_PROFILE_PATH = 'profile.json'
+
+
+def merge_config(base, overrides):
+    """Recursively merge `overrides` into a copy of `base`"""
+    merged = copy.deepcopy(base)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def load_config(path=None, overrides=None, profile=None):
+    """
+    Build the effective configuration: defaults <- JSON file <- profile <- overrides.
+    If no path is given, config.json is used when it exists.
+    """
+    config = DEFAULT_CONFIG
+    if path is None and os.path.exists(DEFAULT_CONFIG_PATH):
+        path = DEFAULT_CONFIG_PATH
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = merge_config(config, json.load(f))
+    if profile:
+        config = merge_config(config, load_profile(profile))
+    return merge_config(config, overrides)
+
+
+def load_profile(path):
+    """Config overrides stored in a host profile written by autotune.py"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('config', {})
+
+
+def save_profile(path, overrides, info=None):
+    """Write a host profile: config overrides plus how they were measured"""
+    data = dict(info or {})
+    data['config'] = overrides
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def set_path(config, dotted_key, value):
+    """Set a nested value from a dotted key, e.g. 'detector.backend'"""
+    section = config
+    parts = dotted_key.split('.')
+    for part in parts[:-1]:
+        section = section.setdefault(part, {})
+    section[parts[-1]] = value
+    return config
@@ -0,0 +1,246 @@
+"""
+Counting Geometry for PeopleCounter
+Multiple counting lines and polygon zones per camera. All active tracks are
+tested against all lines (segment crossing) and all zones (membership) with
+NumPy array operations instead of a Python loop per track.
+
+Direction semantics: a line is the directed segment p1 -> p2. Crossing from
+its left side to its right side (as seen on screen, y pointing down) is an
+ENTRY, the opposite is an EXIT. `invert: true` swaps the two. A horizontal
+line drawn left-to-right therefore counts downward movement as entries.
+"""
+
+import numpy as np
+
+
+class CountingLine:
+    """A directed counting segment with its own entry/exit counters"""
+
+    def __init__(self, name, p1, p2, invert=False):
+        self.name = name
+        self.p1 = (float(p1[0]), float(p1[1]))
+        self.p2 = (float(p2[0]), float(p2[1]))
+        self.invert = invert
+        self.entries = 0
+        self.exits = 0
+
+
+class CountingZone:
+    """A polygon area; tracks entering and leaving it are counted"""
+
+    def __init__(self, name, polygon):
+        if len(polygon) < 3:
+            raise ValueError(f"Zone '{name}' needs at least 3 points")
+        self.name = name
+        self.polygon = np.asarray(polygon, dtype=np.float64)
+        self.entries = 0
+        self.exits = 0
+        self.occupancy = 0
+
+
+def _cross(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+
+def line_sides(points, line_starts, line_ends):
+    """
+    Side of every line segment start->end (L, 2) each point (T, 2) is on, as an
+    int8 matrix (T, L): +1 right, -1 left, 0 exactly on the line
+    """
+    px, py = points[:, 0:1], points[:, 1:2]
+    ax, ay = line_starts[None, :, 0], line_starts[None, :, 1]
+    bx, by = line_ends[None, :, 0], line_ends[None, :, 1]
+    return np.sign(_cross(bx - ax, by - ay, px - ax, py - ay)).astype(np.int8)
+
+
+def segment_crossings(prev_points, curr_points, line_starts, line_ends, prev_sides=None):
+    """
+    Test every movement segment prev->curr (T, 2) against every line
+    segment start->end (L, 2). Returns an int8 matrix (T, L):
+      +1 crossed from the left to the right side of the line
+      -1 crossed from the right to the left side
+       0 no crossing
+    A point exactly on the line has no side. prev_sides (T, L) is the last
+    side each track was strictly on (see line_sides, 0 if never off the line)
+    and defaults to the side of prev_points. With it, a track that lands on
+    the line and walks on is counted once, on the step that reaches the other
+    side, and touching the line and turning back never counts, from either side.
+    """
+    px, py = prev_points[:, 0:1], prev_points[:, 1:2]
+    cx, cy = curr_points[:, 0:1], curr_points[:, 1:2]
+    ax, ay = line_starts[None, :, 0], line_starts[None, :, 1]
+    bx, by = line_ends[None, :, 0], line_ends[None, :, 1]
+
+    # Side of the line before the movement and for the current position
+    if prev_sides is None:
+        prev_sides = line_sides(prev_points, line_starts, line_ends)
+    curr_sides = line_sides(curr_points, line_starts, line_ends)
+    # Side of the movement segment for both line endpoints
+    side_a = _cross(cx - px, cy - py, ax - px, ay - py)
+    side_b = _cross(cx - px, cy - py, bx - px, by - py)
+
+    crossed = (prev_sides * curr_sides < 0) & (side_a * side_b < 0)
+    return np.where(crossed, curr_sides, 0).astype(np.int8)
+
+
+def points_in_polygon(points, polygon):
+    """Even-odd rule membership of points (T, 2) in a polygon (V, 2), vectorized over both"""
+    x, y = points[:, 0:1], points[:, 1:2]
+    x1, y1 = polygon[None, :, 0], polygon[None, :, 1]
+    rolled = np.roll(polygon, -1, axis=0)
+    x2, y2 = rolled[None, :, 0], rolled[None, :, 1]
+
+    straddles = (y1 > y) != (y2 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    hits = straddles & (x < x_cross)
+    return np.count_nonzero(hits, axis=1) % 2 == 1
+
+
+class CountingGeometry:
+    """
+    Per-camera set of counting lines and zones plus the per-track state
+    (previous centroid, last side of each line it was strictly on, which lines
+    it was already counted on, which zones it is inside) kept in arrays sorted
+    by track ID.
+    """
+
+    def __init__(self, lines, zones=(), count_once=True):
+        self.lines = list(lines)
+        self.zones = list(zones)
+        self.count_once = count_once
+        self._line_starts = np.array([l.p1 for l in self.lines], dtype=np.float64).reshape(-1, 2)
+        self._line_ends = np.array([l.p2 for l in self.lines], dtype=np.float64).reshape(-1, 2)
+        self._line_sign = np.array([-1 if l.invert else 1 for l in self.lines], dtype=np.int8)
+
+        # Per-track state, rows sorted by track ID
+        self._ids = np.empty(0, dtype=np.int64)
+        self._prev = np.empty((0, 2), dtype=np.float64)
+        self._sides = np.zeros((0, len(self.lines)), dtype=np.int8)
+        self._counted = np.zeros((0, len(self.lines)), dtype=bool)
+        self._inside = np.zeros((0, len(self.zones)), dtype=bool)
+
+    @classmethod
+    def from_config(cls, counting_config, frame_width, frame_height):
+        """
+        Build the geometry from config['counting']. Without explicit `lines`
+        and `zones` a single horizontal line at `line_position` is used.
+        Coordinates are fractions of the frame size unless `units` is 'pixels'.
+        """
+        if counting_config.get('units', 'relative') == 'pixels':
+            sx, sy = 1.0, 1.0
+        else:
+            sx, sy = float(frame_width), float(frame_height)
+
+        def scale(point):
+            return (point[0] * sx, point[1] * sy)
+
+        lines = [CountingLine(spec.get('name', f'line{i + 1}'), scale(spec['points'][0]),
+                              scale(spec['points'][1]), spec.get('invert', False))
+                 for i, spec in enumerate(counting_config.get('lines') or [])]
+        zones = [CountingZone(spec.get('name', f'zone{i + 1}'), [scale(p) for p in spec['polygon']])
+                 for i, spec in enumerate(counting_config.get('zones') or [])]
+
+        if not lines and not zones:
+            counting_line_y = int(frame_height * counting_config['line_position'])
+            lines = [CountingLine('main', (0, counting_line_y), (frame_width, counting_line_y))]
+        return cls(lines, zones, counting_config.get('count_once', True))
+
+    @property
+    def is_single_horizontal_line(self):
+        """True for the classic single full-width line (drawn with zone labels)"""
+        return (len(self.lines) == 1 and not self.zones and self.lines[0].p1[1] == self.lines[0].p2[1]
+                and self.lines[0].p1[0] == 0)
+
+    def update(self, track_ids, centroids):
+        """
+        Advance all active tracks to their new centroids (source pixels).
+        Tracks not listed are forgotten, as in the original per-ID dict.
+        Returns a list of events (kind, name, track_id, event) where kind is
+        'line' or 'zone' and event is 'entry' or 'exit'.
+        """
+        ids = np.asarray(track_ids, dtype=np.int64).reshape(-1)
+        points = np.asarray(centroids, dtype=np.float64).reshape(-1, 2)
+        order = np.argsort(ids, kind='stable')
+        ids, points = ids[order], points[order]
+
+        # Look up each track's previous state; new tracks start at their current point
+        pos = np.searchsorted(self._ids, ids)
+        pos_clipped = np.minimum(pos, max(len(self._ids) - 1, 0))
+        known = (pos < len(self._ids)) & (self._ids[pos_clipped] == ids) if len(self._ids) else np.zeros(len(ids), bool)
+
+        prev = points.copy()
+        prev[known] = self._prev[pos_clipped[known]]
+        counted = np.zeros((len(ids), len(self.lines)), dtype=bool)
+        counted[known] = self._counted[pos_clipped[known]]
+        sides = line_sides(points, self._line_starts, self._line_ends)
+        prev_sides = sides.copy()
+        prev_sides[known] = self._sides[pos_clipped[known]]
+        was_inside = np.zeros((len(ids), len(self.zones)), dtype=bool)
+
+        events = []
+        if self.lines and len(ids):
+            crossings = segment_crossings(prev, points, self._line_starts, self._line_ends,
+                                          prev_sides) * self._line_sign
+            if self.count_once:
+                crossings[counted] = 0
+            track_idx, line_idx = np.nonzero(crossings)
+            for t, l in zip(track_idx, line_idx):
+                line = self.lines[l]
+                if crossings[t, l] > 0:
+                    line.entries += 1
+                    event = 'entry'
+                else:
+                    line.exits += 1
+                    event = 'exit'
+                counted[t, l] = True
+                events.append(('line', line.name, int(ids[t]), event))
+
+        if self.zones:
+            inside = np.zeros((len(ids), len(self.zones)), dtype=bool)
+            for z, zone in enumerate(self.zones):
+                if len(ids):
+                    inside[:, z] = points_in_polygon(points, zone.polygon)
+            # New tracks take their first observed membership without an event
+            was_inside[known] = self._inside[pos_clipped[known]]
+            was_inside[~known] = inside[~known]
+            track_idx, zone_idx = np.nonzero(inside != was_inside)
+            for t, z in zip(track_idx, zone_idx):
+                zone = self.zones[z]
+                if inside[t, z]:
+                    zone.entries += 1
+                    event = 'entry'
+                else:
+                    zone.exits += 1
+                    event = 'exit'
+                events.append(('zone', zone.name, int(ids[t]), event))
+            for z, zone in enumerate(self.zones):
+                zone.occupancy = int(np.count_nonzero(inside[:, z]))
+        else:
+            inside = was_inside
+
+        # A track on a line keeps the side it was on before
+        sides = np.where(sides != 0, sides, prev_sides)
+        self._ids, self._prev, self._sides = ids, points, sides
+        self._counted, self._inside = counted, inside
+        return events
+
+    def reset_tracks(self):
+        """Forget all per-track state (counters are kept), e.g. before a jump in the video"""
+        self._ids = np.empty(0, dtype=np.int64)
+        self._prev = np.empty((0, 2), dtype=np.float64)
+        self._sides = np.zeros((0, len(self.lines)), dtype=np.int8)
+        self._counted = np.zeros((0, len(self.lines)), dtype=bool)
+        self._inside = np.zeros((0, len(self.zones)), dtype=bool)
+
+    def totals(self):
+        """Total entries and exits over all counting lines"""
+        return sum(l.entries for l in self.lines), sum(l.exits for l in self.lines)
+
+    def summary(self):
+        """Per-line and per-zone counters for the report"""
+        return {
+            'lines': [{'name': l.name, 'entries': l.entries, 'exits': l.exits} for l in self.lines],
+            'zones': [{'name': z.name, 'entries': z.entries, 'exits': z.exits, 'occupancy': z.occupancy}
+                      for z in self.zones],
+        }
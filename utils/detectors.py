@@ -0,0 +1,352 @@
+"""
+Person Detectors for PeopleCounter
+Interchangeable detection backends behind a common interface. Every backend
+returns detections as a numpy array [[x1, y1, x2, y2, confidence], ...] in
+source frame pixel coordinates, ready for Sort.update.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+
+EMPTY_DETECTIONS = np.empty((0, 5))
+
+
+class Detector:
+    """Base class for person detectors"""
+
+    name = 'base'
+    # Whether `imgsz` may be changed between calls (used by the latency scheduler)
+    resizable = False
+    # Whether detect() may be called from several threads at once (tiling 'threads' mode)
+    thread_safe = False
+
+    def detect(self, frame):
+        """Detect persons in a BGR frame"""
+        raise NotImplementedError
+
+    def detect_batch(self, frames):
+        """Detect persons in several frames (backends may override with real batching)"""
+        return [self.detect(frame) for frame in frames]
+
+
+class UltralyticsDetector(Detector):
+    """PyTorch YOLOv8 through the ultralytics package"""
+
+    name = 'ultralytics'
+    resizable = True
+
+    def __init__(self, model='yolov8n.pt', imgsz=640, conf_threshold=0.25, person_class=0, **_):
+        from ultralytics import YOLO
+        self.model = YOLO(model)
+        self.imgsz = imgsz
+        self.conf_threshold = conf_threshold
+        self.person_class = person_class
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        results = self.model(frames, imgsz=self.imgsz, conf=self.conf_threshold,
+                             classes=[self.person_class], verbose=False)
+        return [self._to_array(result) for result in results]
+
+    def _to_array(self, result):
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return EMPTY_DETECTIONS
+        xyxy = boxes.xyxy.cpu().numpy()
+        conf = boxes.conf.cpu().numpy()
+        # Filter only persons (class 0)
+        keep = boxes.cls.cpu().numpy().astype(int) == self.person_class
+        return np.concatenate([xyxy[keep], conf[keep, None]], axis=1).astype(np.float64)
+
+
+def letterbox(frame, size):
+    """
+    Resize keeping aspect ratio and pad to a square `size` input.
+    Returns (image, scale, (pad_x, pad_y)) to map detections back.
+    """
+    height, width = frame.shape[:2]
+    scale = min(size / width, size / height)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    padded = np.full((size, size, 3), 114, dtype=np.uint8)
+    padded[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized
+    return padded, scale, (pad_x, pad_y)
+
+
+def decode_yolov8(output, scale, pad, conf_threshold, nms_threshold, person_class=0):
+    """
+    Convert raw YOLOv8 output of shape (1, 4 + classes, anchors) into person
+    detections in source frame coordinates.
+    """
+    predictions = np.squeeze(output, axis=0).T
+    scores = predictions[:, 4 + person_class]
+    keep = scores >= conf_threshold
+    if not np.any(keep):
+        return EMPTY_DETECTIONS
+    predictions, scores = predictions[keep], scores[keep]
+
+    # (cx, cy, w, h) in letterboxed input -> (x1, y1, x2, y2) in source frame
+    cx, cy, w, h = predictions[:, 0], predictions[:, 1], predictions[:, 2], predictions[:, 3]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    boxes -= np.array([pad[0], pad[1], pad[0], pad[1]], dtype=boxes.dtype)
+    boxes /= scale
+
+    indices = cv2.dnn.NMSBoxes(np.column_stack([boxes[:, :2], boxes[:, 2:] - boxes[:, :2]]).tolist(),
+                               scores.tolist(), conf_threshold, nms_threshold)
+    if len(indices) == 0:
+        return EMPTY_DETECTIONS
+    indices = np.asarray(indices).reshape(-1)
+    return np.concatenate([boxes[indices], scores[indices, None]], axis=1).astype(np.float64)
+
+
+def ensure_onnx_model(onnx_model, source_model, imgsz):
+    """Export the ultralytics model to ONNX the first time it is needed"""
+    if os.path.exists(onnx_model):
+        return onnx_model
+    from ultralytics import YOLO
+    print(f"Exporting {source_model} to ONNX (one-time)...")
+    exported = YOLO(source_model).export(format='onnx', imgsz=imgsz, dynamic=True)
+    if os.path.abspath(exported) != os.path.abspath(onnx_model):
+        os.replace(exported, onnx_model)
+    return onnx_model
+
+
+def quantize_onnx_model(onnx_model):
+    """Create (once) an INT8 dynamically quantized copy of an ONNX model"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    root, ext = os.path.splitext(onnx_model)
+    quantized = f'{root}.int8{ext}'
+    if not os.path.exists(quantized):
+        print(f"Quantizing {onnx_model} to INT8 (one-time)...")
+        quantize_dynamic(onnx_model, quantized, weight_type=QuantType.QUInt8)
+    return quantized
+
+
+class OnnxRuntimeDetector(Detector):
+    """YOLOv8 exported to ONNX, executed with ONNX Runtime on CPU"""
+
+    name = 'onnxruntime'
+    # InferenceSession.run is safe to call concurrently
+    thread_safe = True
+
+    def __init__(self, model='yolov8n.pt', onnx_model='yolov8n.onnx', quantize=False, imgsz=640,
+                 conf_threshold=0.25, nms_threshold=0.45, person_class=0, threads=0, **_):
+        import onnxruntime as ort
+        path = ensure_onnx_model(onnx_model, model, imgsz)
+        if quantize:
+            path = quantize_onnx_model(path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        # Models exported with dynamic axes have symbolic (str) height and width
+        self.resizable = not isinstance(self.session.get_inputs()[0].shape[2], int)
+        self.imgsz = imgsz
+        self.conf_threshold = conf_threshold
+        self.nms_threshold = nms_threshold
+        self.person_class = person_class
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        inputs, transforms = [], []
+        for frame in frames:
+            image, scale, pad = letterbox(frame, self.imgsz)
+            inputs.append(image)
+            transforms.append((scale, pad))
+        # BGR HWC uint8 -> RGB NCHW float32 in [0, 1]
+        blob = np.ascontiguousarray(np.stack(inputs)[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+        outputs = self.session.run(None, {self.input_name: blob})[0]
+        return [decode_yolov8(outputs[i:i + 1], scale, pad, self.conf_threshold,
+                              self.nms_threshold, self.person_class)
+                for i, (scale, pad) in enumerate(transforms)]
+
+
+class OpenCVDnnDetector(Detector):
+    """YOLOv8 ONNX model executed with OpenCV's DNN module (no extra dependencies)"""
+
+    name = 'opencv'
+
+    def __init__(self, model='yolov8n.pt', onnx_model='yolov8n.onnx', imgsz=640,
+                 conf_threshold=0.25, nms_threshold=0.45, person_class=0, **_):
+        path = ensure_onnx_model(onnx_model, model, imgsz)
+        self.net = cv2.dnn.readNetFromONNX(path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.imgsz = imgsz
+        self.conf_threshold = conf_threshold
+        self.nms_threshold = nms_threshold
+        self.person_class = person_class
+
+    def detect(self, frame):
+        image, scale, pad = letterbox(frame, self.imgsz)
+        blob = cv2.dnn.blobFromImage(image, 1 / 255.0, (self.imgsz, self.imgsz), swapRB=True, crop=False)
+        self.net.setInput(blob)
+        output = self.net.forward()
+        return decode_yolov8(output, scale, pad, self.conf_threshold, self.nms_threshold, self.person_class)
+
+
+class StubDetector(Detector):
+    """
+    Deterministic detector for tests and benchmarks: reports every bright
+    blob on a dark background (as produced by the synthetic video generator)
+    as a person. Needs no model weights.
+    """
+
+    name = 'stub'
+    thread_safe = True
+
+    def __init__(self, threshold=127, min_area=100, confidence=0.9, **_):
+        self.threshold = threshold
+        self.min_area = min_area
+        self.confidence = confidence
+
+    def detect(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        _, mask = cv2.threshold(gray, self.threshold, 255, cv2.THRESH_BINARY)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        boxes = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h >= self.min_area:
+                boxes.append([x, y, x + w, y + h, self.confidence])
+        if not boxes:
+            return EMPTY_DETECTIONS
+        # Sort for a stable order independent of contour traversal
+        boxes.sort()
+        return np.array(boxes, dtype=np.float64)
+
+
+def tile_origins(length, tile_size, overlap):
+    """Start offsets of overlapping tiles covering [0, length), spread evenly, the last one flush with the end"""
+    if length <= tile_size:
+        return [0]
+    step = max(1, int(tile_size * (1.0 - overlap)))
+    count = int(np.ceil((length - tile_size) / step)) + 1
+    return [int(round(v)) for v in np.linspace(0, length - tile_size, count)]
+
+
+def merge_tiled_detections(detections, iou_threshold=0.45, containment_threshold=0.8):
+    """
+    Cross-tile NMS. Greedy by score (larger box first on ties): a box is
+    dropped if it overlaps a kept box by more than iou_threshold IOU, or if
+    more than containment_threshold of its own area lies inside a kept box
+    (a person cut off at a tile border next to the complete detection).
+    """
+    if len(detections) <= 1:
+        return detections
+    x1, y1, x2, y2, scores = (detections[:, i] for i in range(5))
+    areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    order = np.lexsort((-areas, -scores))
+    keep = []
+    while len(order):
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        h = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = w * h
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        contained = inter / np.maximum(areas[rest], 1e-9)
+        order = rest[(iou <= iou_threshold) & (contained <= containment_threshold)]
+    return detections[np.sort(keep)]
+
+
+class TiledDetector(Detector):
+    """
+    Runs another detector on overlapping tiles of the frame (plus, optionally,
+    the whole frame for people larger than a tile) and merges the results with
+    cross-tile NMS. Small, distant people cover more of the model input in a
+    tile than in the downscaled full frame. Tiles are detected as one batch
+    ('batch') or concurrently on a thread pool ('threads'). All pool threads
+    share the one detector, so 'threads' needs a backend that is safe to call
+    concurrently (onnxruntime, stub); an OpenCV DNN net or an ultralytics
+    model keeps per-call state and is rejected.
+    """
+
+    name = 'tiled'
+
+    def __init__(self, detector, tile_size=640, overlap=0.25, mode='batch', workers=0, full_frame=True,
+                 nms_threshold=0.45):
+        if mode not in ('batch', 'threads'):
+            raise ValueError(f"tiling mode must be 'batch' or 'threads', got {mode!r}")
+        if mode == 'threads' and not detector.thread_safe:
+            raise ValueError(f"tiling mode 'threads' needs a thread-safe backend, "
+                             f"'{detector.name}' is not (use mode 'batch')")
+        self.detector = detector
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.mode = mode
+        self.full_frame = full_frame
+        self.nms_threshold = nms_threshold
+        self.pool = None
+        if mode == 'threads':
+            self.pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+
+    def tiles(self, frame):
+        """(x, y, tile view) for every tile of the frame"""
+        height, width = frame.shape[:2]
+        return [(x, y, frame[y:y + self.tile_size, x:x + self.tile_size])
+                for y in tile_origins(height, self.tile_size, self.overlap)
+                for x in tile_origins(width, self.tile_size, self.overlap)]
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        # All tiles of all frames go through the inner detector in one call
+        images, owners = [], []
+        for f, frame in enumerate(frames):
+            tiles = self.tiles(frame)
+            if self.full_frame and len(tiles) > 1:
+                tiles.append((0, 0, frame))
+            for x, y, image in tiles:
+                images.append(image)
+                owners.append((f, x, y))
+        if self.pool is not None:
+            results = list(self.pool.map(self.detector.detect, images))
+        else:
+            results = self.detector.detect_batch(images)
+
+        per_frame = [[] for _ in frames]
+        for (f, x, y), detections in zip(owners, results):
+            if len(detections):
+                per_frame[f].append(detections + np.array([x, y, x, y, 0], dtype=np.float64))
+        return [merge_tiled_detections(np.concatenate(parts), self.nms_threshold) if parts else EMPTY_DETECTIONS
+                for parts in per_frame]
+
+
+DETECTOR_BACKENDS = {
+    UltralyticsDetector.name: UltralyticsDetector,
+    OnnxRuntimeDetector.name: OnnxRuntimeDetector,
+    OpenCVDnnDetector.name: OpenCVDnnDetector,
+    StubDetector.name: StubDetector,
+}
+
+
+def create_detector(detector_config):
+    """
+    Instantiate the backend named in config['detector']['backend'], wrapped
+    in a TiledDetector when detector.tiling.tile_size is set
+    """
+    options = dict(detector_config)
+    backend = options.pop('backend', 'ultralytics')
+    if backend not in DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown detector backend '{backend}'. "
+                         f"Available: {', '.join(sorted(DETECTOR_BACKENDS))}")
+    tiling = options.pop('tiling', None) or {}
+    detector = DETECTOR_BACKENDS[backend](**options)
+    if tiling.get('tile_size'):
+        detector = TiledDetector(detector, nms_threshold=options.get('nms_threshold', 0.45), **tiling)
+    return detector
@@ -0,0 +1,217 @@
+"""
+Job Manager for PeopleCounter
+Queues video processing jobs and runs them as subprocesses with a
+concurrency limit. Queued or running jobs can be cancelled.
+"""
+
+import os
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+
+
+# Launch flags for job processes. On Windows each job gets its own process
+# group so it can be sent CTRL_BREAK_EVENT: Popen.terminate() there is
+# TerminateProcess, which skips the job's cleanup entirely.
+JOB_CREATION_FLAGS = getattr(subprocess, 'CREATE_NEW_PROCESS_GROUP', 0)
+
+
+def request_stop(process):
+    """Ask a job process to exit cleanly: SIGTERM on POSIX, CTRL_BREAK_EVENT on Windows"""
+    if os.name == 'nt':
+        process.send_signal(signal.CTRL_BREAK_EVENT)
+    else:
+        process.terminate()
+
+
+class Job:
+    """A single video processing request"""
+
+    def __init__(self, job_id, params):
+        self.id = job_id
+        self.params = params
+        self.status = 'queued'
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.returncode = None
+        self.process = None
+        self.error = None
+        # Running job that was asked to stop: killed if still alive after this time
+        self.kill_deadline = None
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'returncode': self.returncode,
+            'error': self.error,
+            'params': self.params,
+        }
+
+
+class JobManager:
+    """
+    Runs queued jobs through `launcher(job) -> subprocess.Popen` (started
+    with creationflags=JOB_CREATION_FLAGS), keeping at most `max_concurrent`
+    processes alive. A background thread polls running processes and starts
+    the next queued job when a slot frees up. on_exit(job), if given, is
+    called once a job has ended: its process was reaped, or it was cancelled
+    before it started. It runs with the manager's lock held, so it must not
+    call back into the manager.
+    """
+
+    def __init__(self, launcher, max_concurrent=1, poll_interval=0.5, history_size=50, kill_timeout=10.0,
+                 on_exit=None):
+        self.launcher = launcher
+        self.on_exit = on_exit
+        self.max_concurrent = max_concurrent
+        self.poll_interval = poll_interval
+        self.history_size = history_size
+        self.kill_timeout = kill_timeout
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._queue = deque()
+        self._running = []
+        self._monitor = None
+
+    def submit(self, **params):
+        """Queue a new job and return it"""
+        job = Job(uuid.uuid4().hex[:12], params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._dispatch_locked()
+        self._ensure_monitor()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. A queued job is dropped from the queue; a running job is
+        asked to stop (see request_stop), and killed if it has not exited
+        after kill_timeout seconds. Returns the job, or None if it does not exist.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in ('queued', 'running'):
+                return job
+            if job.status == 'queued':
+                self._queue.remove(job)
+                job.finished = time.time()
+                job.status = 'cancelled'
+                self._ended_locked(job)
+            else:
+                request_stop(job.process)
+                job.kill_deadline = time.time() + self.kill_timeout
+                job.status = 'cancelled'
+        return job
+
+    def shutdown(self, timeout=30.0):
+        """
+        Stop for a server shutdown: queued jobs are cancelled, running jobs get
+        `timeout` seconds to finish and are cancelled after that (killed
+        kill_timeout seconds later). Returns the jobs that had to be stopped.
+        """
+        with self._lock:
+            queued = list(self._queue)
+        stopped = [self.cancel(job.id) for job in queued]
+        deadline = time.time() + timeout
+        while self.active_count() and time.time() < deadline:
+            time.sleep(self.poll_interval)
+        with self._lock:
+            running = list(self._running)
+        stopped += [self.cancel(job.id) for job in running]
+        # The monitor thread reaps (and if needed kills) them
+        deadline = time.time() + self.kill_timeout + 2 * self.poll_interval
+        while self.active_count() and time.time() < deadline:
+            time.sleep(self.poll_interval)
+        return stopped
+
+    def queue_depth(self):
+        with self._lock:
+            return len(self._queue)
+
+    def active_count(self):
+        with self._lock:
+            return len(self._running)
+
+    def _ensure_monitor(self):
+        if self._monitor is None or not self._monitor.is_alive():
+            self._monitor = threading.Thread(target=self._monitor_loop, daemon=True)
+            self._monitor.start()
+
+    def _monitor_loop(self):
+        while True:
+            with self._lock:
+                self._reap_locked()
+                self._dispatch_locked()
+                idle = not self._running and not self._queue
+            if idle:
+                return
+            time.sleep(self.poll_interval)
+
+    def _reap_locked(self):
+        for job in list(self._running):
+            returncode = job.process.poll()
+            if returncode is None:
+                if job.kill_deadline is not None and time.time() > job.kill_deadline:
+                    job.process.kill()
+                continue
+            job.returncode = returncode
+            job.finished = time.time()
+            if job.status == 'running':
+                job.status = 'finished' if returncode == 0 else 'failed'
+            self._running.remove(job)
+            self._ended_locked(job)
+        self._trim_history_locked()
+
+    def _ended_locked(self, job):
+        if self.on_exit is None:
+            return
+        try:
+            self.on_exit(job)
+        except Exception as e:
+            print(f"Warning: cleanup of job {job.id} failed: {e}")
+
+    def _dispatch_locked(self):
+        while self._queue and len(self._running) < self.max_concurrent:
+            job = self._queue.popleft()
+            try:
+                job.process = self.launcher(job)
+            except Exception as e:
+                job.status = 'failed'
+                job.error = str(e)
+                job.finished = time.time()
+                continue
+            job.status = 'running'
+            job.started = time.time()
+            self._running.append(job)
+
+    def _trim_history_locked(self):
+        done = [j for j in self._jobs.values() if j.finished is not None]
+        if len(done) <= self.history_size:
+            return
+        done.sort(key=lambda j: j.finished)
+        for job in done[:len(done) - self.history_size]:
+            del self._jobs[job.id]
+
+
+def job_dir(base_folder, job_id):
+    """Working directory for a job's metrics and intermediate files"""
+    path = os.path.join(base_folder, job_id)
+    os.makedirs(path, exist_ok=True)
+    return path
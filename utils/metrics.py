@@ -0,0 +1,237 @@
+"""
+Metrics for PeopleCounter
+Lightweight counters, gauges and histograms rendered in the Prometheus text
+exposition format, plus a snapshot writer used by processing jobs.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+
+
+# Detector latency buckets in seconds (YOLOv8n on CPU is typically 20-200ms)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5)
+
+# Upload duration buckets in seconds
+UPLOAD_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class _Metric:
+    """Base class: a named metric with optional labels, safe to update from many threads"""
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(key)} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed distribution of observations"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = new_histogram_state(self.buckets)
+            observe_histogram_state(state, value)
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = [(key, dict(state, counts=list(state['counts']))) for key, state in self._values.items()]
+        for key, state in items:
+            lines.extend(render_histogram_state(self.name, key, state))
+        return lines
+
+
+def new_histogram_state(buckets):
+    """Plain-dict histogram state so it can be serialised to JSON"""
+    return {'buckets': list(buckets), 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+
+
+def observe_histogram_state(state, value):
+    buckets = state['buckets']
+    counts = state['counts']
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            counts[i] += 1
+            break
+    state['sum'] += value
+    state['count'] += 1
+
+
+def render_histogram_state(name, label_key, state):
+    """Render one histogram (non-cumulative bucket counts) as exposition lines"""
+    lines = []
+    cumulative = 0
+    for bound, count in zip(state['buckets'], state['counts']):
+        cumulative += count
+        labels = _format_labels(label_key + (('le', _format_value(float(bound))),))
+        lines.append(f'{name}_bucket{labels} {cumulative}')
+    labels = _format_labels(label_key + (('le', '+Inf'),))
+    lines.append(f'{name}_bucket{labels} {state["count"]}')
+    lines.append(f'{name}_sum{_format_labels(label_key)} {_format_value(float(state["sum"]))}')
+    lines.append(f'{name}_count{_format_labels(label_key)} {state["count"]}')
+    return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics plus optional collector callbacks evaluated at scrape time"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        """Register a callable returning a list of exposition lines"""
+        self._collectors.append(collector)
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+class JobMetricsWriter:
+    """
+    Collects per-job processing metrics inside main.py and periodically writes
+    a JSON snapshot that the web server reads when /metrics is scraped.
+    Updates are plain attribute arithmetic; the file is written at most once
+    per `flush_interval` seconds.
+    """
+
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.started = time.time()
+        self._last_flush = 0.0
+        self.data = {
+            'frames_processed': 0,
+            'fps': 0.0,
+            'entries': 0,
+            'exits': 0,
+            'detector_latency': new_histogram_state(LATENCY_BUCKETS),
+            'updated': self.started,
+        }
+
+    def frame_done(self):
+        self.data['frames_processed'] += 1
+        self.maybe_flush()
+
+    def observe_detector(self, seconds):
+        observe_histogram_state(self.data['detector_latency'], seconds)
+
+    def set_counts(self, entries, exits):
+        self.data['entries'] = entries
+        self.data['exits'] = exits
+
+    def maybe_flush(self):
+        if not self.path:
+            return
+        now = time.time()
+        if now - self._last_flush >= self.flush_interval:
+            self.flush(now)
+
+    def flush(self, now=None):
+        if not self.path:
+            return
+        now = now or time.time()
+        elapsed = max(now - self.started, 1e-6)
+        self.data['fps'] = self.data['frames_processed'] / elapsed
+        self.data['updated'] = now
+        self._last_flush = now
+        # Write to a temp file and rename so readers never see a partial snapshot
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+
+def read_job_metrics(path):
+    """Load a job metrics snapshot, or None if it does not exist yet"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
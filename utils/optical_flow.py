@@ -0,0 +1,99 @@
+"""
+Optical-Flow Propagation for PeopleCounter
+Between detector keyframes, the boxes of the current tracks are moved with
+sparse Lucas-Kanade optical flow and fed to SORT as pseudo-detections.
+"""
+
+import cv2
+import numpy as np
+
+from utils.detectors import EMPTY_DETECTIONS
+
+
+def is_keyframe(frame_index, stride=1, interval=1):
+    """
+    Whether the detector runs on this (1-based) frame: every `interval`-th
+    processed frame, where every `stride`-th source frame is processed.
+    """
+    return ((frame_index - 1) // max(1, stride)) % max(1, interval) == 0
+
+
+class FlowPropagator:
+    """
+    Tracks corner features inside each box from the previous processed frame
+    to the current one (pyramidal LK, forward-backward checked) and shifts the
+    box by the median feature displacement. Boxes with too few reliable
+    features are dropped, so their tracks coast on the Kalman prediction.
+    """
+
+    def __init__(self, max_points=20, min_points=2, win_size=15, max_level=2, max_error=1.0, confidence=0.5):
+        self.max_points = max_points
+        self.min_points = min_points
+        self.lk_params = dict(winSize=(win_size, win_size), maxLevel=max_level,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        self.max_error = max_error
+        self.confidence = confidence
+        self.prev_gray = None
+
+    @staticmethod
+    def to_gray(frame):
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+    def reset(self, frame):
+        """Remember a (processing space) frame as the origin of the next propagation"""
+        self.prev_gray = self.to_gray(frame)
+
+    def propagate(self, frame, boxes):
+        """
+        Move boxes ([[x1, y1, x2, y2], ...] on the previous frame) onto `frame`.
+        Returns pseudo-detections [[x1, y1, x2, y2, confidence], ...] for SORT.
+        """
+        gray = self.to_gray(frame)
+        prev_gray, self.prev_gray = self.prev_gray, gray
+        if prev_gray is None or len(boxes) == 0:
+            return EMPTY_DETECTIONS
+
+        points, owners = self._features(prev_gray, boxes)
+        if len(points) == 0:
+            return EMPTY_DETECTIONS
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None, **self.lk_params)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, moved, None, **self.lk_params)
+        error = np.linalg.norm((back - points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < self.max_error)
+
+        displacement = (moved - points).reshape(-1, 2)[good]
+        owners = owners[good]
+        height, width = gray.shape[:2]
+        detections = []
+        for i in np.unique(owners):
+            shift = displacement[owners == i]
+            if len(shift) < self.min_points:
+                continue
+            dx, dy = np.median(shift, axis=0)
+            x1, y1, x2, y2 = boxes[i][:4]
+            detections.append([max(0.0, x1 + dx), max(0.0, y1 + dy), min(width, x2 + dx), min(height, y2 + dy),
+                               self.confidence])
+        if not detections:
+            return EMPTY_DETECTIONS
+        return np.array(detections, dtype=np.float64)
+
+    def _features(self, gray, boxes):
+        """Corner features inside every box, with the index of the box they belong to"""
+        height, width = gray.shape[:2]
+        points = []
+        owners = []
+        margin = 2
+        for i, box in enumerate(boxes):
+            # A small margin keeps corners on the box border detectable
+            x1, y1 = max(0, int(box[0]) - margin), max(0, int(box[1]) - margin)
+            x2, y2 = min(width, int(np.ceil(box[2])) + margin), min(height, int(np.ceil(box[3])) + margin)
+            if x2 - x1 < 3 or y2 - y1 < 3:
+                continue
+            corners = cv2.goodFeaturesToTrack(gray[y1:y2, x1:x2], self.max_points, 0.01, 3)
+            if corners is None:
+                continue
+            points.append(corners + np.array([x1, y1], dtype=np.float32))
+            owners.append(np.full(len(corners), i))
+        if not points:
+            return np.empty((0, 1, 2), dtype=np.float32), np.empty(0, dtype=int)
+        return np.concatenate(points), np.concatenate(owners)
@@ -3,11 +3,28 @@ Web Report Generator for PeopleCounter
 Generates an HTML report with all counting statistics
 """
 
+import gzip
 import json
 from datetime import datetime
 import os
 
 
+# Report stylesheet and script live in static/report/ and are inlined into every
+# report, so the file stays self-contained when downloaded or opened from disk
+ASSET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'report')
+_assets = {}
+
+
+def report_asset(name):
+    """Content of a report asset, read once"""
+    content = _assets.get(name)
+    if content is None:
+        with open(os.path.join(ASSET_DIR, name), 'r', encoding='utf-8') as f:
+            content = f.read()
+        _assets[name] = content
+    return content
+
+
 class ReportGenerator:
     """Generate HTML report for people counting results"""
     
@@ -19,18 +36,52 @@ class ReportGenerator:
             'entry_count': 0,
             'exit_count': 0,
             'current_inside': 0,
-            'events': []
+            'events': [],
+            'geometry': {'lines': [], 'zones': []},
+            'timeseries': None,
+            'analytics': None,
+            'scheduler': None,
+            'time_ranges': None
         }
     
-    def add_event(self, event_type, track_id, frame_number):
-        """Add a counting event"""
+    def add_event(self, event_type, track_id, frame_number, location=None, kind='line', video_time=None):
+        """Add a counting event (kind is 'line' or 'zone', location its name)"""
         self.data['events'].append({
             'type': event_type,
             'track_id': track_id,
             'frame': frame_number,
+            'location': location,
+            'kind': kind,
+            'video_time': video_time,
             'timestamp': datetime.now().strftime('%H:%M:%S')
         })
     
+    def set_timeseries(self, timeseries):
+        """Store pre-aggregated occupancy bins (TimeSeriesAggregator.to_dict())"""
+        self.data['timeseries'] = timeseries
+    
+    def set_analytics(self, analytics):
+        """Store the heatmap grid and dwell time summary (MovementAnalytics.to_dict())"""
+        self.data['analytics'] = analytics
+    
+    def set_scheduler(self, scheduler):
+        """Store the latency budget and its adjustments (LatencyScheduler.to_dict(), None when off)"""
+        self.data['scheduler'] = scheduler
+    
+    def set_time_ranges(self, time_ranges):
+        """Store the processed time ranges and the decode time saved (None for whole-video runs)"""
+        self.data['time_ranges'] = time_ranges
+    
+    def save_results(self, output_path='people_counter_results.json'):
+        """Persist the raw results (stats, events, time-series bins) as JSON"""
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, separators=(',', ':'))
+        return os.path.abspath(output_path)
+    
+    def set_geometry(self, geometry_summary):
+        """Store per-line and per-zone counters (CountingGeometry.summary())"""
+        self.data['geometry'] = geometry_summary
+    
     def update_stats(self, entry_count, exit_count, total_frames, video_file):
         """Update overall statistics"""
         self.data['entry_count'] = entry_count
@@ -51,216 +102,7 @@ class ReportGenerator:
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>People Counter Report</title>
     <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 20px;
-            min-height: 100vh;
-        }}
-        
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 15px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-            overflow: hidden;
-        }}
-        
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 40px;
-            text-align: center;
-        }}
-        
-        .header h1 {{
-            font-size: 2.5em;
-            margin-bottom: 10px;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.2);
-        }}
-        
-        .header p {{
-            font-size: 1.1em;
-            opacity: 0.9;
-        }}
-        
-        .stats-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 20px;
-            padding: 40px;
-            background: #f8f9fa;
-        }}
-        
-        .stat-card {{
-            background: white;
-            padding: 30px;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-            text-align: center;
-            transition: transform 0.3s ease;
-        }}
-        
-        .stat-card:hover {{
-            transform: translateY(-5px);
-            box-shadow: 0 8px 12px rgba(0,0,0,0.15);
-        }}
-        
-        .stat-card h3 {{
-            color: #6c757d;
-            font-size: 0.9em;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            margin-bottom: 15px;
-        }}
-        
-        .stat-card .value {{
-            font-size: 3em;
-            font-weight: bold;
-            margin-bottom: 10px;
-        }}
-        
-        .stat-card.entry .value {{
-            color: #28a745;
-        }}
-        
-        .stat-card.exit .value {{
-            color: #dc3545;
-        }}
-        
-        .stat-card.inside .value {{
-            color: #ffc107;
-        }}
-        
-        .stat-card.frames .value {{
-            color: #17a2b8;
-        }}
-        
-        .info-section {{
-            padding: 40px;
-            background: white;
-        }}
-        
-        .info-section h2 {{
-            color: #343a40;
-            margin-bottom: 20px;
-            padding-bottom: 10px;
-            border-bottom: 3px solid #667eea;
-        }}
-        
-        .info-item {{
-            display: flex;
-            justify-content: space-between;
-            padding: 15px;
-            border-bottom: 1px solid #e9ecef;
-        }}
-        
-        .info-item:last-child {{
-            border-bottom: none;
-        }}
-        
-        .info-label {{
-            font-weight: 600;
-            color: #495057;
-        }}
-        
-        .info-value {{
-            color: #6c757d;
-        }}
-        
-        .events-section {{
-            padding: 40px;
-            background: #f8f9fa;
-        }}
-        
-        .events-section h2 {{
-            color: #343a40;
-            margin-bottom: 20px;
-            padding-bottom: 10px;
-            border-bottom: 3px solid #667eea;
-        }}
-        
-        .events-table {{
-            width: 100%;
-            background: white;
-            border-radius: 10px;
-            overflow: hidden;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        
-        .events-table table {{
-            width: 100%;
-            border-collapse: collapse;
-        }}
-        
-        .events-table th {{
-            background: #343a40;
-            color: white;
-            padding: 15px;
-            text-align: left;
-            font-weight: 600;
-            text-transform: uppercase;
-            font-size: 0.85em;
-            letter-spacing: 1px;
-        }}
-        
-        .events-table td {{
-            padding: 15px;
-            border-bottom: 1px solid #e9ecef;
-        }}
-        
-        .events-table tr:last-child td {{
-            border-bottom: none;
-        }}
-        
-        .events-table tr:hover {{
-            background: #f8f9fa;
-        }}
-        
-        .event-badge {{
-            display: inline-block;
-            padding: 5px 15px;
-            border-radius: 20px;
-            font-size: 0.85em;
-            font-weight: 600;
-            text-transform: uppercase;
-        }}
-        
-        .event-badge.entry {{
-            background: #d4edda;
-            color: #155724;
-        }}
-        
-        .event-badge.exit {{
-            background: #f8d7da;
-            color: #721c24;
-        }}
-        
-        .footer {{
-            background: #343a40;
-            color: white;
-            text-align: center;
-            padding: 20px;
-            font-size: 0.9em;
-        }}
-        
-        @media print {{
-            body {{
-                background: white;
-                padding: 0;
-            }}
-            
-            .stat-card:hover {{
-                transform: none;
-            }}
-        }}
+{report_asset('report.css')}
     </style>
 </head>
 <body>
@@ -312,6 +154,11 @@ class ReportGenerator:
             </div>
         </div>
         
+{self._geometry_section()}
+{self._timeseries_section()}
+{self._analytics_section()}
+{self._scheduler_section()}
+{self._time_ranges_section()}
         <div class="events-section">
             <h2>Detailed Events Log</h2>
             <div class="events-table">
@@ -321,7 +168,9 @@ class ReportGenerator:
                             <th>#</th>
                             <th>Event Type</th>
                             <th>Track ID</th>
+                            <th>Location</th>
                             <th>Frame Number</th>
+                            <th>Video Time</th>
                             <th>Time</th>
                         </tr>
                     </thead>
@@ -338,18 +187,20 @@ class ReportGenerator:
                             <td>{idx}</td>
                             <td><span class="event-badge {badge_class}">{event_type}</span></td>
                             <td>ID: {event['track_id']}</td>
+                            <td>{self._event_location(event)}</td>
                             <td>{event['frame']}</td>
+                            <td>{_format_duration(event.get('video_time'))}</td>
                             <td>{event['timestamp']}</td>
                         </tr>
 """
         else:
             html_content += """
                         <tr>
-                            <td colspan="5" style="text-align: center; color: #6c757d;">No events recorded</td>
+                            <td colspan="7" style="text-align: center; color: #6c757d;">No events recorded</td>
                         </tr>
 """
         
-        html_content += """
+        html_content += f"""
                     </tbody>
                 </table>
             </div>
@@ -361,36 +212,317 @@ class ReportGenerator:
     </div>
     
     <script>
-        // Auto-refresh animation
-        document.addEventListener('DOMContentLoaded', function() {
-            const statCards = document.querySelectorAll('.stat-card');
-            statCards.forEach((card, index) => {
-                card.style.animation = `fadeIn 0.5s ease-in-out ${index * 0.1}s both`;
-            });
-        });
-        
-        // Add CSS animation
-        const style = document.createElement('style');
-        style.textContent = `
-            @keyframes fadeIn {
-                from {
-                    opacity: 0;
-                    transform: translateY(20px);
-                }
-                to {
-                    opacity: 1;
-                    transform: translateY(0);
-                }
-            }
-        `;
-        document.head.appendChild(style);
+{report_asset('report.js')}
     </script>
 </body>
 </html>
 """
         
-        # Write HTML file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # Write HTML file, then a pre-compressed copy for the web server
+        # (written second, so a .gz newer than the report always matches it)
+        body = html_content.encode('utf-8')
+        _write_atomic(output_path, body)
+        _write_atomic(output_path + '.gz', gzip.compress(body, compresslevel=9, mtime=0))
         
         return os.path.abspath(output_path)
+    
+    def _event_location(self, event):
+        """Event location label for the events table"""
+        location = event.get('location') or '-'
+        if event.get('kind') == 'zone':
+            return f"{location} (zone)"
+        return location
+    
+    def _timeseries_section(self):
+        """Occupancy over time, drawn as inline SVG from the pre-aggregated bins"""
+        timeseries = self.data.get('timeseries')
+        if not timeseries:
+            return ''
+        
+        # Per-second bins for short videos, per-minute bins otherwise
+        bins = timeseries['per_second']
+        if len(bins['occupancy']) > CHART_MAX_SECOND_BINS:
+            bins = timeseries['per_minute']
+        if not bins['occupancy']:
+            return ''
+        unit = 'second' if bins['bin_seconds'] == 1 else 'minute'
+        
+        return f"""
+        <div class="info-section">
+            <h2>Occupancy Over Time</h2>
+            {_svg_chart(bins)}
+            <div class="chart-legend">
+                <span style="color: #28a745;">&#9632; Entries per {unit}</span>
+                <span style="color: #dc3545;">&#9632; Exits per {unit}</span>
+                <span style="color: #667eea;">&#9644; Occupancy</span>
+            </div>
+        </div>
+"""
+    
+    def _analytics_section(self):
+        """Occupancy heatmap and dwell times near the counting lines"""
+        analytics = self.data.get('analytics')
+        if not analytics:
+            return ''
+        dwell = analytics['dwell']
+        
+        edges = dwell['histogram_edges']
+        labels = [f"&lt; {edges[0]} s"] + [f"{a}-{b} s" for a, b in zip(edges, edges[1:])] + [f"&ge; {edges[-1]} s"]
+        histogram = ''.join(f"""
+                        <tr>
+                            <td>{label}</td>
+                            <td>{count}</td>
+                        </tr>""" for label, count in zip(labels, dwell['histogram']))
+        top = ', '.join(f"ID {d['track_id']} ({d['seconds']:.1f} s)" for d in dwell['top_dwellers']) or '-'
+        
+        return f"""
+        <div class="info-section">
+            <h2>Where People Walk</h2>
+            {_svg_heatmap(analytics['heatmap'])}
+            <div class="chart-legend">
+                <span>Track centroids per cell, darker = more frequent</span>
+            </div>
+        </div>
+        
+        <div class="info-section">
+            <h2>Dwell Time</h2>
+            <div class="info-item">
+                <span class="info-label">Tracks:</span>
+                <span class="info-value">{dwell['tracks']}</span>
+            </div>
+            <div class="info-item">
+                <span class="info-label">Time in View (mean / max):</span>
+                <span class="info-value">{dwell['mean_visible_seconds']:.1f} s / {dwell['max_visible_seconds']:.1f} s</span>
+            </div>
+            <div class="info-item">
+                <span class="info-label">Near the Counting Line (tracks, mean / max):</span>
+                <span class="info-value">{dwell['near_tracks']}, {dwell['mean_near_seconds']:.1f} s / {dwell['max_near_seconds']:.1f} s</span>
+            </div>
+            <div class="info-item">
+                <span class="info-label">Longest Near the Line:</span>
+                <span class="info-value">{top}</span>
+            </div>
+            <div class="events-table">
+                <table>
+                    <thead>
+                        <tr>
+                            <th>Time Near the Line</th>
+                            <th>Tracks</th>
+                        </tr>
+                    </thead>
+                    <tbody>{histogram}
+                    </tbody>
+                </table>
+            </div>
+        </div>
+"""
+    
+    def _scheduler_section(self):
+        """Latency budget adjustments (load shedding) made during the run"""
+        scheduler = self.data.get('scheduler')
+        if not scheduler:
+            return ''
+        
+        rows = ''.join(f"""
+                        <tr>
+                            <td>{a['frame']}</td>
+                            <td>{_format_duration(a['video_time'])}</td>
+                            <td>{a['action']}</td>
+                            <td>{a['latency_ms']:.1f} ms</td>
+                            <td>{a['stride']}</td>
+                            <td>{a['imgsz'] or '-'}</td>
+                            <td>{a['render_every']}</td>
+                        </tr>""" for a in scheduler['adjustments'])
+        if not rows:
+            rows = """
+                        <tr>
+                            <td colspan="7" style="text-align: center; color: #6c757d;">No adjustments, the budget was met throughout</td>
+                        </tr>"""
+        shed = sum(scheduler['frames_per_level'][1:])
+        total = sum(scheduler['frames_per_level'])
+        
+        return f"""
+        <div class="info-section">
+            <h2>Latency Budget</h2>
+            <div class="info-item">
+                <span class="info-label">Target:</span>
+                <span class="info-value">{scheduler['target_ms']:g} ms per frame</span>
+            </div>
+            <div class="info-item">
+                <span class="info-label">Frames Processed with Reduced Work:</span>
+                <span class="info-value">{shed} of {total}</span>
+            </div>
+            <div class="events-table">
+                <table>
+                    <thead>
+                        <tr>
+                            <th>Frame</th>
+                            <th>Video Time</th>
+                            <th>Action</th>
+                            <th>Latency</th>
+                            <th>Stride</th>
+                            <th>Inference Size</th>
+                            <th>Render Every</th>
+                        </tr>
+                    </thead>
+                    <tbody>{rows}
+                    </tbody>
+                </table>
+            </div>
+        </div>
+"""
+    
+    def _time_ranges_section(self):
+        """Windows of video time that were processed, and the decoding skipped around them"""
+        time_ranges = self.data.get('time_ranges')
+        if not time_ranges:
+            return ''
+        windows = ', '.join(f"{_format_duration(start)} - {_format_duration(end) if end is not None else 'end'}"
+                            for start, end in time_ranges['ranges']) or 'none within the video'
+        
+        return f"""
+        <div class="info-section">
+            <h2>Time Ranges</h2>
+            <div class="info-item">
+                <span class="info-label">Processed:</span>
+                <span class="info-value">{windows}</span>
+            </div>
+            <div class="info-item">
+                <span class="info-label">Frames Skipped:</span>
+                <span class="info-value">{time_ranges['frames_skipped']} ({time_ranges['seeks']} seeks)</span>
+            </div>
+            <div class="info-item">
+                <span class="info-label">Decode Time (spent / saved):</span>
+                <span class="info-value">{time_ranges['decode_seconds']:.1f} s / ~{time_ranges['decode_seconds_saved']:.1f} s</span>
+            </div>
+        </div>
+"""
+    
+    def _geometry_section(self):
+        """Per-line / per-zone counters, shown when more than the default line is configured"""
+        lines = self.data['geometry']['lines']
+        zones = self.data['geometry']['zones']
+        if len(lines) <= 1 and not zones:
+            return ''
+        
+        rows = ''
+        for line in lines:
+            rows += f"""
+                        <tr>
+                            <td>{line['name']}</td>
+                            <td>Line</td>
+                            <td>{line['entries']}</td>
+                            <td>{line['exits']}</td>
+                            <td>-</td>
+                        </tr>
+"""
+        for zone in zones:
+            rows += f"""
+                        <tr>
+                            <td>{zone['name']}</td>
+                            <td>Zone</td>
+                            <td>{zone['entries']}</td>
+                            <td>{zone['exits']}</td>
+                            <td>{zone['occupancy']}</td>
+                        </tr>
+"""
+        return f"""
+        <div class="info-section">
+            <h2>Counting Lines &amp; Zones</h2>
+            <div class="events-table">
+                <table>
+                    <thead>
+                        <tr>
+                            <th>Name</th>
+                            <th>Type</th>
+                            <th>Entries</th>
+                            <th>Exits</th>
+                            <th>Occupancy (end)</th>
+                        </tr>
+                    </thead>
+                    <tbody>{rows}
+                    </tbody>
+                </table>
+            </div>
+        </div>
+"""
+
+
+# Above this many per-second bins the chart switches to per-minute bins
+CHART_MAX_SECOND_BINS = 600
+
+
+def _write_atomic(path, data):
+    """Replace a file in one step so the web server never serves a partial report"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _format_duration(seconds):
+    """Video time as H:MM:SS / M:SS ('-' when unknown)"""
+    if seconds is None:
+        return '-'
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+
+def _svg_heatmap(heatmap, width=1000):
+    """Heatmap grid as SVG cells whose opacity follows the (square-root scaled) counts"""
+    grid_w, grid_h = heatmap['grid_width'], heatmap['grid_height']
+    cell = width / float(grid_w)
+    height = cell * grid_h
+    peak = max(max(row) for row in heatmap['cells']) or 1
+    
+    parts = [f'<svg class="chart" viewBox="0 0 {width} {height:.0f}" xmlns="http://www.w3.org/2000/svg">',
+             f'<rect width="{width}" height="{height:.0f}" fill="#f8f9fa" stroke="#adb5bd"/>']
+    for r, row in enumerate(heatmap['cells']):
+        for c, count in enumerate(row):
+            if count:
+                opacity = (count / peak) ** 0.5
+                parts.append(f'<rect x="{c * cell:.1f}" y="{r * cell:.1f}" width="{cell:.1f}" height="{cell:.1f}" '
+                             f'fill="#dc3545" fill-opacity="{opacity:.2f}"/>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def _svg_chart(bins, width=1000, height=240, padding=30):
+    """Entries/exits bars (above/below the axis) with an occupancy line on top"""
+    entries, exits, occupancy = bins['entries'], bins['exits'], bins['occupancy']
+    n = len(occupancy)
+    plot_w = width - 2 * padding
+    half_h = (height - 2 * padding) / 2.0
+    mid_y = padding + half_h
+    step = plot_w / n
+    bar_w = max(step * 0.8, 0.5)
+    max_flow = max(max(entries), max(exits), 1)
+    max_occ = max(max(abs(v) for v in occupancy), 1)
+    
+    parts = [f'<svg class="chart" viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">',
+             f'<line x1="{padding}" y1="{mid_y:.1f}" x2="{width - padding}" y2="{mid_y:.1f}" stroke="#adb5bd"/>']
+    for i in range(n):
+        x = padding + i * step
+        if entries[i]:
+            h = half_h * entries[i] / max_flow
+            parts.append(f'<rect x="{x:.1f}" y="{mid_y - h:.1f}" width="{bar_w:.1f}" height="{h:.1f}" fill="#28a745"/>')
+        if exits[i]:
+            h = half_h * exits[i] / max_flow
+            parts.append(f'<rect x="{x:.1f}" y="{mid_y:.1f}" width="{bar_w:.1f}" height="{h:.1f}" fill="#dc3545"/>')
+    
+    points = ' '.join(f'{padding + (i + 0.5) * step:.1f},{mid_y - half_h * v / max_occ:.1f}'
+                      for i, v in enumerate(occupancy))
+    parts.append(f'<polyline points="{points}" fill="none" stroke="#667eea" stroke-width="2"/>')
+    
+    duration = n * bins['bin_seconds']
+    parts.append(f'<text x="{padding}" y="{height - 8}" font-size="12" fill="#6c757d">0:00</text>')
+    parts.append(f'<text x="{width - padding}" y="{height - 8}" font-size="12" fill="#6c757d" '
+                 f'text-anchor="end">{_format_duration(duration)}</text>')
+    parts.append(f'<text x="{padding}" y="{padding - 10}" font-size="12" fill="#6c757d">'
+                 f'max occupancy {max_occ} | max {max_flow} per bin</text>')
+    parts.append('</svg>')
+    return ''.join(parts)
@@ -0,0 +1,281 @@
+"""
+Results Store for PeopleCounter
+Indexed SQLite database of finished jobs, counting events and time-series
+aggregates, with range and aggregate queries served from the indexes.
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+DEFAULT_DB_PATH = 'people_counter.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    camera TEXT NOT NULL,
+    video_file TEXT,
+    recorded_at REAL NOT NULL,
+    processed_at REAL NOT NULL,
+    duration REAL,
+    total_frames INTEGER,
+    entry_count INTEGER,
+    exit_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    camera TEXT NOT NULL,
+    ts REAL NOT NULL,
+    type TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    location TEXT,
+    track_id INTEGER,
+    frame INTEGER
+);
+CREATE TABLE IF NOT EXISTS aggregates (
+    job_id TEXT NOT NULL,
+    camera TEXT NOT NULL,
+    bin_seconds INTEGER NOT NULL,
+    bin_start REAL NOT NULL,
+    entries INTEGER NOT NULL,
+    exits INTEGER NOT NULL,
+    occupancy INTEGER NOT NULL,
+    PRIMARY KEY (job_id, bin_seconds, bin_start)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_camera_time ON jobs (camera, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_events_job ON events (job_id);
+CREATE INDEX IF NOT EXISTS idx_events_time ON events (ts, type, kind);
+CREATE INDEX IF NOT EXISTS idx_events_camera_time ON events (camera, ts, type, kind);
+CREATE INDEX IF NOT EXISTS idx_aggregates_camera_time ON aggregates (camera, bin_seconds, bin_start);
+CREATE INDEX IF NOT EXISTS idx_aggregates_time ON aggregates (bin_seconds, bin_start, camera, entries, exits);
+"""
+
+# Bucket names accepted by aggregate queries
+BUCKETS = {'minute': 60, 'hour': 3600, 'day': 86400}
+# Width of the stored bins that bucket aggregates of a minute or more are summed from
+AGGREGATE_BIN_SECONDS = 60
+
+
+def parse_time(value):
+    """Accept epoch seconds or an ISO 8601 string; None passes through"""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            return parsed.timestamp()
+        return parsed.astimezone(timezone.utc).timestamp()
+
+
+def format_time(epoch):
+    return datetime.fromtimestamp(epoch).isoformat(timespec='seconds')
+
+
+def epoch_bins(times, types, start, end, width):
+    """
+    (bin_start, entries, exits, occupancy) rows for bins aligned to whole
+    multiples of `width` seconds since the epoch, covering [start, end).
+    Occupancy is the running entries - exits at the end of each bin.
+    """
+    first_bin = np.floor(start / width)
+    first = first_bin * width
+    count = max(1, int(np.ceil((max(end, start) - first) / width)))
+    # Same bin as CAST(ts / width AS INTEGER) in the events queries
+    index = np.clip((np.floor(times / width) - first_bin).astype(np.int64), 0, count - 1)
+    entries = np.bincount(index[types == 'entry'], minlength=count)
+    exits = np.bincount(index[types == 'exit'], minlength=count)
+    occupancy = np.cumsum(entries - exits)
+    return [(float(first + i * width), int(e), int(x), int(o))
+            for i, (e, x, o) in enumerate(zip(entries, exits, occupancy))]
+
+
+class ResultsStore:
+    """Thin wrapper around a SQLite connection; open one per thread/process"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        # WAL lets the web server read while a job is writing
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def save_job(self, job_id, camera, results, recorded_at=None):
+        """
+        Write a finished job's events and time-series bins in one transaction.
+        results: ReportGenerator.data (stats, events with video_time, timeseries)
+        recorded_at: wall-clock time (epoch) of the first video frame
+        """
+        recorded_at = time.time() if recorded_at is None else recorded_at
+        timeseries = results.get('timeseries') or {}
+
+        events = [
+            (job_id, camera, recorded_at + (e.get('video_time') or 0.0), e['type'], e.get('kind', 'line'),
+             e.get('location'), e.get('track_id'), e.get('frame'))
+            for e in results.get('events', [])
+        ]
+        # The time series bins are relative to the first frame; they are re-binned
+        # from the line events onto epoch-aligned bins, so a stored minute is a
+        # wall-clock minute and sums into hour and day buckets exactly
+        line = [(ts, event_type) for _, _, ts, event_type, kind, _, _, _ in events if kind == 'line']
+        times = np.array([ts for ts, _ in line], dtype=np.float64)
+        types = np.array([event_type for _, event_type in line], dtype=object)
+        end = recorded_at + (timeseries.get('duration') or 0.0)
+        if len(times):
+            end = max(end, float(times.max()) + 1e-6)
+        aggregates = []
+        for key in ('per_second', 'per_minute'):
+            bins = timeseries.get(key)
+            if not bins:
+                continue
+            width = int(bins['bin_seconds'])
+            aggregates.extend((job_id, camera, width, bin_start, entries, exits, occupancy)
+                              for bin_start, entries, exits, occupancy
+                              in epoch_bins(times, types, recorded_at, end, width))
+
+        with self.conn:
+            # Re-saving a job replaces its previous rows
+            self.conn.execute('DELETE FROM events WHERE job_id = ?', (job_id,))
+            self.conn.execute('DELETE FROM aggregates WHERE job_id = ?', (job_id,))
+            self.conn.execute(
+                'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, camera, results.get('video_file'), recorded_at, time.time(),
+                 timeseries.get('duration'), results.get('total_frames'),
+                 results.get('entry_count'), results.get('exit_count')))
+            self.conn.executemany(
+                'INSERT INTO events (job_id, camera, ts, type, kind, location, track_id, frame) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', events)
+            self.conn.executemany('INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?)', aggregates)
+        return len(events)
+
+    def jobs(self, camera=None, start=None, end=None, limit=100):
+        sql, params = 'SELECT * FROM jobs', []
+        clauses = _range_clauses('recorded_at', start, end, params)
+        if camera:
+            clauses.insert(0, 'camera = ?')
+            params.insert(0, camera)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY recorded_at DESC LIMIT ?'
+        params.append(limit)
+        return [_row_dict(row, 'recorded_at', 'processed_at') for row in self.conn.execute(sql, params)]
+
+    def events(self, camera=None, job_id=None, event_type=None, start=None, end=None, limit=1000, offset=0):
+        """Events in a time range, ordered by time (served by the camera/time indexes)"""
+        params = []
+        clauses = []
+        if camera:
+            clauses.append('camera = ?')
+            params.append(camera)
+        if job_id:
+            clauses.append('job_id = ?')
+            params.append(job_id)
+        clauses += _range_clauses('ts', start, end, params)
+        if event_type:
+            clauses.append('type = ?')
+            params.append(event_type)
+        sql = 'SELECT job_id, camera, ts, type, kind, location, track_id, frame FROM events'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY ts LIMIT ? OFFSET ?'
+        params += [limit, offset]
+        return [_row_dict(row, 'ts') for row in self.conn.execute(sql, params)]
+
+    def aggregate(self, bucket='hour', camera=None, start=None, end=None, kind='line', source=None):
+        """
+        Entries and exits per time bucket across all matching jobs.
+        Line crossings in buckets of a minute or more are summed from the
+        stored epoch-aligned per-minute bins (start/end select whole minutes),
+        so the query reads about one row per camera and minute however many
+        events there are. Finer buckets and
+        other event kinds are counted from the covering (camera, ts, type,
+        kind) events index. source: 'bins' or 'events' forces a path.
+        """
+        width = BUCKETS[bucket]
+        if source is None:
+            source = 'bins' if kind == 'line' and width >= AGGREGATE_BIN_SECONDS else 'events'
+        if source == 'bins':
+            rows = self._aggregate_bins(width, camera, start, end)
+        elif source == 'events':
+            rows = self._aggregate_events(width, camera, start, end, kind)
+        else:
+            raise ValueError(f"source must be 'bins' or 'events', got {source!r}")
+        return [{'bucket': format_time(row['bucket']), 'bucket_epoch': row['bucket'],
+                 'entries': row['entries'], 'exits': row['exits']}
+                for row in rows]
+
+    def _aggregate_bins(self, width, camera, start, end):
+        params = [width, width, AGGREGATE_BIN_SECONDS]
+        clauses = ['bin_seconds = ?']
+        if camera:
+            clauses.append('camera = ?')
+            params.append(camera)
+        clauses += _range_clauses('bin_start', start, end, params)
+        sql = ('SELECT CAST(bin_start / ? AS INTEGER) * ? AS bucket, '
+               'SUM(entries) AS entries, SUM(exits) AS exits FROM aggregates WHERE '
+               + ' AND '.join(clauses) + ' GROUP BY bucket HAVING SUM(entries) + SUM(exits) > 0 ORDER BY bucket')
+        return self.conn.execute(sql, params)
+
+    def _aggregate_events(self, width, camera, start, end, kind):
+        params = [width, width]
+        clauses = []
+        if camera:
+            clauses.append('camera = ?')
+            params.append(camera)
+        clauses += _range_clauses('ts', start, end, params)
+        sql = ('SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, '
+               "SUM(type = 'entry') AS entries, SUM(type = 'exit') AS exits "
+               'FROM events')
+        if kind:
+            clauses.append('kind = ?')
+            params.append(kind)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' GROUP BY bucket ORDER BY bucket'
+        return self.conn.execute(sql, params)
+
+    def occupancy(self, camera, bin_seconds=60, start=None, end=None):
+        """Stored per-job occupancy bins for a camera"""
+        params = [camera, bin_seconds]
+        clauses = ['camera = ?', 'bin_seconds = ?'] + _range_clauses('bin_start', start, end, params)
+        sql = ('SELECT job_id, bin_start, entries, exits, occupancy FROM aggregates WHERE '
+               + ' AND '.join(clauses) + ' ORDER BY bin_start')
+        return [_row_dict(row, 'bin_start') for row in self.conn.execute(sql, params)]
+
+
+def _range_clauses(column, start, end, params):
+    clauses = []
+    if start is not None:
+        clauses.append(f'{column} >= ?')
+        params.append(start)
+    if end is not None:
+        clauses.append(f'{column} < ?')
+        params.append(end)
+    return clauses
+
+
+def _row_dict(row, *time_columns):
+    data = dict(row)
+    for column in time_columns:
+        if data.get(column) is not None:
+            data[column + '_iso'] = format_time(data[column])
+    return data
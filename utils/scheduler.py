@@ -0,0 +1,123 @@
+"""
+Latency-Budget Scheduler for PeopleCounter
+Watches the measured latency per source frame against a target budget and
+sheds work in steps when the loop falls behind (render fewer frames, lower
+the inference size, raise the detection stride), stepping back up when there
+is headroom again. Every adjustment is logged for the report.
+"""
+
+import time
+
+
+class LatencyScheduler:
+    """
+    A ladder of processing levels, level 0 being the configured settings.
+    Each level sheds one more step of work, cheapest loss first: rendering
+    only every 2nd, 4th, ... frame (display runs only), then a smaller
+    inference size (resizable detectors only), then a larger detection stride.
+
+    The latency per source frame (wall time between processed frames divided
+    by the frames they advance, so a stride of 2 gets twice the time per
+    processed frame) is averaged over `window` processed frames. Above
+    target_ms the scheduler moves one level down the ladder; below
+    headroom * target_ms one level back up. The window restarts after every
+    change so each decision sees the effect of the previous one.
+    """
+
+    def __init__(self, target_ms, stride=1, imgsz=None, render=False, max_render_every=8, min_imgsz=320,
+                 imgsz_step=64, max_stride=4, window=30, headroom=0.6):
+        if target_ms <= 0:
+            raise ValueError(f"target latency must be positive, got {target_ms}")
+        self.target_ms = float(target_ms)
+        self.window = max(1, int(window))
+        self.headroom = headroom
+        self.levels = self._build_levels(stride, imgsz, render, max_render_every, min_imgsz, imgsz_step,
+                                         max_stride)
+        self.level = 0
+        self.adjustments = []
+        self.frames_per_level = [0] * len(self.levels)
+        self._window_start = None
+        self._window_frame = 0
+        self._window_processed = 0
+
+    @staticmethod
+    def _build_levels(stride, imgsz, render, max_render_every, min_imgsz, imgsz_step, max_stride):
+        level = {'render_every': 1, 'imgsz': imgsz, 'stride': stride}
+        levels = [dict(level)]
+        if render:
+            while level['render_every'] * 2 <= max_render_every:
+                level['render_every'] *= 2
+                levels.append(dict(level))
+        if imgsz:
+            while level['imgsz'] - imgsz_step >= min_imgsz:
+                level['imgsz'] -= imgsz_step
+                levels.append(dict(level))
+        while level['stride'] < max_stride:
+            level['stride'] += 1
+            levels.append(dict(level))
+        return levels
+
+    @property
+    def settings(self):
+        """Current {'render_every', 'imgsz', 'stride'}"""
+        return self.levels[self.level]
+
+    @property
+    def stride(self):
+        return self.levels[self.level]['stride']
+
+    @property
+    def imgsz(self):
+        return self.levels[self.level]['imgsz']
+
+    def render(self, processed_frames):
+        """Whether this processed frame is drawn and shown"""
+        return processed_frames % self.levels[self.level]['render_every'] == 0
+
+    def frame_done(self, frame_index, video_time=None):
+        """
+        Record that source frame frame_index is finished. Returns the new
+        settings when the level changed, else None.
+        """
+        now = time.perf_counter()
+        self.frames_per_level[self.level] += 1
+        if self._window_start is None:
+            self._restart(now, frame_index)
+            return None
+        self._window_processed += 1
+        if self._window_processed < self.window:
+            return None
+
+        latency_ms = 1000.0 * (now - self._window_start) / max(1, frame_index - self._window_frame)
+        if latency_ms > self.target_ms and self.level < len(self.levels) - 1:
+            self.level += 1
+            action = 'shed'
+        elif latency_ms < self.headroom * self.target_ms and self.level > 0:
+            self.level -= 1
+            action = 'restore'
+        else:
+            self._restart(now, frame_index)
+            return None
+
+        self.adjustments.append(dict(self.settings, frame=frame_index, video_time=video_time, action=action,
+                                     level=self.level, latency_ms=round(latency_ms, 2)))
+        self._restart(now, frame_index)
+        return self.settings
+
+    def _restart(self, now, frame_index):
+        self._window_start = now
+        self._window_frame = frame_index
+        self._window_processed = 0
+
+    def resume(self):
+        """Forget the timing window (after a checkpoint restore: the wall clock moved on)"""
+        self._window_start = None
+
+    def to_dict(self):
+        return {
+            'target_ms': self.target_ms,
+            'levels': self.levels,
+            'frames_per_level': self.frames_per_level,
+            'final_level': self.level,
+            'adjustments': self.adjustments,
+        }
@@ -0,0 +1,270 @@
+"""
+Shared-Memory Pipeline for PeopleCounter
+Multiprocess decode -> inference pipeline. Decoded frames live in a
+multiprocessing.shared_memory ring buffer; only slot indices and detection
+arrays cross process boundaries, never the frames themselves.
+
+    decoder process --(slot, index)--> inference process --(slot, index, detections)--> main process
+          ^                                                                                  |
+          +------------------------------------ free slot -----------------------------------+
+
+The main process keeps tracking, counting and drawing (drawing happens in
+place in the shared slot) and returns the slot once it is done with it.
+"""
+
+import multiprocessing as mp
+import pickle
+import queue
+import signal
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from utils.optical_flow import is_keyframe
+from utils.time_ranges import range_start
+from utils.video import SEEK_GRAB_LIMIT, DecodeStats, seek
+
+
+def _ignore_job_stop():
+    """
+    Workers share the job's process group on Windows, so a CTRL_BREAK_EVENT
+    meant for the main process reaches them too. The main process stops
+    them in order while it unwinds.
+    """
+    if hasattr(signal, 'SIGBREAK'):
+        signal.signal(signal.SIGBREAK, signal.SIG_IGN)
+
+
+class FrameRing:
+    """Fixed number of uint8 frame slots in one shared memory block"""
+
+    def __init__(self, slots, shape, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        size = slots * int(np.prod(self.shape))
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _decoder_main(video_path, ring_name, slots, shape, stride, start, ranges, free_slots, decoded, decode_stats,
+                  stop):
+    """
+    Decode every stride-th frame (after `start` consumed frames, within the
+    frame ranges if any) straight into a free ring slot
+    """
+    _ignore_job_stop()
+    ring = FrameRing(slots, shape, ring_name)
+    cap = cv2.VideoCapture(video_path)
+    stats = DecodeStats()
+    index = 0
+    try:
+        for first, last in (ranges if ranges is not None else [(0, None)]):
+            first = max(first, start)
+            if last is not None and last <= first:
+                continue
+            t0 = time.perf_counter()
+            if not seek(cap, first, index):
+                return
+            if first - index > SEEK_GRAB_LIMIT:
+                stats.seeks += 1
+            stats.seek_seconds += time.perf_counter() - t0
+            index = first
+            while last is None or index < last:
+                if stop.is_set():
+                    return
+                slot = free_slots.get()
+                if slot is None:
+                    return
+                target = ring.frames[slot]
+                t0 = time.perf_counter()
+                ret, frame = cap.read(target)
+                if not ret:
+                    return
+                if frame is not target and not np.shares_memory(frame, target):
+                    # Decoder returned its own buffer (unexpected size) - copy it in
+                    target[:] = cv2.resize(frame, (shape[1], shape[0]))
+                index += 1
+                stats.frames += 1
+                decoded.put((slot, index))
+                # Frames between strides are grabbed, not decoded
+                for _ in range(stride - 1):
+                    if last is not None and index >= last:
+                        break
+                    if not cap.grab():
+                        return
+                    stats.frames += 1
+                    index += 1
+                stats.decode_seconds += time.perf_counter() - t0
+    finally:
+        decode_stats.put(stats)
+        decoded.put(None)
+        cap.release()
+        ring.close()
+
+
+def _inference_main(ring_name, slots, shape, detector_config, processing_size, stride, keyframe_interval, ranges,
+                    decoded, results, stop):
+    """
+    Downscale and detect on frames referenced by slot index. Frames between
+    keyframes (counted from the start of their time range) are passed on
+    without detections (None).
+    """
+    from utils.detectors import create_detector
+    _ignore_job_stop()
+    ring = FrameRing(slots, shape, ring_name)
+    try:
+        detector = create_detector(detector_config)
+        source_size = (shape[1], shape[0])
+        while not stop.is_set():
+            item = decoded.get()
+            if item is None:
+                break
+            slot, index = item
+            if not is_keyframe(index - range_start(ranges, index), stride, keyframe_interval):
+                results.put((slot, index, None, 0.0))
+                continue
+            frame = ring.frames[slot]
+            if processing_size != source_size:
+                frame = cv2.resize(frame, processing_size, interpolation=cv2.INTER_AREA)
+            start = time.perf_counter()
+            detections = detector.detect(frame)
+            results.put((slot, index, detections, time.perf_counter() - start))
+    finally:
+        results.put(None)
+        ring.close()
+
+
+class SharedMemoryPipeline:
+    """
+    Main-process side of the pipeline. Iterate with next(); each returned
+    frame is a view into shared memory that stays valid until the next call.
+    """
+
+    def __init__(self, video_path, detector_config, frame_shape, processing_size, slots=8, stride=1, start=0,
+                 keyframe_interval=1, ranges=None):
+        self.video_path = video_path
+        self.detector_config = detector_config
+        self.shape = tuple(frame_shape)
+        self.processing_size = tuple(processing_size)
+        self.slots = slots
+        self.stride = stride
+        self.start_frame = start
+        self.keyframe_interval = keyframe_interval
+        self.ranges = ranges
+        self.decode_stats = None
+        self.ring = None
+        self.processes = []
+        self._current_slot = None
+        self.frames = 0
+        self.ipc_bytes = 0
+
+    def start(self):
+        ctx = mp.get_context('spawn')
+        self.ring = FrameRing(self.slots, self.shape)
+        self.free_slots = ctx.Queue()
+        self.decoded = ctx.Queue()
+        self.results = ctx.Queue()
+        self._decode_stats = ctx.Queue()
+        self.stop_event = ctx.Event()
+        for slot in range(self.slots):
+            self.free_slots.put(slot)
+
+        self.processes = [
+            ctx.Process(target=_decoder_main, daemon=True,
+                        args=(self.video_path, self.ring.name, self.slots, self.shape, self.stride, self.start_frame,
+                              self.ranges, self.free_slots, self.decoded, self._decode_stats, self.stop_event)),
+            ctx.Process(target=_inference_main, daemon=True,
+                        args=(self.ring.name, self.slots, self.shape, self.detector_config,
+                              self.processing_size, self.stride, self.keyframe_interval, self.ranges,
+                              self.decoded, self.results, self.stop_event)),
+        ]
+        for process in self.processes:
+            process.start()
+        return self
+
+    def __iter__(self):
+        """
+        Yield (frame_index, frame, None, detections, detector_latency) until the
+        end of the video, shaped like main.detect_frames (the downscaled frame
+        stays in the inference process)
+        """
+        while True:
+            item = self.next()
+            if item is None:
+                return
+            yield item
+
+    def next(self):
+        """Return (frame_index, frame, None, detections, detector_latency) or None at the end of the video"""
+        self._release_current()
+        while True:
+            try:
+                item = self.results.get(timeout=1.0)
+                break
+            except queue.Empty:
+                # A worker that dies before its target runs never sends the end marker
+                if not all(process.is_alive() for process in self.processes):
+                    raise RuntimeError("Pipeline worker process exited unexpectedly")
+        if item is None:
+            # The decoder sent its DecodeStats just before its end marker
+            try:
+                self.decode_stats = self._decode_stats.get(timeout=5.0)
+            except queue.Empty:
+                pass
+            return None
+        slot, index, detections, latency = item
+        self._current_slot = slot
+        self.frames += 1
+        # Bytes that crossed process boundaries for this frame:
+        # decoder->inference (slot, index), inference->main (slot, index, detections), free slot back
+        self.ipc_bytes += len(pickle.dumps((slot, index))) + len(pickle.dumps(item)) + len(pickle.dumps(slot))
+        return index, self.ring.frames[slot], None, detections, latency
+
+    def _release_current(self):
+        if self._current_slot is not None:
+            self.free_slots.put(self._current_slot)
+            self._current_slot = None
+
+    @property
+    def ipc_bytes_per_frame(self):
+        return self.ipc_bytes / self.frames if self.frames else 0.0
+
+    def close(self):
+        """Stop the workers and free the shared memory"""
+        if self.ring is None:
+            return
+        self.stop_event.set()
+        # Unblock a decoder waiting for a free slot
+        self.free_slots.put(None)
+        for q in (self.decoded, self.results, self._decode_stats):
+            try:
+                while True:
+                    q.get_nowait()
+            except (queue.Empty, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for q in (self.free_slots, self.decoded, self.results, self._decode_stats):
+            q.close()
+            q.cancel_join_thread()
+        self.ring.close()
+        self.ring = None
@@ -6,6 +6,22 @@ Implementation of SORT tracker for person tracking
 import numpy as np
 from filterpy.kalman import KalmanFilter
 from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+# One row per confirmed track, as returned by Sort.update with output='array'.
+# previous_centroid is NaN on a track's first observation.
+TRACK_DTYPE = np.dtype([
+    ('bbox', np.int32, (4,)),
+    ('track_id', np.int64),
+    ('current_centroid', np.float64, (2,)),
+    ('previous_centroid', np.float64, (2,)),
+])
+
+# association='gated' falls back to the dense IOU matrix below this many trackers,
+# where building the grid costs more than it saves (both give the same result)
+GATED_MIN_TRACKERS = 200
 
 
 class KalmanBoxTracker:
@@ -53,7 +69,6 @@ class KalmanBoxTracker:
         self.age = 0
         
         # Store centroids
-        self.centroid_history = []
         self.current_centroid = self._get_centroid(bbox)
         self.previous_centroid = None
     
@@ -99,7 +114,6 @@ class KalmanBoxTracker:
         # Update centroids
         self.previous_centroid = self.current_centroid
         self.current_centroid = self._get_centroid(bbox)
-        self.centroid_history.append(self.current_centroid)
         
         self.kf.update(self._convert_bbox_to_z(bbox))
     
@@ -143,19 +157,169 @@ def iou_batch(bb_test, bb_gt):
     return o
 
 
+def iou_pairs(bb_test, bb_gt):
+    """
+    Compute IOU between paired rows of two equally long box arrays [x1, y1, x2, y2]
+    """
+    xx1 = np.maximum(bb_test[:, 0], bb_gt[:, 0])
+    yy1 = np.maximum(bb_test[:, 1], bb_gt[:, 1])
+    xx2 = np.minimum(bb_test[:, 2], bb_gt[:, 2])
+    yy2 = np.minimum(bb_test[:, 3], bb_gt[:, 3])
+    w = np.maximum(0., xx2 - xx1)
+    h = np.maximum(0., yy2 - yy1)
+    wh = w * h
+    return wh / ((bb_test[:, 2] - bb_test[:, 0]) * (bb_test[:, 3] - bb_test[:, 1])
+                 + (bb_gt[:, 2] - bb_gt[:, 0]) * (bb_gt[:, 3] - bb_gt[:, 1]) - wh)
+
+
+def _grid_cells(boxes, cell_size, origin):
+    """
+    Expand boxes into (cell key, box index) entries for every grid cell a box touches
+    """
+    lo = np.floor((boxes[:, :2] - origin) / cell_size).astype(np.int64)
+    hi = np.floor((boxes[:, 2:4] - origin) / cell_size).astype(np.int64)
+    hi = np.maximum(hi, lo)
+    nx = hi[:, 0] - lo[:, 0] + 1
+    ny = hi[:, 1] - lo[:, 1] + 1
+    counts = nx * ny
+    owner = np.repeat(np.arange(len(boxes)), counts)
+    # Position of each entry within its box's cell block -> (dx, dy) offsets
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cx = lo[owner, 0] + local % nx[owner]
+    cy = lo[owner, 1] + local // nx[owner]
+    return (cx << 32) + cy, owner
+
+
+def gated_iou_pairs(detections, trackers):
+    """
+    IOU of all detection/tracker pairs whose boxes overlap, found through a
+    uniform grid over the predicted tracker boxes instead of the dense matrix.
+    Returns (det_idx, trk_idx, iou) arrays with iou > 0. Lossless: overlapping
+    boxes always share a grid cell.
+    """
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+    if len(detections) == 0 or len(trackers) == 0:
+        return empty
+    
+    # Cells about the size of a typical tracker box: each box touches few cells
+    sizes = np.concatenate([trackers[:, 2] - trackers[:, 0], trackers[:, 3] - trackers[:, 1]])
+    cell_size = max(float(np.median(sizes)), 1.0)
+    origin = np.minimum(detections[:, :2].min(0), trackers[:, :2].min(0))
+    
+    trk_keys, trk_owner = _grid_cells(trackers, cell_size, origin)
+    det_keys, det_owner = _grid_cells(detections, cell_size, origin)
+    order = np.argsort(trk_keys, kind='stable')
+    trk_keys, trk_owner = trk_keys[order], trk_owner[order]
+    
+    # Join detection cells with tracker cells on the cell key
+    start = np.searchsorted(trk_keys, det_keys, side='left')
+    stop = np.searchsorted(trk_keys, det_keys, side='right')
+    counts = stop - start
+    if counts.sum() == 0:
+        return empty
+    det_idx = np.repeat(det_owner, counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    trk_idx = trk_owner[np.repeat(start, counts) + local]
+    
+    # A pair sharing several cells appears once per shared cell
+    pair_keys = np.unique(det_idx * len(trackers) + trk_idx)
+    det_idx, trk_idx = pair_keys // len(trackers), pair_keys % len(trackers)
+    iou = iou_pairs(detections[det_idx, :4], trackers[trk_idx, :4])
+    keep = iou > 0
+    return det_idx[keep], trk_idx[keep], iou[keep]
+
+
+def _group_by_label(labels, num_labels):
+    """
+    Members of every label (indices sorted by label), the start offset of each
+    label's run in that order, and each index's rank within its label
+    """
+    members = np.argsort(labels, kind='stable')
+    start = np.zeros(num_labels + 1, dtype=np.int64)
+    np.cumsum(np.bincount(labels, minlength=num_labels), out=start[1:])
+    rank = np.empty(len(labels), dtype=np.int64)
+    rank[members] = np.arange(len(labels)) - start[labels[members]]
+    return members, start, rank
+
+
+def gated_assignment(detections, trackers, iou_threshold):
+    """
+    Same matched indices as the dense path in Sort._associate_detections_to_trackers,
+    computed on overlapping pairs only. Non-overlapping pairs have IOU 0, so the
+    assignment decomposes into independent connected components of the
+    overlap graph, each solved with its own (small) linear assignment.
+    """
+    det_idx, trk_idx, iou = gated_iou_pairs(detections, trackers)
+    if len(iou) == 0:
+        return np.empty((0, 2), dtype=int), (det_idx, trk_idx, iou)
+    
+    # Unambiguous case: every detection and tracker has at most one pair above the threshold
+    above = iou > iou_threshold
+    if above.any():
+        if (np.bincount(det_idx[above]).max() == 1 and np.bincount(trk_idx[above]).max() == 1):
+            matched = np.stack([det_idx[above], trk_idx[above]], axis=1)
+            return matched[np.argsort(matched[:, 0])], (det_idx, trk_idx, iou)
+    
+    # Components of the bipartite overlap graph (detections first, then trackers)
+    num_dets, num_trks = len(detections), len(trackers)
+    graph = coo_matrix((np.ones(len(iou)), (det_idx, num_dets + trk_idx)),
+                       shape=(num_dets + num_trks, num_dets + num_trks))
+    num_labels, labels = connected_components(graph, directed=False)
+    det_members, det_start, det_rank = _group_by_label(labels[:num_dets], num_labels)
+    trk_members, trk_start, trk_rank = _group_by_label(labels[num_dets:], num_labels)
+    
+    matched = []
+    pair_labels = labels[det_idx]
+    order = np.argsort(pair_labels, kind='stable')
+    bounds = np.flatnonzero(np.diff(pair_labels[order])) + 1
+    for group in np.split(order, bounds):
+        if len(group) == 1:
+            matched.append((det_idx[group[0]], trk_idx[group[0]]))
+            continue
+        label = pair_labels[group[0]]
+        rows = det_members[det_start[label]:det_start[label + 1]]
+        cols = trk_members[trk_start[label]:trk_start[label + 1]]
+        cost = np.zeros((len(rows), len(cols)))
+        cost[det_rank[det_idx[group]], trk_rank[trk_idx[group]]] = -iou[group]
+        r, c = linear_sum_assignment(cost)
+        matched.extend(zip(rows[r], cols[c]))
+    matched = np.array(matched, dtype=int)
+    return matched[np.argsort(matched[:, 0])], (det_idx, trk_idx, iou)
+
+
+def _unmatched_in_sort_order(count, assigned, low):
+    """
+    Indices in range(count) that the solver did not assign (ascending),
+    followed by the assigned ones whose match was rejected for low IOU
+    """
+    never = np.flatnonzero(~np.isin(np.arange(count), assigned))
+    return np.concatenate([never, assigned[low]]).astype(int)
+
+
 class Sort:
     """
     SORT tracker
     """
-    def __init__(self, max_age=30, min_hits=3, iou_threshold=0.3):
+    def __init__(self, max_age=30, min_hits=3, iou_threshold=0.3, association='dense', output='dicts'):
         """
         Sets key parameters for SORT
+        association: 'dense' (full IOU matrix) or 'gated' (spatial grid, per-component
+            assignment, used from GATED_MIN_TRACKERS trackers on)
+        output: 'dicts' (a list of dicts per update) or 'array' (one TRACK_DTYPE array)
         """
+        if association not in ('dense', 'gated'):
+            raise ValueError(f"association must be 'dense' or 'gated', got {association!r}")
+        if output not in ('dicts', 'array'):
+            raise ValueError(f"output must be 'dicts' or 'array', got {output!r}")
         self.max_age = max_age
         self.min_hits = min_hits
         self.iou_threshold = iou_threshold
+        self.association = association
+        self.output = output
         self.trackers = []
         self.frame_count = 0
+        # Reused output rows for output='array', grown by doubling
+        self._tracks = np.zeros(64, dtype=TRACK_DTYPE)
     
     def update(self, dets=np.empty((0, 5))):
         """
@@ -163,6 +327,8 @@ class Sort:
           dets - a numpy array of detections in the format [[x1,y1,x2,y2,score],[x1,y1,x2,y2,score],...]
         Returns:
           a list of tracks in the format [(x1, y1, x2, y2, track_id, centroid_x, centroid_y, prev_centroid_x, prev_centroid_y), ...]
+          or, with output='array', a TRACK_DTYPE array of the same tracks. The array is a view
+          of a buffer reused by the next update; copy it to keep it.
         """
         self.frame_count += 1
         
@@ -195,8 +361,23 @@ class Sort:
                 self.trackers.append(trk)
         
         # Return tracks
+        if self.output == 'array':
+            ret = self._track_array()
+        else:
+            ret = self._track_dicts()
+        
+        # Remove dead trackers
+        self.trackers = [t for t in self.trackers if t.time_since_update < self.max_age]
+        
+        return ret
+    
+    def _confirmed(self, trk):
+        return (trk.time_since_update < 1) and (trk.hit_streak >= self.min_hits or self.frame_count <= self.min_hits)
+    
+    def _track_dicts(self):
+        ret = []
         for trk in self.trackers:
-            if (trk.time_since_update < 1) and (trk.hit_streak >= self.min_hits or self.frame_count <= self.min_hits):
+            if self._confirmed(trk):
                 d = trk.get_state()[0]
                 track_data = {
                     'bbox': (int(d[0]), int(d[1]), int(d[2]), int(d[3])),
@@ -205,12 +386,47 @@ class Sort:
                     'previous_centroid': trk.previous_centroid
                 }
                 ret.append(track_data)
-        
-        # Remove dead trackers
-        self.trackers = [t for t in self.trackers if t.time_since_update < self.max_age]
-        
         return ret
     
+    def _track_array(self):
+        """Write the confirmed tracks into the reused TRACK_DTYPE buffer, no per-track objects"""
+        if len(self.trackers) > len(self._tracks):
+            self._tracks = np.zeros(max(2 * len(self._tracks), len(self.trackers)), dtype=TRACK_DTYPE)
+        bbox = self._tracks['bbox']
+        ids = self._tracks['track_id']
+        current = self._tracks['current_centroid']
+        previous = self._tracks['previous_centroid']
+        n = 0
+        for trk in self.trackers:
+            if not self._confirmed(trk):
+                continue
+            # Same arithmetic as get_state(): centre, area and aspect ratio -> corners
+            x = trk.kf.x
+            w = np.sqrt(x[2, 0] * x[3, 0])
+            h = x[2, 0] / w
+            bbox[n, 0] = x[0, 0] - w / 2.
+            bbox[n, 1] = x[1, 0] - h / 2.
+            bbox[n, 2] = x[0, 0] + w / 2.
+            bbox[n, 3] = x[1, 0] + h / 2.
+            ids[n] = trk.id
+            current[n] = trk.current_centroid
+            if trk.previous_centroid is None:
+                previous[n] = np.nan
+            else:
+                previous[n] = trk.previous_centroid
+            n += 1
+        return self._tracks[:n]
+    
+    def active_boxes(self):
+        """
+        Boxes [[x1,y1,x2,y2], ...] of all trackers (confirmed or not) that were
+        matched or created on the last update
+        """
+        boxes = [trk.get_state()[0] for trk in self.trackers if trk.time_since_update < 1]
+        if not boxes:
+            return np.empty((0, 4))
+        return np.array(boxes)
+    
     def _associate_detections_to_trackers(self, detections, trackers, iou_threshold=0.3):
         """
         Assigns detections to tracked object (both represented as bounding boxes)
@@ -219,42 +435,43 @@ class Sort:
         if len(trackers) == 0:
             return np.empty((0, 2), dtype=int), np.arange(len(detections)), np.empty((0, 5), dtype=int)
         
-        iou_matrix = iou_batch(detections[:, :4], trackers[:, :4])
-        
-        if min(iou_matrix.shape) > 0:
-            a = (iou_matrix > iou_threshold).astype(np.int32)
-            if a.sum(1).max() == 1 and a.sum(0).max() == 1:
-                matched_indices = np.stack(np.where(a), axis=1)
-            else:
-                matched_indices = self._linear_assignment(-iou_matrix)
+        if self.association == 'gated' and len(trackers) >= GATED_MIN_TRACKERS:
+            matched_indices, (det_idx, trk_idx, iou) = gated_assignment(detections, trackers, iou_threshold)
+            # IOU of each matched pair, looked up in the (sorted) overlapping pairs; 0 if absent
+            pair_keys = det_idx * len(trackers) + trk_idx
+            matched_keys = matched_indices[:, 0] * len(trackers) + matched_indices[:, 1]
+            matched_iou = np.zeros(len(matched_keys))
+            if len(pair_keys):
+                pos = np.minimum(np.searchsorted(pair_keys, matched_keys), len(pair_keys) - 1)
+                found = pair_keys[pos] == matched_keys
+                matched_iou[found] = iou[pos[found]]
         else:
-            matched_indices = np.empty(shape=(0, 2))
-        
-        unmatched_detections = []
-        for d, det in enumerate(detections):
-            if d not in matched_indices[:, 0]:
-                unmatched_detections.append(d)
-        
-        unmatched_trackers = []
-        for t, trk in enumerate(trackers):
-            if t not in matched_indices[:, 1]:
-                unmatched_trackers.append(t)
-        
-        # Filter out matched with low IOU
-        matches = []
-        for m in matched_indices:
-            if iou_matrix[m[0], m[1]] < iou_threshold:
-                unmatched_detections.append(m[0])
-                unmatched_trackers.append(m[1])
+            iou_matrix = iou_batch(detections[:, :4], trackers[:, :4])
+            
+            if min(iou_matrix.shape) > 0:
+                a = (iou_matrix > iou_threshold).astype(np.int32)
+                if a.sum(1).max() == 1 and a.sum(0).max() == 1:
+                    matched_indices = np.stack(np.where(a), axis=1)
+                else:
+                    matched_indices = self._linear_assignment(-iou_matrix)
             else:
-                matches.append(m.reshape(1, 2))
+                matched_indices = np.empty(shape=(0, 2), dtype=int)
+            matched_iou = iou_matrix[matched_indices[:, 0], matched_indices[:, 1]]
         
-        if len(matches) == 0:
-            matches = np.empty((0, 2), dtype=int)
-        else:
-            matches = np.concatenate(matches, axis=0)
+        # Filter out matched with low IOU
+        low = matched_iou < iou_threshold
+        matches = matched_indices[~low].astype(int).reshape(-1, 2)
+        # Unmatched in SORT order (it decides the order new track IDs are handed out):
+        # never-assigned indices first, then those of rejected low-IOU assignments.
+        # Pairs that do not overlap at all are padding the dense solver adds to fill
+        # its rectangular matrix (which ones is solver-specific, the gated path has
+        # none), so they count as never assigned on both paths
+        overlapping = matched_iou > 0
+        assigned, rejected = matched_indices[overlapping], low[overlapping]
+        unmatched_detections = _unmatched_in_sort_order(len(detections), assigned[:, 0], rejected)
+        unmatched_trackers = _unmatched_in_sort_order(len(trackers), assigned[:, 1], rejected)
         
-        return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+        return matches, unmatched_detections, unmatched_trackers
     
     def _linear_assignment(self, cost_matrix):
         """
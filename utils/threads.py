@@ -0,0 +1,65 @@
+"""
+Thread Budgets for PeopleCounter
+Caps the thread pools of OpenCV, PyTorch, ONNX Runtime and BLAS so a job uses
+a fixed number of cores instead of every core on the host.
+"""
+
+import os
+import sys
+
+import cv2
+
+
+# Environment variables read by BLAS / OpenMP runtimes when they are first loaded
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                   'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
+
+# Keeps the threadpoolctl limit alive for the lifetime of the process
+_blas_limit = None
+
+
+def thread_env(threads):
+    """Environment variables that cap BLAS / OpenMP pools of a child process"""
+    if not threads:
+        return {}
+    return {name: str(threads) for name in THREAD_ENV_VARS}
+
+
+def apply_thread_budget(config):
+    """
+    Apply config['runtime']['threads'] to the libraries of this process
+    (0 leaves library defaults). The ONNX Runtime session picks the budget up
+    through detector.threads unless that is set explicitly.
+    Returns the applied thread count.
+    """
+    global _blas_limit
+    threads = config['runtime']['threads']
+    if not threads:
+        return 0
+
+    # Libraries loaded after this point read the environment
+    os.environ.update(thread_env(threads))
+    cv2.setNumThreads(threads)
+    # Only cap torch when it is used: importing it just for this costs seconds and
+    # hundreds of MB in jobs running other backends
+    if 'torch' in sys.modules or config['detector'].get('backend', 'ultralytics') == 'ultralytics':
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    # BLAS pools already loaded with numpy need threadpoolctl (optional)
+    try:
+        from threadpoolctl import threadpool_limits
+        _blas_limit = threadpool_limits(limits=threads)
+    except ImportError:
+        pass
+    if not config['detector'].get('threads'):
+        config['detector']['threads'] = threads
+    return threads
+
+
+def thread_budget(max_concurrent, cpus=None):
+    """Threads per job so that max_concurrent jobs together use every core once"""
+    cpus = cpus or os.cpu_count() or 1
+    return max(1, cpus // max(1, max_concurrent))
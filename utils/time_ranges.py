@@ -0,0 +1,104 @@
+"""
+Time Ranges for PeopleCounter
+Parsing of video time windows ("0:10:00-0:25:00", [600, 1500]) and their
+conversion to sorted, merged frame ranges, so only the requested parts of a
+recording are decoded and counted.
+"""
+
+from bisect import bisect_right
+
+
+def parse_timestamp(value):
+    """Seconds from a number, '90', '90.5', 'MM:SS' or 'HH:MM:SS(.f)'"""
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        parts = str(value).strip().split(':')
+        if len(parts) > 3 or not all(parts):
+            raise ValueError(f"Invalid time {value!r} (use seconds, MM:SS or HH:MM:SS)")
+        try:
+            seconds = 0.0
+            for part in parts:
+                seconds = seconds * 60 + float(part)
+        except ValueError:
+            raise ValueError(f"Invalid time {value!r} (use seconds, MM:SS or HH:MM:SS)") from None
+    if seconds < 0:
+        raise ValueError(f"Time must not be negative: {value!r}")
+    return seconds
+
+
+def parse_time_range(value):
+    """
+    [start, end] in seconds from 'START-END' (either side may be empty: from
+    the beginning / to the end) or a [start, end] pair (end may be None)
+    """
+    if isinstance(value, str):
+        if '-' not in value:
+            raise ValueError(f"Invalid time range {value!r} (use START-END)")
+        start, end = value.split('-', 1)
+    else:
+        try:
+            start, end = value
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid time range {value!r} (use [start, end])") from None
+    start = parse_timestamp(start) if start not in (None, '') else 0.0
+    end = parse_timestamp(end) if end not in (None, '') else None
+    if end is not None and end <= start:
+        raise ValueError(f"Time range {value!r} ends before it starts")
+    return [start, end]
+
+
+def parse_time_ranges(values):
+    """A list of ranges (see parse_time_range); a single string may hold several, comma-separated"""
+    if values is None:
+        return []
+    if isinstance(values, str):
+        values = [v for v in values.split(',') if v.strip()]
+    return [parse_time_range(v) for v in values]
+
+
+def frame_ranges(time_ranges, fps, total_frames=0):
+    """
+    Convert [start, end] second ranges to sorted, merged (first, last) frame
+    ranges: frames first + 1 .. last (1-based) are processed, last None means
+    to the end of the video. Ranges past total_frames (if known) are dropped.
+    """
+    ranges = []
+    for start, end in sorted(time_ranges, key=lambda r: r[0]):
+        first = int(round(start * fps))
+        last = int(round(end * fps)) if end is not None else None
+        if total_frames > 0:
+            if first >= total_frames:
+                continue
+            last = min(last, total_frames) if last is not None else None
+        if last is not None and last <= first:
+            continue
+        if ranges and (ranges[-1][1] is None or first <= ranges[-1][1]):
+            previous = ranges[-1][1]
+            ranges[-1] = (ranges[-1][0], None if previous is None or last is None else max(previous, last))
+            continue
+        ranges.append((first, last))
+    return ranges
+
+
+def range_index(ranges, frame_index):
+    """Index of the frame range containing frame_index (1-based), or None"""
+    i = bisect_right([first for first, _ in ranges], frame_index - 1) - 1
+    if i < 0:
+        return None
+    last = ranges[i][1]
+    return i if last is None or frame_index <= last else None
+
+
+def range_start(ranges, frame_index):
+    """Frames before the range containing frame_index (0 without ranges)"""
+    i = range_index(ranges, frame_index) if ranges else None
+    return ranges[i][0] if i is not None else 0
+
+
+def skipped_frames(ranges, total_frames):
+    """Source frames outside all ranges (0 when the length is unknown)"""
+    if not ranges or total_frames <= 0:
+        return 0
+    covered = sum((last if last is not None else total_frames) - first for first, last in ranges)
+    return max(0, total_frames - covered)
@@ -0,0 +1,100 @@
+"""
+Occupancy Time Series for PeopleCounter
+Incremental per-second and per-minute bins of entries, exits and occupancy,
+keyed on video time. Each event is an O(1) (amortized) array update; the
+arrays grow by doubling so memory stays compact on long videos.
+"""
+
+import numpy as np
+
+
+class OccupancyBins:
+    """
+    Fixed-width time bins with entry/exit counts and the occupancy at the
+    end of each bin. Events must arrive in non-decreasing video time, which
+    holds for frame-ordered processing.
+    """
+
+    def __init__(self, bin_seconds, initial_bins=64):
+        self.bin_seconds = float(bin_seconds)
+        self.entries = np.zeros(initial_bins, dtype=np.int32)
+        self.exits = np.zeros(initial_bins, dtype=np.int32)
+        self.occupancy = np.zeros(initial_bins, dtype=np.int32)
+        self.num_bins = 0
+        self._current = 0
+        # Last bin whose occupancy value is final
+        self._filled = -1
+
+    def _ensure_capacity(self, index):
+        capacity = len(self.entries)
+        if index < capacity:
+            return
+        while capacity <= index:
+            capacity *= 2
+        for name in ('entries', 'exits', 'occupancy'):
+            grown = np.zeros(capacity, dtype=np.int32)
+            old = getattr(self, name)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def _advance(self, index):
+        """Carry the running occupancy forward into bins [filled+1, index)"""
+        self._ensure_capacity(index)
+        if index > self._filled + 1:
+            self.occupancy[self._filled + 1:index] = self._current
+            self._filled = index - 1
+        self.num_bins = max(self.num_bins, index + 1)
+
+    def add(self, event_type, video_seconds):
+        """Record an 'entry' or 'exit' at the given video time"""
+        index = int(video_seconds // self.bin_seconds)
+        self._advance(index)
+        if event_type == 'entry':
+            self.entries[index] += 1
+            self._current += 1
+        else:
+            self.exits[index] += 1
+            self._current -= 1
+        self.occupancy[index] = self._current
+
+    def finalize(self, duration_seconds):
+        """Extend the bins to cover the whole processed duration"""
+        n = max(self.num_bins, int(np.ceil(duration_seconds / self.bin_seconds)), 1)
+        self._ensure_capacity(n - 1)
+        self.occupancy[self._filled + 1:n] = self._current
+        self._filled = n - 1
+        self.num_bins = n
+
+    def to_dict(self):
+        n = self.num_bins
+        return {
+            'bin_seconds': self.bin_seconds,
+            'entries': self.entries[:n].tolist(),
+            'exits': self.exits[:n].tolist(),
+            'occupancy': self.occupancy[:n].tolist(),
+        }
+
+
+class TimeSeriesAggregator:
+    """Per-second and per-minute occupancy bins updated together"""
+
+    def __init__(self):
+        self.per_second = OccupancyBins(1)
+        self.per_minute = OccupancyBins(60)
+        self.duration = 0.0
+
+    def add(self, event_type, video_seconds):
+        self.per_second.add(event_type, video_seconds)
+        self.per_minute.add(event_type, video_seconds)
+
+    def finalize(self, duration_seconds):
+        self.duration = duration_seconds
+        self.per_second.finalize(duration_seconds)
+        self.per_minute.finalize(duration_seconds)
+
+    def to_dict(self):
+        return {
+            'duration': self.duration,
+            'per_second': self.per_second.to_dict(),
+            'per_minute': self.per_minute.to_dict(),
+        }
@@ -0,0 +1,132 @@
+"""
+Video Helpers for PeopleCounter
+Frame scaling between source resolution and the reduced processing space,
+strided and time-range frame reading
+"""
+
+import time
+
+import cv2
+
+
+class FrameScaler:
+    """
+    Downscales decoded frames once into the processing space and maps
+    results (boxes, points) back to source coordinates where needed.
+    """
+
+    def __init__(self, source_width, source_height, scale=1.0):
+        if not 0 < scale <= 1.0:
+            raise ValueError(f"processing scale must be in (0, 1], got {scale}")
+        self.source_size = (source_width, source_height)
+        self.scale = scale
+        self.size = (max(1, int(round(source_width * scale))), max(1, int(round(source_height * scale))))
+        self.inverse = 1.0 / scale
+
+    @property
+    def active(self):
+        return self.scale != 1.0
+
+    def resize(self, frame):
+        """Source frame -> processing frame (INTER_AREA is the cheapest alias-free downscale)"""
+        if not self.active:
+            return frame
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+
+    def to_source(self, value):
+        """Map a coordinate, point or box from processing space to source pixels"""
+        if not self.active:
+            return value
+        if isinstance(value, (tuple, list)):
+            return type(value)(v * self.inverse for v in value)
+        return value * self.inverse
+
+
+# Gaps up to this many frames are grabbed through instead of seeking: a seek
+# decodes forward from the preceding keyframe anyway
+SEEK_GRAB_LIMIT = 50
+
+
+class DecodeStats:
+    """Source frames read or grabbed, seeks, and the time each took"""
+
+    def __init__(self):
+        self.frames = 0
+        self.decode_seconds = 0.0
+        self.seeks = 0
+        self.seek_seconds = 0.0
+
+    @property
+    def seconds_per_frame(self):
+        return self.decode_seconds / self.frames if self.frames else 0.0
+
+
+def seek(cap, frame_position, current=0):
+    """
+    Position the capture so the next read returns frame `frame_position`
+    (0-based), `current` being the frame it would return now. Short forward
+    gaps are grabbed through; longer ones use CAP_PROP_POS_FRAMES, which the
+    FFmpeg backend resolves by seeking to the preceding keyframe and decoding
+    forward. Falls back to grabbing from the start when the backend cannot
+    seek exactly. Returns False if the video is shorter.
+    """
+    gap = frame_position - current
+    if gap == 0:
+        return True
+    if 0 < gap <= SEEK_GRAB_LIMIT:
+        for _ in range(gap):
+            if not cap.grab():
+                return False
+        return True
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_position)
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_position:
+        return True
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(frame_position):
+        if not cap.grab():
+            return False
+    return True
+
+
+def iter_frames(cap, stride=1, start=0, ranges=None, stats=None):
+    """
+    Yield (frame_index, frame) for every `stride`-th frame of an open capture
+    (1-based index). Skipped frames are only grabbed, never decoded.
+    stride may also be a callable, asked again after every frame.
+    start: frames already consumed (reading resumes at frame start + 1)
+    ranges: (first, last) frame ranges from time_ranges.frame_ranges; only
+    frames first + 1 .. last are read, the gaps in between are seeked over
+    stats: DecodeStats to accumulate read and seek times into
+    """
+    current_stride = stride if callable(stride) else (lambda: stride)
+    stats = stats or DecodeStats()
+    index = 0
+    for first, last in (ranges if ranges is not None else [(0, None)]):
+        first = max(first, start)
+        if last is not None and last <= first:
+            continue
+        t0 = time.perf_counter()
+        if not seek(cap, first, index):
+            return
+        if first - index > SEEK_GRAB_LIMIT:
+            stats.seeks += 1
+        stats.seek_seconds += time.perf_counter() - t0
+        index = first
+        while last is None or index < last:
+            t0 = time.perf_counter()
+            ret, frame = cap.read()
+            stats.decode_seconds += time.perf_counter() - t0
+            if not ret:
+                return
+            stats.frames += 1
+            index += 1
+            yield index, frame
+            t0 = time.perf_counter()
+            for _ in range(current_stride() - 1):
+                if last is not None and index >= last:
+                    break
+                if not cap.grab():
+                    return
+                stats.frames += 1
+                index += 1
+            stats.decode_seconds += time.perf_counter() - t0